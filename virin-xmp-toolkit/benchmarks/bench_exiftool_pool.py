@@ -0,0 +1,76 @@
+"""
+Benchmark: metadata write time with 1, 2, 4 and 8 exiftool workers.
+
+Builds a synthetic folder of a few large "videos" and many small "photos". Every file is
+a minimal JPEG with trailing padding, so exiftool has to copy the whole file on each
+rewrite, just like a real video. The same tags are then written with every pool size.
+
+Point it at a folder on the drive you care about (NAS or local SSD), results differ a lot:
+    python -m benchmarks.bench_exiftool_pool [folder] [large_count] [small_count] [large_mb]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from models.meta_edit import ExifToolPool, ExifToolService
+
+WORKER_COUNTS = [1, 2, 4, 8]
+SMALL_FILE_MB = 8
+# SOI, JFIF APP0 and EOI: the smallest JPEG exiftool will write to
+MINIMAL_JPEG = (
+    b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00\xff\xd9"
+)
+TAGS = {"Title": "Benchmark", "Creator": "USAF Band Production", "Keywords": "USAFBand"}
+PARAMS = ["-P", "-overwrite_original"]
+
+
+def _make_file(path, megabytes) -> None:
+    block = os.urandom(1 << 20)
+    with open(path, "wb") as file:
+        file.write(MINIMAL_JPEG)
+        for _ in range(megabytes):
+            file.write(block)
+
+
+def _make_dataset(directory, large_count, small_count, large_mb) -> list:
+    files = []
+    for number in range(large_count):
+        files.append(os.path.join(directory, f"video_{number:03}.jpg"))
+        _make_file(files[-1], large_mb)
+    for number in range(small_count):
+        files.append(os.path.join(directory, f"photo_{number:04}.jpg"))
+        _make_file(files[-1], SMALL_FILE_MB)
+    return files
+
+
+def main(folder=None, large_count=8, small_count=200, large_mb=512) -> None:
+    directory = tempfile.mkdtemp(prefix="virin-bench-", dir=folder)
+    try:
+        files = _make_dataset(directory, large_count, small_count, large_mb)
+        total_mb = large_count * large_mb + small_count * SMALL_FILE_MB
+        print(f"{len(files)} files, {total_mb} MB in {directory}")
+        for workers in WORKER_COUNTS:
+            pool = ExifToolPool(workers)
+            # start the processes outside the timed run, the app keeps them open
+            for service in pool._get_services(workers):
+                service.call("execute", "-ver")
+            start = time.perf_counter()
+            results = pool.set_tags(files, TAGS, PARAMS)
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for result in results if result.error)
+            print(
+                f"workers: {workers}  {elapsed:8.2f} s  "
+                f"{total_mb / elapsed:8.1f} MB/s  failed: {failed}"
+            )
+            pool.shutdown()
+    finally:
+        ExifToolService.shared().shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:5]
+    main(*(args[:1] + [int(arg) for arg in args[1:]]))
@@ -0,0 +1,62 @@
+"""
+Benchmark: rename journal overhead per thousand renames.
+
+Renames a folder of empty files with a plain RenamePlan and with the same plan journaled
+(as FileRenamer does), then prints the extra time per 1000 renames.
+
+Run from the virin-xmp-toolkit folder:
+    python -m benchmarks.bench_rename_journal [file_count] [rounds]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from models.rename_journal import RenameJournal
+from models.rename_plan import RenamePlan
+
+
+def _make_files(directory, count) -> list:
+    names = [f"MVI_{number:05}.MP4" for number in range(count)]
+    for name in names:
+        open(os.path.join(directory, name), "wb").close()
+    return names
+
+
+def _run(directory, names, journal_dir=None) -> float:
+    """Renames names > virin-like names and back. Returns seconds for the forward batch."""
+    pairs = [(name, f"20241028-F-F3965-{index:05}.MP4") for index, name in enumerate(names)]
+    plan = RenamePlan(directory, pairs, os.listdir(directory))
+    start = time.perf_counter()
+    if journal_dir is None:
+        for _ in plan.execute():
+            pass
+    else:
+        journal = RenameJournal(directory, journal_dir)
+        batch = journal.begin(plan.steps)
+        for _ in plan.execute(lambda index: journal.commit(batch, index)):
+            pass
+        journal.end(batch)
+        journal.close()
+    elapsed = time.perf_counter() - start
+    for source, target in pairs:
+        os.rename(os.path.join(directory, target), os.path.join(directory, source))
+    return elapsed
+
+
+def main(count=5000, rounds=5) -> None:
+    with tempfile.TemporaryDirectory() as media, tempfile.TemporaryDirectory() as journals:
+        names = _make_files(media, count)
+        plain = min(_run(media, names) for _ in range(rounds))
+        journaled = min(_run(media, names, journals) for _ in range(rounds))
+
+    per_thousand = 1000 / count
+    print(f"files: {count}, best of {rounds}")
+    print(f"plain rename:     {plain * per_thousand * 1000:8.2f} ms / 1000 renames")
+    print(f"journaled rename: {journaled * per_thousand * 1000:8.2f} ms / 1000 renames")
+    print(f"journal overhead: {(journaled - plain) * per_thousand * 1000:8.2f} ms / 1000 renames")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,90 @@
+"""
+Benchmark: cold start of the GUI up to the first paint of the window.
+
+Starts the app with --profile-startup --quit-after-paint a few times and prints the phase
+timings of the fastest run, the wall clock from process start, and the packages that
+take the longest to import (from python -X importtime). Exits with 1 if the fastest run
+is over the startup budget (VIRIN_STARTUP_BUDGET overrides it).
+
+Run from the virin-xmp-toolkit folder, offscreen works without a display:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_startup [rounds]
+
+A frozen build can be measured too (phases only, it takes no -X options):
+    python -m benchmarks.bench_startup 5 dist/virin-xmp-toolkit/virin-xmp-toolkit
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from models.startup_profile import (
+    PROFILE_STARTUP_FLAG,
+    QUIT_AFTER_PAINT_FLAG,
+    format_report,
+    get_startup_budget,
+    parse_importtime,
+    summarize_imports,
+)
+
+TIMEOUT_SECONDS = 60
+TOOLKIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_startup(executable=None, importtime=False) -> tuple:
+    """
+    Starts the app once and waits for it to quit after the first paint.
+
+    Args:
+        executable (str): A frozen build, None runs main.py with this interpreter.
+        importtime (bool): Also collect -X importtime output (not for frozen builds).
+
+    Returns:
+        tuple: (wall clock seconds, startup report dict, ImportTiming list)
+    """
+    flags = [PROFILE_STARTUP_FLAG, QUIT_AFTER_PAINT_FLAG]
+    if executable:
+        command = [executable, *flags]
+    else:
+        command = [sys.executable, *(["-X", "importtime"] if importtime else [])]
+        command += ["main.py", *flags]
+    start = time.perf_counter()
+    process = subprocess.run(
+        command,
+        cwd=TOOLKIT_DIR,  # main.py resolves resources from the working directory
+        capture_output=True,
+        text=True,
+        timeout=TIMEOUT_SECONDS,
+        check=True,
+    )
+    seconds = time.perf_counter() - start
+    report = json.loads(process.stdout.strip().splitlines()[-1])
+    return seconds, report, parse_importtime(process.stderr)
+
+
+def main(rounds=5, executable=None) -> int:
+    # the first run also fills the OS file cache, like any start after the first
+    runs = [run_startup(executable) for _ in range(rounds)]
+    seconds, report, _ = min(runs, key=lambda run: run[0])
+    print(format_report(report))
+    budget = get_startup_budget()
+    print(
+        f"\nwall clock to first paint: {seconds * 1000:.0f} ms "
+        f"(budget {budget * 1000:.0f} ms)"
+    )
+    if not executable:
+        _, _, timings = run_startup(importtime=True)
+        print("\nslowest imports (self time per package):")
+        for package, milliseconds in summarize_imports(timings):
+            print(f"  {package:<28}{milliseconds:>8.1f} ms")
+    return 1 if seconds > budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+            sys.argv[2] if len(sys.argv) > 2 else None,
+        )
+    )
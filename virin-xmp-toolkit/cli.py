@@ -0,0 +1,411 @@
+"""
+Module Name: cli
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+Headless command line for scripted batch jobs (cron, ingest servers, shell pipelines).
+Run from the virin-xmp-toolkit folder:
+
+    python -m cli rename /media/card --shot 1 --date 20241028
+    python -m cli undo /media/card
+    python -m cli meta read /media/card --ext mp4
+    python -m cli meta write /media/card --ext mp4 --creator "USAF Band Production"
+    python -m cli meta embed-sidecars /media/card --ext mp4
+    python -m cli ingest /media/cardA /media/cardB --dest /srv/shoot --shot 1
+    python -m cli watch /srv/drop
+    python -m cli caption "Band concert at the National Mall"
+
+Every command prints one JSON object to stdout and exits with 1 when a file failed.
+watch runs until Ctrl+C with the saved watch profile and prints one object per batch.
+PyQt is never imported and each command imports only the models it needs, so exiftool is
+only loaded by the meta commands (and --capture-date) and ollama only by caption.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # the command ran, but some files failed
+# command line option -> the metadata keys it sets, as on the Metadata page
+METADATA_OPTIONS = {
+    "creator": ["creator"],
+    "writer": ["writer"],
+    "title": ["title", "headline"],
+    "description": ["description"],
+    "keywords": ["keywords"],
+    "city": ["city"],
+    "state": ["state"],
+    "country": ["country"],
+    "copyright": ["copyright", "rights"],
+}
+
+
+def get_application_path() -> str:
+    """Folder holding docs/ and resources/, resolved through sys._MEIPASS when frozen"""
+    if getattr(sys, "frozen", False):
+        return os.path.abspath(sys._MEIPASS)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def _print_json(output) -> None:
+    json.dump(output, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+def _get_extension(args):
+    """--ext values, ALL_MEDIA when none were given"""
+    from models.file_rename import ALL_MEDIA
+
+    if not args.ext:
+        return ALL_MEDIA
+    return args.ext[0] if len(args.ext) == 1 else set(args.ext)
+
+
+def _rename_result_json(result) -> dict:
+    """One RenameResult as JSON"""
+    output = {
+        "source": result.source,
+        "target": result.target,
+        "status": result.status,
+        "error": None if result.error is None else str(result.error),
+    }
+    if virin := getattr(result.error, "virin", None):
+        output["duplicate_of"] = virin  # DuplicateFileError
+    return output
+
+
+def rename(args) -> int:
+    """Renames a folder (or a card tree with --recursive) to VIRINs"""
+    from models.content_index import ContentIndex
+    from models.file_rename import (
+        DUPLICATES_FLAG,
+        DUPLICATES_SKIP,
+        FileRenamer,
+        RenameSummary,
+    )
+    from models.sequence_registry import SequenceRegistry
+
+    selected_extension = _get_extension(args)
+    renamer = FileRenamer(content_index=ContentIndex(), registry=SequenceRegistry())
+    summary = RenameSummary(selected_extension)
+    results = []
+    for result in renamer.iter_rename_results(
+        args.path,
+        selected_extension,
+        args.date,
+        args.shot,
+        args.seq,
+        args.capture_date,
+        recursive=args.recursive,
+        global_numbering=args.global_numbering,
+        keep_pairs=args.keep_pairs,
+        duplicates=DUPLICATES_SKIP if args.skip_duplicates else DUPLICATES_FLAG,
+    ):
+        summary.add(result)
+        results.append(_rename_result_json(result))
+    _print_json(
+        {
+            "renamed": summary.renamed,
+            "skipped": summary.skipped,
+            "failed": summary.failed,
+            "duplicates": summary.duplicates,
+            "results": results,
+        }
+    )
+    return EXIT_FAILED if summary.failed else EXIT_OK
+
+
+def undo(args) -> int:
+    """Reverts the last rename of a folder, using its rename journal"""
+    from models.content_index import ContentIndex
+    from models.file_rename import FileRenamer
+
+    renamer = FileRenamer(content_index=ContentIndex())
+    renamer.recover_write_actions(os.path.abspath(args.path))
+    results, conflicts = renamer.undo_last()
+    failed = [result for result in results if result.error]
+    _print_json(
+        {
+            "undone": bool(results),
+            "conflicts": [
+                {"path": path, "reason": reason} for path, reason in conflicts
+            ],
+            "results": [_rename_result_json(result) for result in results],
+        }
+    )
+    return EXIT_FAILED if conflicts or failed else EXIT_OK
+
+
+def meta_read(args) -> int:
+    """Reads the metadata fields of every matching file and reports where they differ"""
+    from models.meta_edit import MIXED, MetaTool
+
+    meta = MetaTool()
+    consensus = meta.retrieve_consensus(args.path, args.ext)
+    _print_json(
+        {
+            "files": next(iter(consensus.values())).total if consensus else 0,
+            "fields": {
+                field: {
+                    "value": result.value,
+                    "mixed": result.value == MIXED,
+                    "common_count": result.common_count,
+                    "outliers": result.outliers,
+                }
+                for field, result in consensus.items()
+            },
+        }
+    )
+    return EXIT_OK
+
+
+def meta_write(args) -> int:
+    """Writes the given fields to every matching file, only where they differ"""
+    from models.meta_edit import MetaTool
+
+    metadata = {}
+    for option, keys in METADATA_OPTIONS.items():
+        value = getattr(args, option)
+        if value is not None:
+            metadata.update(dict.fromkeys(keys, value))
+    if not metadata:
+        _print_json({"error": "no metadata fields given"})
+        return EXIT_FAILED
+    meta = MetaTool()
+    files = meta.list_files(args.path, args.ext)
+    plan = meta.plan_write(files, metadata)
+    if args.dry_run:
+        _print_json({"files": len(files), "plan": plan})
+        return EXIT_OK
+    results = meta.apply_plan(plan, args.sidecar)
+    _print_json(
+        {
+            "files": len(files),
+            "written": [result.path for result in results if not result.error],
+            "unchanged": len(files) - len(plan),
+            "failed": [
+                {"path": result.path, "error": result.error}
+                for result in results
+                if result.error
+            ],
+        }
+    )
+    return EXIT_FAILED if any(result.error for result in results) else EXIT_OK
+
+
+def meta_embed_sidecars(args) -> int:
+    """Moves .xmp sidecar values into the media files, the off-hours half of --sidecar"""
+    from models.meta_edit import MetaTool
+
+    summary = MetaTool().embed_sidecar_values(args.path, args.ext, args.keep_sidecars)
+    failed = [result for result in summary.results if result.error]
+    _print_json(
+        {
+            "sidecars": summary.sidecars,
+            "embedded": len(summary.results) - len(failed),
+            "unchanged": len(summary.unchanged),
+            "removed": summary.removed,
+            "stripped": summary.stripped,
+            "failed": [{"path": result.path, "error": result.error} for result in failed],
+        }
+    )
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def ingest(args) -> int:
+    """Copies cards into one folder with VIRIN names in a single pass"""
+    from models.content_index import ContentIndex
+    from models.file_rename import FileRenamer
+    from models.ingest import COPIED, Ingest
+    from models.sequence_registry import SequenceRegistry
+
+    renamer = FileRenamer(content_index=ContentIndex(), registry=SequenceRegistry())
+    summary = Ingest(renamer).ingest(
+        args.cards,
+        args.dest,
+        args.date,
+        args.shot,
+        args.seq,
+        _get_extension(args),
+        args.capture_date,
+        args.keep_pairs,
+    )
+    _print_json(
+        {
+            "manifest": summary.manifest,
+            "seconds": round(summary.seconds, 3),
+            "results": [result._asdict() for result in summary.results],
+        }
+    )
+    failed = any(result.status != COPIED for result in summary.results)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def watch(args) -> int:
+    """Renames and tags new files in a drop folder with the saved watch profile"""
+    import threading
+    from models.content_index import ContentIndex
+    from models.file_rename import FileRenamer
+    from models.sequence_registry import SequenceRegistry
+    from models.watch_folder import WatchFolder, load_profile
+
+    profile = load_profile()
+    if profile is None:
+        _print_json({"error": "no saved watch profile, start a watch in the window first"})
+        return EXIT_FAILED
+    renamer = FileRenamer(content_index=ContentIndex(), registry=SequenceRegistry())
+    folder = WatchFolder(args.path, profile, renamer)
+
+    def on_poll(results, stats):
+        if results:
+            _print_json(
+                {
+                    "results": [_rename_result_json(result) for result in results],
+                    "stats": stats._asdict(),
+                }
+            )
+            sys.stdout.flush()
+
+    try:
+        folder.run(threading.Event(), on_poll=on_poll)
+    except KeyboardInterrupt:
+        pass
+    stats = folder.stats()
+    _print_json({"stats": stats._asdict()})
+    return EXIT_FAILED if stats.failed else EXIT_OK
+
+
+def caption(args) -> int:
+    """Writes a caption with the local Ollama model, '-' reads the details from stdin"""
+    from models.ai_backend import VIRINAI
+
+    details = sys.stdin.read() if args.details == "-" else args.details
+    text = "".join(
+        chunk["message"]["content"]
+        for chunk in VIRINAI(get_application_path()).get_caption(details)
+    )
+    _print_json({"caption": text})
+    return EXIT_OK
+
+
+def _add_rename_options(parser) -> None:
+    """VIRIN options shared by rename and ingest"""
+    parser.add_argument("--shot", type=int, required=True, help="shoot number")
+    parser.add_argument(
+        "--seq",
+        type=int,
+        help="starting sequence number, numbered from the sequence registry if omitted",
+    )
+    parser.add_argument(
+        "--date", default="", help="fixed YYYYMMDD date instead of the file dates"
+    )
+    parser.add_argument(
+        "--ext", action="append", help="file format, repeat for more (default all media)"
+    )
+    parser.add_argument(
+        "--capture-date",
+        action="store_true",
+        help="date and order files by their embedded capture date",
+    )
+    parser.add_argument(
+        "--keep-pairs",
+        action="store_true",
+        help="a RAW and JPEG/HEIC with the same name get the same VIRIN",
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Builds the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog="python -m cli", description="VIRIN XMP Toolkit without the GUI"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rename_parser = commands.add_parser("rename", help="rename files to VIRINs")
+    rename_parser.add_argument("path")
+    _add_rename_options(rename_parser)
+    rename_parser.add_argument(
+        "--recursive", action="store_true", help="rename every folder of the tree"
+    )
+    rename_parser.add_argument(
+        "--global-numbering",
+        action="store_true",
+        help="with --recursive, one sequence per date for the whole tree",
+    )
+    rename_parser.add_argument(
+        "--skip-duplicates",
+        action="store_true",
+        help="leave files that already got a VIRIN instead of flagging them",
+    )
+    rename_parser.set_defaults(handler=rename)
+
+    undo_parser = commands.add_parser("undo", help="revert the last rename of a folder")
+    undo_parser.add_argument("path")
+    undo_parser.set_defaults(handler=undo)
+
+    meta_parser = commands.add_parser("meta", help="read or write metadata")
+    meta_commands = meta_parser.add_subparsers(dest="meta_command", required=True)
+    read_parser = meta_commands.add_parser("read", help="compare fields across files")
+    write_parser = meta_commands.add_parser("write", help="write fields to files")
+    embed_parser = meta_commands.add_parser(
+        "embed-sidecars", help="write .xmp sidecar values into the files"
+    )
+    for meta_command in (read_parser, write_parser, embed_parser):
+        meta_command.add_argument("path")
+        meta_command.add_argument("--ext", required=True, help="file format")
+    read_parser.set_defaults(handler=meta_read)
+    for option in METADATA_OPTIONS:
+        write_parser.add_argument(f"--{option}")
+    write_parser.add_argument(
+        "--dry-run", action="store_true", help="only report what would be written"
+    )
+    write_parser.add_argument(
+        "--sidecar", action="store_true", help="write .xmp sidecars, not the files"
+    )
+    write_parser.set_defaults(handler=meta_write)
+    embed_parser.add_argument(
+        "--keep-sidecars", action="store_true", help="keep the .xmp files"
+    )
+    embed_parser.set_defaults(handler=meta_embed_sidecars)
+
+    ingest_parser = commands.add_parser("ingest", help="copy cards with VIRIN names")
+    ingest_parser.add_argument("cards", nargs="+")
+    ingest_parser.add_argument("--dest", required=True, help="destination folder")
+    _add_rename_options(ingest_parser)
+    ingest_parser.set_defaults(handler=ingest)
+
+    watch_parser = commands.add_parser(
+        "watch", help="rename and tag new files with the saved watch profile"
+    )
+    watch_parser.add_argument("path", help="drop folder")
+    watch_parser.set_defaults(handler=watch)
+
+    caption_parser = commands.add_parser("caption", help="write a caption with AI")
+    caption_parser.add_argument("details", help="what the photo or video shows, - for stdin")
+    caption_parser.set_defaults(handler=caption)
+    return parser
+
+
+def _is_exiftool_error(error) -> bool:
+    """True for an ExifToolException, without importing exiftool for commands that never load it"""
+    exceptions = sys.modules.get("exiftool.exceptions")
+    return exceptions is not None and isinstance(error, exceptions.ExifToolException)
+
+
+def main(argv=None) -> int:
+    args = get_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except Exception as error:  # missing folder, exiftool not installed or crashed ...
+        if not isinstance(error, OSError) and not _is_exiftool_error(error):
+            raise
+        _print_json({"error": str(error) or type(error).__name__})
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,9 +12,16 @@ It allows for file-renaming and metadata writing with ai help.
 import os
 import sys
 
+# first, so the startup clock includes the imports below
+from models.startup_profile import (
+    PROFILE_STARTUP_FLAG,
+    QUIT_AFTER_PAINT_FLAG,
+    StartupProfile,
+)
 from PyQt6.QtWidgets import QApplication
 from PyQt6 import QtGui
 from views.main_window import MainWindow
+from models.meta_edit import ExifToolService
 
 
 def get_application_path() -> str:
@@ -25,11 +32,20 @@ def get_application_path() -> str:
 
 
 if __name__ == "__main__":
+    profile = StartupProfile.shared()
+    profile.mark("imports")
+    profile.enabled = PROFILE_STARTUP_FLAG in sys.argv
     app = QApplication(sys.argv)
+    if QUIT_AFTER_PAINT_FLAG in sys.argv:
+        profile.on_finish = app.quit
     AIR_FORCE_LOGO = "resources/images/US_Air_Force_Logo_Solid_Colour.svg"
     resolved_app_path = get_application_path()
     app.setWindowIcon(QtGui.QIcon(os.path.join(resolved_app_path, AIR_FORCE_LOGO)))
+    # stop the shared exiftool process before Qt tears down the worker threads
+    app.aboutToQuit.connect(ExifToolService.shared().shutdown)
+    profile.mark("QApplication")
 
     window = MainWindow(resolved_app_path)
     window.show()
+    profile.mark("show")
     sys.exit(app.exec())
@@ -6,13 +6,30 @@ Description:
 
 This module is used to interact will a locally installed Ollama model.
 It loads some pre-prompts to make photo/video captioning easier.
+
+Nothing here runs at startup: ollama is imported on first use (it takes about half a
+second), and warm_up() loads the model on a background thread once the window is up.
+A missing or stopped Ollama server only makes the AI page unavailable.
 """
 
 from collections.abc import Iterator
-import ollama
 import os
+import threading
 
 PATH_TO_PREPROMPT = ["docs", "pre_prompt.txt"]
+MODEL_NAME = "llama3.2"
+# readiness of the model, shown on the AI page
+AI_NOT_STARTED = "not started"
+AI_STARTING = "starting"
+AI_READY = "ready"
+AI_UNAVAILABLE = "unavailable"
+
+
+def _import_ollama():
+    """Imports ollama on first use, so the window and the command line start without it"""
+    import ollama
+
+    return ollama
 
 
 class VIRINAI:
@@ -22,23 +39,47 @@ class VIRINAI:
 
     def __init__(self, resolved_app_path) -> None:
         """
-        Creates a chat session using the 'llama3.2' model.
-        Sends a user's pre-prompt instructions to the model.
+        Only remembers where the pre-prompt is. Call warm_up() to load the model ahead of
+        the first caption.
         """
         self.resolved_app_path = resolved_app_path
-        # used as warm up
-        _ = ollama.chat(
-            model="llama3.2",
-            messages=[
-                {
-                    "role": "user",
-                    "content": self._get_instructions(
-                        os.path.join(resolved_app_path, *PATH_TO_PREPROMPT)
-                    ),
-                }
-            ],
-            stream=True,
-        )
+        self._lock = threading.Lock()
+        self._state = AI_NOT_STARTED
+        self._error = None
+
+    @property
+    def state(self) -> str:
+        """One of AI_NOT_STARTED, AI_STARTING, AI_READY or AI_UNAVAILABLE"""
+        with self._lock:
+            return self._state
+
+    @property
+    def error(self) -> str:
+        """Why the model is unavailable, None otherwise"""
+        with self._lock:
+            return self._error
+
+    def _set_state(self, state, error=None) -> None:
+        with self._lock:
+            self._state = state
+            self._error = error
+
+    def warm_up(self) -> str:
+        """
+        Imports ollama and loads the model into memory (an empty prompt only loads it).
+        Blocks until the server answers, so run it off the GUI thread.
+
+        Returns:
+            str: The new state, AI_READY or AI_UNAVAILABLE.
+        """
+        self._set_state(AI_STARTING)
+        try:
+            _import_ollama().generate(model=MODEL_NAME, prompt="")
+        except Exception as error:  # ImportError, connection refused, model not pulled ...
+            self._set_state(AI_UNAVAILABLE, str(error) or type(error).__name__)
+        else:
+            self._set_state(AI_READY)
+        return self.state
 
     def _get_instructions(self, path) -> str:
         """
@@ -52,24 +93,32 @@ class VIRINAI:
 
     def get_caption(self, details) -> Iterator:
         """
-        Generates a caption based on user input
+        Generates a caption based on user input.
+        Works without warm_up(), the first chunk then waits for the model to load.
 
         Returns:
             stream: A stream response from the 'ollama.chat' function
                     using the 'llama3.2' model.
         """
-        stream = ollama.chat(
-            model="llama3.2",
-            messages=[
-                {
-                    "role": "user",
-                    "content": self._get_instructions(
-                        os.path.join(self.resolved_app_path, *PATH_TO_PREPROMPT)
-                    )
-                    + "\n"
-                    + details,
-                }
-            ],
-            stream=True,
-        )
-        return stream
+        try:
+            stream = _import_ollama().chat(
+                model=MODEL_NAME,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": self._get_instructions(
+                            os.path.join(self.resolved_app_path, *PATH_TO_PREPROMPT)
+                        )
+                        + "\n"
+                        + details,
+                    }
+                ],
+                stream=True,
+            )
+            for chunk in stream:
+                if self.state != AI_READY:
+                    self._set_state(AI_READY)
+                yield chunk
+        except Exception as error:
+            self._set_state(AI_UNAVAILABLE, str(error) or type(error).__name__)
+            raise
@@ -0,0 +1,29 @@
+"""
+Module Name: app_data
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module resolves the per-user data folder for journals, caches and databases.
+Nothing is ever written into the media folders themselves.
+
+"""
+
+import os
+
+APP_DATA_ENV = "VIRIN_XMP_TOOLKIT_HOME"
+APP_DATA_FOLDER = ".virin-xmp-toolkit"
+
+
+def get_app_data_dir(*parts) -> str:
+    """
+    Returns (and creates) a folder inside the application data folder.
+    Set VIRIN_XMP_TOOLKIT_HOME to move it, e.g. for tests or a shared server.
+    """
+    base = os.environ.get(APP_DATA_ENV) or os.path.join(
+        os.path.expanduser("~"), APP_DATA_FOLDER
+    )
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
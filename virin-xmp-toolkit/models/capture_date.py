@@ -0,0 +1,145 @@
+"""
+Module Name: capture_date
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module reads embedded capture dates (DateTimeOriginal/CreateDate/QuickTime CreateDate)
+for a whole folder with one batched exiftool call.
+Filesystem dates are often wrong after a copy or NAS sync, capture dates are not.
+
+EXIF dates are local time, QuickTime dates are UTC. QuickTime dates are shifted to the
+computer's local time, so videos land on the same calendar day as the stills shot beside
+them and sort in order with them.
+
+Results are cached on path + size + mtime (the last MAX_CACHED_DATES files) so repeat
+renames never re-read a file.
+"""
+
+import calendar
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from exiftool.exceptions import ExifToolException
+
+from models.meta_edit import ExifToolService
+
+CAPTURE_DATE_TAGS = ["DateTimeOriginal", "CreateDate"]
+# exiftool stops scanning at the metadata it needs (skips mdat on large MP4s)
+FAST_SCAN_PARAMS = ["-fast2"]
+EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+QUICKTIME_GROUP = "QuickTime"
+MAX_CACHED_DATES = 50000
+
+
+def parse_exif_date(value):
+    """
+    Converts an exiftool date string to a timestamp.
+    The date is taken as written (no timezone shift) so it keeps the camera's calendar day.
+
+    Returns:
+        float: seconds since epoch, or None for empty/zero dates.
+    """
+    try:
+        return float(calendar.timegm(time.strptime(str(value)[:19], EXIF_DATE_FORMAT)))
+    except ValueError:
+        return None
+
+
+def utc_to_local(timestamp) -> float:
+    """Shifts a UTC date to local time, written as parse_exif_date writes local dates"""
+    return float(calendar.timegm(time.localtime(timestamp)))
+
+
+def _pick_capture_date(tags):
+    """Chooses DateTimeOriginal, then a non-QuickTime CreateDate, then QuickTime:CreateDate"""
+    ranked = {}
+    for key, value in tags.items():
+        group, _, name = key.rpartition(":")
+        if name == "DateTimeOriginal":
+            rank = 0
+        elif name == "CreateDate":
+            rank = 2 if group == QUICKTIME_GROUP else 1
+        else:
+            continue
+        timestamp = parse_exif_date(value)
+        # QuickTime dates are UTC unless a time zone is written after them
+        if timestamp is not None and group == QUICKTIME_GROUP and len(str(value)) <= 19:
+            timestamp = utc_to_local(timestamp)
+        if timestamp is not None and rank not in ranked:
+            ranked[rank] = timestamp
+    return ranked[min(ranked)] if ranked else None
+
+
+class CaptureDateReader:
+    """
+    Reads capture dates for snapshot records in one exiftool invocation per folder.
+
+    Args:
+        exiftool (ExifToolService): Optional service (defaults to the shared one).
+    """
+
+    # (path, size, mtime) -> timestamp or None, least recently used first, shared by readers
+    cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, exiftool=None) -> None:
+        self._exiftool = exiftool or ExifToolService.shared()
+
+    def read(self, snapshot) -> dict:
+        """
+        Returns capture timestamps for the records of a DirectorySnapshot.
+
+        Args:
+            snapshot (DirectorySnapshot): Folder listing with stat records.
+
+        Returns:
+            dict: file name -> timestamp. Files without a usable embedded date are left out.
+        """
+        dates = {}
+        missing = {}
+        with self._cache_lock:
+            for record in snapshot.records:
+                key = (os.path.join(snapshot.path, record.name), record.size, record.mtime)
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    if self.cache[key] is not None:
+                        dates[record.name] = self.cache[key]
+                else:
+                    missing[key[0]] = key
+
+        if missing:
+            read = self._read_batch(list(missing))
+            with self._cache_lock:
+                for path, timestamp in read.items():
+                    self.cache[missing[path]] = timestamp
+                    if timestamp is not None:
+                        dates[os.path.basename(path)] = timestamp
+                while len(self.cache) > MAX_CACHED_DATES:
+                    self.cache.popitem(last=False)
+        return dates
+
+    def _read_batch(self, files) -> dict:
+        """
+        One exiftool call for every file. Unreadable files fall back to filesystem dates.
+
+        Returns:
+            dict: path -> timestamp or None
+        """
+        results = dict.fromkeys(files)
+        try:
+            metadata = self._exiftool.get_tags(
+                files, CAPTURE_DATE_TAGS, params=FAST_SCAN_PARAMS, check_execute=False
+            )
+        except (ExifToolException, OSError):
+            return results
+
+        by_name = {os.path.basename(path): path for path in files}
+        for tags in metadata:
+            path = by_name.get(os.path.basename(tags.get("SourceFile", "")))
+            if path is not None:
+                results[path] = _pick_capture_date(tags)
+        return results
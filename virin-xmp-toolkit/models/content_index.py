@@ -0,0 +1,269 @@
+"""
+Module Name: content_index
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module remembers the content of every file the toolkit has given a VIRIN, so a card
+that is offloaded a second time is recognized instead of getting fresh VIRINs.
+
+Files are compared in three steps, each only for the files that passed the one before:
+size, a quick hash of size + the first and last 64 KB, and finally a full BLAKE2b hash of
+the memory-mapped file. Size and quick hash are recorded from the bytes a file had when it
+got its VIRIN, before any metadata is written to it. A renamed file is not read in full
+then: only when a new file collides with it is the new file hashed in full, and the indexed
+file too if it still has the bytes it was indexed with (the result is stored). An indexed
+file that was rewritten since, e.g. tagged by exiftool, is matched on size and quick hash
+alone. Ingest already hashes every copy in full, that hash is stored right away. Hashing
+runs on a thread pool.
+
+Renaming an indexed file again moves its row to the new name. Undoing a rename moves it
+back, or removes it when the file loses its VIRIN. Indexed files that are gone (deleted,
+or on a drive that is not connected) are never matched.
+
+The index is a SQLite table in the app data folder: path, size, quick, full hash, VIRIN.
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from models.app_data import get_app_data_dir
+
+INDEX_FOLDER = "index"
+INDEX_DATABASE = "content.sqlite"
+EDGE_BYTES = 64 << 10  # read from each end of a file for the quick hash
+HASH_CHUNK = 8 << 20
+
+
+class DuplicateFileError(Exception):
+    """The file's content was already given a VIRIN"""
+
+    def __init__(self, virin, path) -> None:
+        super().__init__(f"already ingested as {virin}")
+        self.virin = virin
+        self.path = path
+
+
+class ContentEntry(NamedTuple):
+    """One file to add to the index"""
+
+    path: str
+    virin: str
+    size: int
+    quick: str
+    full: str = None  # BLAKE2b of the whole file before any metadata was written, if known
+
+
+def quick_hash(path, size) -> str:
+    """Hash of the size and the first and last EDGE_BYTES of a file"""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as file:
+        digest.update(file.read(EDGE_BYTES))
+        if size > EDGE_BYTES:
+            file.seek(max(size - EDGE_BYTES, EDGE_BYTES))
+            digest.update(file.read(EDGE_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(path) -> str:
+    """BLAKE2b of the whole file, read in HASH_CHUNK slices of a memory map"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offset in range(0, size, HASH_CHUNK):
+                    digest.update(data[offset : offset + HASH_CHUNK])
+    return digest.hexdigest()
+
+
+def _quick_entry(path):
+    """(size, quick hash) of a file, None if it cannot be read"""
+    try:
+        size = os.path.getsize(path)
+        return size, quick_hash(path, size)
+    except OSError:
+        return None
+
+
+def _full_or_none(path):
+    try:
+        return full_hash(path)
+    except OSError:
+        return None
+
+
+def _indexed_full(row):
+    """Full hash of an indexed file that still has the size and quick hash it was indexed with"""
+    path, size, quick = row
+    if _quick_entry(path) != (size, quick):
+        return None
+    return _full_or_none(path)
+
+
+class ContentIndex:
+    """
+    SQLite index of file contents that already have a VIRIN.
+
+    Args:
+        database (str): Optional SQLite path, defaults to the app data folder.
+        max_workers (int): Hashing threads.
+    """
+
+    def __init__(self, database=None, max_workers=None) -> None:
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            database or os.path.join(get_app_data_dir(INDEX_FOLDER), INDEX_DATABASE),
+            check_same_thread=False,
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS content (path TEXT PRIMARY KEY, size INTEGER, "
+            "quick TEXT, full TEXT, virin TEXT, added REAL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS content_prefilter ON content (size, quick)"
+        )
+        self._db.commit()
+
+    def quick_hashes(self, paths) -> dict:
+        """
+        Returns path -> (size, quick hash), hashed on the thread pool.
+        Unreadable files are left out.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            hashed = executor.map(_quick_entry, paths)
+            return {path: entry for path, entry in zip(paths, hashed) if entry}
+
+    def find_duplicates(self, hashes) -> dict:
+        """
+        Finds files whose content is already indexed under another path that still exists.
+        Only files whose size and quick hash collide with an indexed file are read in full.
+
+        Args:
+            hashes (dict): path -> (size, quick hash) from quick_hashes.
+
+        Returns:
+            dict: path -> DuplicateFileError naming the VIRIN it was given before.
+        """
+        candidates = {}  # path -> [(indexed path, full hash or None, virin)]
+        with self._lock:
+            for path, (size, quick) in hashes.items():
+                rows = self._db.execute(
+                    "SELECT path, full, virin FROM content WHERE size = ? AND quick = ?",
+                    (size, quick),
+                ).fetchall()
+                rows = [
+                    row
+                    for row in rows
+                    if row[0] != os.path.abspath(path) and os.path.exists(row[0])
+                ]
+                if rows:
+                    candidates[path] = rows
+        if not candidates:
+            return {}
+        unhashed = {
+            indexed_path: (indexed_path, *hashes[path])
+            for path, rows in candidates.items()
+            for indexed_path, full, _ in rows
+            if full is None
+        }
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            new_hashes = dict(zip(candidates, executor.map(_full_or_none, candidates)))
+            indexed_hashes = dict(
+                zip(unhashed, executor.map(_indexed_full, unhashed.values()))
+            )
+        self._store_full_hashes(indexed_hashes)
+        duplicates = {}
+        for path, rows in candidates.items():
+            if new_hashes[path] is None:
+                continue
+            for indexed_path, full, virin in rows:
+                full = full or indexed_hashes[indexed_path]
+                # None: the indexed file was rewritten since, its size and ends have to do
+                if full is None or full == new_hashes[path]:
+                    duplicates[path] = DuplicateFileError(virin, indexed_path)
+                    break
+        return duplicates
+
+    def _store_full_hashes(self, hashes) -> None:
+        """Keeps the full hashes computed for indexed files, so they are read only once"""
+        rows = [(full, path) for path, full in hashes.items() if full is not None]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                "UPDATE content SET full = ? WHERE path = ? AND full IS NULL", rows
+            )
+            self._db.commit()
+
+    def add(self, entries) -> None:
+        """Records files that were just given a VIRIN"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        os.path.abspath(entry.path),
+                        entry.size,
+                        entry.quick,
+                        entry.full,
+                        entry.virin,
+                        now,
+                    )
+                    for entry in entries
+                ],
+            )
+            self._db.commit()
+
+    def move(self, renames) -> set:
+        """
+        Moves the rows of indexed files that were renamed to their new path and VIRIN.
+
+        Args:
+            renames (dict): old path -> new path, in the order the renames happened.
+
+        Returns:
+            set: The old paths that were indexed, the others still have to be added.
+        """
+        moved = set()
+        with self._lock:
+            for old_path, new_path in renames.items():
+                cursor = self._db.execute(
+                    "UPDATE OR REPLACE content SET path = ?, virin = ? WHERE path = ?",
+                    (
+                        os.path.abspath(new_path),
+                        os.path.splitext(os.path.basename(new_path))[0],
+                        os.path.abspath(old_path),
+                    ),
+                )
+                if cursor.rowcount:
+                    moved.add(old_path)
+            self._db.commit()
+        return moved
+
+    def remove(self, paths) -> None:
+        """Forgets files that lost their VIRIN again, e.g. by an undo"""
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM content WHERE path = ?",
+                [(os.path.abspath(path),) for path in paths],
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the SQLite file"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,103 @@
+"""
+Module Name: dir_index
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module keeps one DirectorySnapshot per open folder, shared by FileRenamer and MetaTool,
+so repeated operations do not list a 20k entry directory again.
+
+A snapshot is reused while the directory mtime and inode are unchanged, which costs a single
+stat per query (polling). The GUI also watches the open folder and invalidates it on change
+notifications. Like git's index, a snapshot taken within RACY_SECONDS of the directory's last
+change is not trusted, since coarse timestamps (exFAT cards keep 2 s) could hide a later change.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from models.dir_snapshot import DirectorySnapshot
+
+MAX_FOLDERS = 256  # snapshots kept, enough for a card dump tree
+RACY_SECONDS = 2.0
+
+
+class DirectoryIndex:
+    """
+    Shared, validated cache of full directory snapshots.
+
+    Args:
+        max_folders (int): Snapshots kept in memory, least recently used are dropped.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_folders=MAX_FOLDERS) -> None:
+        self.max_folders = max_folders
+        self._entries = OrderedDict()  # path -> (mtime_ns, ino, DirectorySnapshot)
+        self._lock = threading.Lock()
+        self.scans = 0
+
+    @classmethod
+    def shared(cls) -> "DirectoryIndex":
+        """Returns the process-wide index used by the models"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def snapshot(self, path, extensions=None) -> DirectorySnapshot:
+        """
+        Returns the listing of a directory, scanning it only when it has changed.
+
+        Args:
+            path (str): The directory.
+            extensions (iterable): Keep only these extensions, None for every file.
+
+        Raises:
+            OSError: The directory cannot be listed (FileNotFoundError if it is gone).
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_ino):
+                self._entries.move_to_end(path)
+                snapshot = entry[2]
+            else:
+                snapshot = None
+        if snapshot is None:
+            snapshot = DirectorySnapshot(path)
+            with self._lock:
+                self.scans += 1
+                # a change within the racy window may not move the mtime, rescan next time
+                if time.time() - stat.st_mtime_ns / 1e9 > RACY_SECONDS:
+                    self._entries[path] = (stat.st_mtime_ns, stat.st_ino, snapshot)
+                    self._entries.move_to_end(path)
+                    while len(self._entries) > self.max_folders:
+                        self._entries.popitem(last=False)
+                else:
+                    self._entries.pop(path, None)
+        return snapshot if extensions is None else snapshot.select(extensions)
+
+    def counts(self, path) -> Counter:
+        """Number of files per lowercase extension, for the format combo boxes"""
+        return Counter(record.ext for record in self.snapshot(path).records)
+
+    def invalidate(self, paths=None) -> None:
+        """
+        Drops snapshots after a change we made or were notified about.
+
+        Args:
+            paths (iterable): Directories to drop, None drops everything.
+        """
+        with self._lock:
+            if paths is None:
+                self._entries.clear()
+                return
+            for path in paths:
+                self._entries.pop(os.path.abspath(path), None)
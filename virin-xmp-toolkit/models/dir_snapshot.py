@@ -0,0 +1,122 @@
+"""
+Module Name: dir_snapshot
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module takes a single-pass snapshot of a directory using os.scandir.
+Each matching file is stat'd exactly once and stored as a compact record that
+the renamer uses for sorting, date grouping and undo validation.
+
+"""
+
+import copy
+import os
+from typing import NamedTuple
+
+
+class FileRecord(NamedTuple):
+    """Compact stat record for one file in a directory snapshot"""
+
+    name: str
+    stem: str
+    ext: str  # lowercase, without the leading dot
+    size: int
+    mtime: float
+    ctime: float
+    mtime_ns: int
+
+    @property
+    def timestamp(self) -> float:
+        """Earliest of created/modified time. Used for sorting and date grouping."""
+        return min(self.mtime, self.ctime)
+
+
+def normalize_extension(extension) -> str:
+    """Returns an extension as lowercase without a leading dot ('.MP4' -> 'mp4')"""
+    return extension.lstrip(".").lower()
+
+
+def count_entries(path) -> int:
+    """Counts directory entries without stat'ing any of them"""
+    with os.scandir(path) as entries:
+        return sum(1 for _ in entries)
+
+
+class DirectorySnapshot:
+    """
+    Lists a directory once and keeps a stat record for every file matching the extensions.
+
+    Args:
+        path (str): The directory to scan.
+        extensions (iterable): Extensions to keep (any case, with or without dot).
+                               None keeps every file, an empty list only collects names.
+    """
+
+    def __init__(self, path, extensions=None) -> None:
+        self.path = os.path.abspath(path)
+        self.extensions = (
+            None
+            if extensions is None
+            else {normalize_extension(ext) for ext in extensions}
+        )
+        self.names = []  # every entry name, used for collision checks
+        self.subdirectories = []
+        self.records = []
+        self._scan()
+
+    def _scan(self) -> None:
+        """
+        Single scandir pass. Directory entries are filtered before any stat call is made.
+        Sub-directory names are kept so a tree can be walked without listing twice.
+        """
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                self.names.append(entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    self.subdirectories.append(entry.name)
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                ext = normalize_extension(ext)
+                if self.extensions is not None and ext not in self.extensions:
+                    continue
+                # is_file() is answered from the directory listing on most platforms
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                self.records.append(
+                    FileRecord(
+                        entry.name,
+                        stem,
+                        ext,
+                        stat.st_size,
+                        stat.st_mtime,
+                        stat.st_ctime,
+                        stat.st_mtime_ns,
+                    )
+                )
+
+    @property
+    def entry_count(self) -> int:
+        """Number of entries of any kind in the directory"""
+        return len(self.names)
+
+    def select(self, extensions) -> "DirectorySnapshot":
+        """
+        Returns a snapshot of only the matching files, without listing the directory again.
+        Names and sub-directories are shared with this snapshot.
+        """
+        selected = copy.copy(self)
+        selected.extensions = {normalize_extension(ext) for ext in extensions}
+        selected.records = [
+            record for record in self.records if record.ext in selected.extensions
+        ]
+        return selected
+
+    def sorted_records(self) -> list:
+        """Returns the matching records sorted by their earliest created/modified time"""
+        return sorted(self.records, key=lambda record: record.timestamp)
+
+    def __len__(self) -> int:
+        return len(self.records)
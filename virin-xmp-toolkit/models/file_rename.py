@@ -10,13 +10,180 @@ This module batch-renames files in selected directory using the os module.
 """
 
 import os
+import queue
+import re
+import threading
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from models.content_index import ContentEntry, DuplicateFileError
+from models.dir_index import DirectoryIndex
+from models.dir_snapshot import normalize_extension
+from models.fingerprint import capture_fingerprint, find_conflicts
+from models.rename_journal import RenameJournal, WriteAction
+from models.rename_plan import FAILED, RENAMED, SKIPPED, RenamePlan, RenameResult
+from models.sequence_registry import SequenceRegistry
 
 
 EMPTY_STRING = ""
 SERVICE_BRANCH = "F"
 VIRIN_ID = "F3965"
+ALL_MEDIA = "all media"
+# every format offered on the rename page
+MEDIA_EXTENSIONS = frozenset(
+    [
+        "aiff", "avi", "cr2", "cr3", "dng", "flac", "flv", "heic", "heif",
+        "jpeg", "jpg", "mkv", "mov", "mp3", "mp4", "mxf", "m4a", "nef", "png",
+        "raw", "srf", "srw", "sr2", "tiff", "wav", "wma", "wmv",
+    ]
+)  # fmt: skip
+# a RAW and its in-camera JPEG/HEIC share a file stem and can share a VIRIN
+PAIRED_EXTENSIONS = frozenset(
+    ["cr2", "cr3", "dng", "nef", "raw", "srf", "srw", "sr2", "jpeg", "jpg", "heic", "heif"]
+)
+VIRIN_PATTERN = re.compile(rf"\d{{8}}-{SERVICE_BRANCH}-{VIRIN_ID}-\d{{4,}}(?!\d)")
+# what to do with files the content index has seen before
+DUPLICATES_FLAG = "flag"  # rename them, but list them in the summary
+DUPLICATES_SKIP = "skip"  # leave them alone
+MAX_LISTED_PROBLEMS = 20
+RESULT_QUEUE_SIZE = 1000  # results buffered between folder workers and the consumer
+
+
+def get_extensions(selected_extension) -> set:
+    """
+    Resolves the extension selection to a set of normalized extensions.
+
+    Args:
+        selected_extension: One extension ('mp4', '.MP4'), an iterable of them, or ALL_MEDIA.
+    """
+    if isinstance(selected_extension, str):
+        if selected_extension == ALL_MEDIA:
+            return set(MEDIA_EXTENSIONS)
+        selected_extension = [selected_extension]
+    return {normalize_extension(ext) for ext in selected_extension}
+
+
+def is_virin_name(name) -> bool:
+    """True for a file name that already starts with a VIRIN"""
+    return VIRIN_PATTERN.match(name) is not None
+
+
+def get_capture_date_reader():
+    """
+    Returns a new CaptureDateReader. Imported on first use, so renames by file dates
+    (e.g. from the command line) never load exiftool.
+    """
+    from models.capture_date import CaptureDateReader
+
+    return CaptureDateReader()
+
+
+def get_next_sequences(names, shoot_num) -> dict:
+    """
+    Finds where numbering continues for a shoot in a folder that already has VIRINs.
+
+    Args:
+        names (iterable): File names in the folder.
+        shoot_num (int): The shoot number.
+
+    Returns:
+        dict: 'YYYYMMDD' -> first sequence number after the highest one in use that day.
+    """
+    pattern = re.compile(
+        rf"(\d{{8}})-{SERVICE_BRANCH}-{VIRIN_ID}-{shoot_num}(\d{{3,}})(?![\d])"
+    )
+    next_sequences = {}
+    for name in names:
+        if match := pattern.match(name):
+            date, sequence = match.group(1), int(match.group(2)) + 1
+            next_sequences[date] = max(next_sequences.get(date, 0), sequence)
+    return next_sequences
+
+
+def describe_extensions(selected_extension) -> str:
+    """Extension selection as shown in notifications"""
+    if isinstance(selected_extension, str):
+        return selected_extension
+    return ", ".join(sorted(get_extensions(selected_extension)))
+
+
+def format_rename_result(result) -> str:
+    """Returns one notification line for a RenameResult"""
+    old_filename = os.path.splitext(os.path.basename(result.source))[0]
+    if isinstance(result.error, DuplicateFileError):
+        if result.status == RENAMED:
+            new_filename = os.path.splitext(os.path.basename(result.target))[0]
+            return f"{old_filename} > {new_filename} (duplicate of {result.error.virin})\n"
+        return f"Duplicate, already ingested as {result.error.virin}: {old_filename}\n"
+    if result.status == RENAMED:
+        return f"{old_filename} > {os.path.splitext(os.path.basename(result.target))[0]}\n"
+    if isinstance(result.error, FileNotFoundError):
+        return f"File not found: {old_filename}\n"
+    if isinstance(result.error, PermissionError):
+        return f"Permission Denied: {old_filename}\n"
+    if isinstance(result.error, IsADirectoryError):
+        return f"Error: Is a directory: {old_filename}\n"
+    if isinstance(result.error, FileExistsError):
+        return f"File already exists: {old_filename}\n"
+    return f"An error has occured with the OS module! \
+        Please copy error and submit issue!\n{"".join(traceback.format_exception(result.error))}"
+
+
+class RenameSummary:
+    """
+    Counts streamed RenameResult records. Only the first few problems are kept as text,
+    so the summary stays small no matter how many files are renamed.
+    """
+
+    def __init__(self, selected_extension) -> None:
+        self.selected_extension = selected_extension
+        self.renamed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.flagged = 0  # renamed, but listed as a problem
+        self.problems = []
+
+    @property
+    def total(self) -> int:
+        return self.renamed + self.skipped + self.failed
+
+    def add(self, result) -> None:
+        """Counts one result"""
+        if isinstance(result.error, DuplicateFileError):
+            self.duplicates += 1
+        if result.status == RENAMED:
+            self.renamed += 1
+            if result.error:
+                self.flagged += 1
+                if len(self.problems) < MAX_LISTED_PROBLEMS:
+                    self.problems.append(format_rename_result(result))
+            return
+        if result.status == SKIPPED:
+            self.skipped += 1
+        else:
+            self.failed += 1
+        if len(self.problems) < MAX_LISTED_PROBLEMS:
+            self.problems.append(format_rename_result(result))
+
+    def message(self) -> str:
+        """Returns the final notification"""
+        if not self.total:
+            return f"Could not find any files with extension {describe_extensions(self.selected_extension)}"
+        message = (
+            f"Renamed {self.renamed} of {self.total} files."
+            f" Skipped: {self.skipped}. Failed: {self.failed}."
+        )
+        if self.duplicates:
+            message += f" Duplicates: {self.duplicates}."
+        message += "\n"
+        if self.problems:
+            message += "\n" + "".join(self.problems)
+            hidden = self.skipped + self.failed + self.flagged - len(self.problems)
+            if hidden:
+                message += f"... and {hidden} more\n"
+        return message
 
 
 class FileRenamer:
@@ -26,26 +193,69 @@ class FileRenamer:
 
     write_actions = (
         []
-    )  # list of write actions  (undo is unlimited as long as program is open)
-    directory_size = (
-        []
-    )  # for measuring size of directory. Used to validate directory size
+    )  # list of WriteAction (undo is unlimited, the rename journal restores it after a restart)
 
-    def _get_formatted_date(self, path, file) -> str:
+    def __init__(self, index=None, content_index=None, registry=None) -> None:
         """
-        Retrieves the modified or created date from file.
+        Args:
+            index (DirectoryIndex): Listing cache shared with MetaTool, the process-wide
+                                    index by default.
+            content_index (ContentIndex): Optional. Renamed files are recorded in it and
+                                          files it has seen before are flagged or skipped.
+            registry (SequenceRegistry): Allocates sequence numbers when no start sequence
+                                         is given, opened on first use by default. Numbers
+                                         typed in by hand are recorded in it when set.
+        """
+        self.index = index or DirectoryIndex.shared()
+        self.content_index = content_index
+        self.registry = registry
+
+    def _check_duplicates(self, snapshot, duplicates) -> tuple:
+        """
+        Quick-hashes a folder's files before they are renamed and looks them up in the
+        content index. With DUPLICATES_SKIP the duplicates are removed from the snapshot's
+        records.
+
+        Returns:
+            tuple: (name -> (size, quick hash) for recording the renames,
+                    name -> DuplicateFileError, skipped RenameResult list)
+        """
+        if self.content_index is None:
+            return {}, {}, []
+        paths = [os.path.join(snapshot.path, record.name) for record in snapshot.records]
+        # the bytes as they are now, before metadata is written to the renamed files
+        hashes = self.content_index.quick_hashes(paths)
+        found = self.content_index.find_duplicates(hashes)
+        hashes = {os.path.basename(path): entry for path, entry in hashes.items()}
+        found = {os.path.basename(path): error for path, error in found.items()}
+        skipped = []
+        if duplicates == DUPLICATES_SKIP and found:
+            snapshot.records = [
+                record for record in snapshot.records if record.name not in found
+            ]
+            for name, error in found.items():
+                path = os.path.join(snapshot.path, name)
+                skipped.append(RenameResult(path, path, SKIPPED, error))
+            found = {}
+        return hashes, found, skipped
+
+    def _get_timestamp(self, record, capture_dates=None) -> float:
+        """Embedded capture date when available, otherwise the earliest filesystem date"""
+        if capture_dates and record.name in capture_dates:
+            return capture_dates[record.name]
+        return record.timestamp
+
+    def _get_formatted_date(self, record, capture_dates=None) -> str:
+        """
+        Retrieves the capture date, or the modified or created date, from a snapshot record.
         Sometimes (on Unix) it seems modified date is used by default.
         Will use lowest and return date in YYYYMMDD format.
 
         Returns:
             str: A string representing the formatted date in 'YYYYMMDD' format.
         """
-        stat = os.stat(os.path.join(path, file))
-        m_data = time.gmtime(stat.st_mtime)
-        c_data = time.gmtime(stat.st_ctime)
-        if c_data < m_data:
-            return f"{c_data[0]}{c_data[1]:02}{c_data[2]:02}"
-        return f"{m_data[0]}{m_data[1]:02}{m_data[2]:02}"
+        date = time.gmtime(self._get_timestamp(record, capture_dates))
+        return f"{date[0]}{date[1]:02}{date[2]:02}"
 
     def _get_virin_number(self, date, branch, virin, shoot_num, sequence) -> str:
         """
@@ -56,164 +266,726 @@ class FileRenamer:
         """
         return f"{date}-{branch}-{virin}-{shoot_num}{sequence:03}"
 
-    def _get_files_sorted(self, path):
+    def _get_files_sorted(self, snapshot, capture_dates=None) -> list:
         """
-        Returns a list of files in the specified directory, sorted by their creation or modification time.
+        Returns the snapshot records sorted by their capture, creation or modification time.
         If the modification time of a file is earlier than its creation time, the modification time is used for sorting.
 
         Args:
-            path (str): The path to the directory to list files from.
+            snapshot (DirectorySnapshot): Single-pass listing of the target directory.
+            capture_dates (dict): Optional file name -> embedded capture timestamp.
 
         Returns:
-            list: A list of filenames sorted by their creation or modification time.
+            list: A list of FileRecord sorted by their capture, creation or modification time.
         """
-
-        def _get_time(file):
-            file_path = os.path.join(path, file)
-            c_time = os.path.getctime(file_path)
-            m_time = os.path.getmtime(file_path)
-            if m_time < c_time:
-                return m_time
-            return c_time
-
-        return sorted(os.listdir(path), key=_get_time)
+        if not capture_dates:
+            return snapshot.sorted_records()
+        return sorted(
+            snapshot.records,
+            key=lambda record: self._get_timestamp(record, capture_dates),
+        )
 
     def _is_directory_modified(self, single_write_action) -> str:
         """
-        Checks if the target directory has been modified after an operation that affects file integrity.
+        Checks if the files touched by a write action have been modified since the rename.
+        Only the renamed files are checked, and only when the directory itself has changed.
 
         Args:
-            single_write_action : dict of file changes for one write action
+            single_write_action : WriteAction with the file changes for one write action
 
         Returns:
             str: A notification message if the directory has been modified; otherwise, an empty string.
         """
         notification = EMPTY_STRING
-        path, _ = os.path.split(list(single_write_action.keys())[0])
-        current_dir_size = len(os.listdir(path))
-        actual_dir_size = self.directory_size.pop()
-        if actual_dir_size != current_dir_size:
+        conflicts = find_conflicts(
+            single_write_action.directory,
+            single_write_action.mapping,
+            single_write_action.fingerprint,
+        )
+        if conflicts:
             notification += (
-                "Target directory has been modified. Unable to undo! Expected:\n"
+                "Target directory has been modified. Unable to undo! Conflicts:\n"
             )
-            for _, value in single_write_action.items():
-                notification += value + "\n"
-            self.directory_size.append(actual_dir_size)
-            return notification
+            for path, reason in conflicts:
+                notification += f"{path} ({reason})\n"
         return notification
 
+    def _get_virin_names(self, dates, shoot_num, start_seq, next_sequences=None) -> list:
+        """
+        Numbers VIRINs for a list of dates in rename order. Sequence numbers restart for each new date.
+
+        Args:
+            dates (list): 'YYYYMMDD' strings, one per file in rename order.
+            shoot_num (int): The shoot number to include in the new names.
+            start_seq (int): The starting sequence number for each date, None reserves
+                             the numbers from the sequence registry.
+            next_sequences (dict): Optional date -> first free sequence number, for dates
+                                   that already have VIRINs (see get_next_sequences).
+
+        Returns:
+            list: VIRIN file names without extension.
+        """
+        if start_seq is None:
+            return self._get_registry_names(dates, shoot_num, next_sequences)
+        names = []
+        used = {}  # date -> highest sequence number, for the registry
+        previous_date = EMPTY_STRING
+        sequence_number = start_seq
+
+        for date in dates:
+            # When encountering new date, we must start new sequence
+            if date != previous_date:
+                previous_date = date
+                sequence_number = max(start_seq, (next_sequences or {}).get(date, 0))
+
+            names.append(
+                self._get_virin_number(
+                    date, SERVICE_BRANCH, VIRIN_ID, shoot_num, sequence_number
+                )
+            )
+            used[date] = max(used.get(date, 0), sequence_number)
+            # must increment here to prevent overwrite files on repeat accidental rename
+            sequence_number += 1
+        if self.registry is not None and used:
+            self.registry.record(shoot_num, used)
+        return names
+
+    def _get_registry_names(self, dates, shoot_num, next_sequences=None) -> list:
+        """
+        Numbers VIRINs from blocks reserved in the sequence registry, one block per date.
+        Numbering continues after next_sequences and after every earlier reservation.
+        """
+        if self.registry is None:
+            self.registry = SequenceRegistry()
+        counts = {}
+        for date in dates:
+            counts[date] = counts.get(date, 0) + 1
+        sequences = self.registry.reserve(shoot_num, counts, next_sequences)
+        names = []
+        for date in dates:
+            names.append(
+                self._get_virin_number(
+                    date, SERVICE_BRANCH, VIRIN_ID, shoot_num, sequences[date]
+                )
+            )
+            sequences[date] += 1
+        return names
+
+    def _get_pair_key(self, record):
+        """Stem shared by RAW+JPEG pairs, None for files that are never paired"""
+        if record.ext in PAIRED_EXTENSIONS:
+            return record.stem.casefold()
+        return None
+
+    def _group_pairs(self, items, key) -> list:
+        """
+        Groups items that share a pair key, keeping the order of each group's first item.
+
+        Args:
+            items (list): Items in rename order.
+            key (callable): Returns an item's pair key, or None to keep it on its own.
+
+        Returns:
+            list: Lists of items, one list per VIRIN.
+        """
+        groups = []
+        by_key = {}
+        for item in items:
+            item_key = key(item)
+            if item_key is None:
+                groups.append([item])
+            elif item_key in by_key:
+                by_key[item_key].append(item)
+            else:
+                by_key[item_key] = [item]
+                groups.append(by_key[item_key])
+        return groups
+
+    def _get_rename_pairs(
+        self,
+        sorted_records,
+        date,
+        shoot_num,
+        start_seq,
+        capture_dates=None,
+        keep_pairs=False,
+        next_sequences=None,
+    ) -> list:
+        """
+        Assigns a VIRIN to every record of one directory.
+
+        Args:
+            sorted_records (list): FileRecord list in rename order.
+            date (str): Optional fixed date to override _get_formatted_date.
+            shoot_num (int): The shoot number to include in the new names.
+            start_seq (int): The starting sequence number for each date.
+            capture_dates (dict): Optional file name -> embedded capture timestamp.
+            keep_pairs (bool): RAW+JPEG files with the same stem share one sequence number.
+            next_sequences (dict): Optional date -> first free sequence number.
+
+        Returns:
+            list: (old file name, new file name) tuples in rename order.
+        """
+        groups = self._group_pairs(
+            sorted_records, self._get_pair_key if keep_pairs else lambda record: None
+        )
+        dates = [
+            date or self._get_formatted_date(group[0], capture_dates)
+            for group in groups
+        ]
+        names = self._get_virin_names(dates, shoot_num, start_seq, next_sequences)
+        return [
+            (record.name, name + record.name[len(record.stem) :])
+            for group, name in zip(groups, names)
+            for record in group
+        ]
+
+    def _get_global_rename_pairs(
+        self,
+        snapshots,
+        capture_dates,
+        date,
+        shoot_num,
+        start_seq,
+        keep_pairs=False,
+        next_sequences=None,
+    ) -> list:
+        """
+        Assigns VIRINs across several directories as if they were one folder,
+        so no two files in a shoot tree share a VIRIN.
+
+        Returns:
+            list: One (old file name, new file name) list per snapshot.
+        """
+        entries = [
+            (self._get_timestamp(record, dates), index, record)
+            for index, (snapshot, dates) in enumerate(zip(snapshots, capture_dates))
+            for record in snapshot.records
+        ]
+        entries.sort(key=lambda entry: entry[0])
+
+        def pair_key(entry):
+            stem = self._get_pair_key(entry[2]) if keep_pairs else None
+            return None if stem is None else (entry[1], stem)
+
+        groups = self._group_pairs(entries, pair_key)
+        names = self._get_virin_names(
+            [
+                date or self._get_formatted_date(group[0][2], capture_dates[group[0][1]])
+                for group in groups
+            ],
+            shoot_num,
+            start_seq,
+            next_sequences,
+        )
+        pairs = [[] for _ in snapshots]
+        for group, name in zip(groups, names):
+            for _, index, record in group:
+                pairs[index].append(
+                    (record.name, name + record.name[len(record.stem) :])
+                )
+        return pairs
+
+    def plan_tree_names(
+        self,
+        roots,
+        selected_extension,
+        date,
+        shoot_num,
+        start_seq,
+        capture_date=False,
+        keep_pairs=False,
+        existing_names=(),
+        max_workers=None,
+    ) -> tuple:
+        """
+        Names the matching files of several trees (e.g. cards being ingested into one folder)
+        as one shoot, without renaming anything.
+
+        Args:
+            roots (list): Tree roots, listed in parallel.
+            existing_names (iterable): Names already in the target folder, numbering continues
+                                       after their VIRINs.
+            Other arguments as for iter_rename_results.
+
+        Returns:
+            tuple: (list of (root index, DirectorySnapshot, [(old name, new name)]),
+                    failed RenameResult for every folder that could not be listed)
+        """
+        extensions = get_extensions(selected_extension)
+        snapshots = []
+        unreadable = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, root in enumerate(roots):
+                tree, failed = self._scan_tree(os.path.abspath(root), extensions, executor)
+                snapshots.extend((index, snapshot) for snapshot in tree if snapshot.records)
+                unreadable.extend(failed)
+            if capture_date:
+                capture_dates = list(
+                    executor.map(
+                        get_capture_date_reader().read, [snapshot for _, snapshot in snapshots]
+                    )
+                )
+            else:
+                capture_dates = [None] * len(snapshots)
+        pairs = self._get_global_rename_pairs(
+            [snapshot for _, snapshot in snapshots],
+            capture_dates,
+            date,
+            shoot_num,
+            start_seq,
+            keep_pairs,
+            get_next_sequences(existing_names, shoot_num),
+        )
+        return [
+            (index, snapshot, folder_pairs)
+            for (index, snapshot), folder_pairs in zip(snapshots, pairs)
+        ], unreadable
+
     def rename_all_files(
-        self, path, selected_extension, date, shoot_num, start_seq
+        self,
+        path,
+        selected_extension,
+        date,
+        shoot_num,
+        start_seq,
+        capture_date=False,
+        keep_pairs=False,
+        duplicates=DUPLICATES_FLAG,
     ) -> str:
         """
         Renames all files with a specified extension in the provided directory according to a VIRIN
 
         Parameters:
             path (str): The directory path containing the files to rename.
-            selected_extension (str): The file extension of the files to be renamed.
+            selected_extension: The file extension, a set of extensions, or ALL_MEDIA.
             date (str): Option fixed date to override _get_formatted_date
             shoot_num (int): The shoot number to include in the new name of the files.
-            start_seq (int): The starting sequence number for the renaming process.
+            start_seq (int): The starting sequence number for the renaming process, None
+                             reserves the numbers from the sequence registry.
+            capture_date (bool): Use embedded capture dates (one exiftool call) for dates and sort order.
+            keep_pairs (bool): RAW+JPEG files with the same stem share one sequence number.
+            duplicates (str): DUPLICATES_FLAG or DUPLICATES_SKIP files the content index has seen.
 
         Returns:
-            str: A notification message detailing the outcome of the renaming process.
+            str: A summary of the renaming process, see RenameSummary.
 
         Exceptions:
-            Handles various exceptions and appends errors to return string.
+            Handles various exceptions and counts them in the summary.
         """
-        # init starting variables
-        notification = EMPTY_STRING
-        fixed_date = EMPTY_STRING
-        previous_date = EMPTY_STRING
-        single_write_action = {}
-        path = os.path.abspath(path)
-        sequence_number = start_seq
+        summary = RenameSummary(selected_extension)
+        for result in self.iter_rename_results(
+            path,
+            selected_extension,
+            date,
+            shoot_num,
+            start_seq,
+            capture_date,
+            keep_pairs=keep_pairs,
+            duplicates=duplicates,
+        ):
+            summary.add(result)
+        return summary.message()
+
+    def rename_tree(
+        self,
+        path,
+        selected_extension,
+        date,
+        shoot_num,
+        start_seq,
+        capture_date=False,
+        global_numbering=False,
+        max_workers=None,
+        keep_pairs=False,
+        duplicates=DUPLICATES_FLAG,
+    ) -> str:
+        """
+        Renames matching files in every folder of a shoot tree (DCIM/100CANON, PRIVATE/M4ROOT/CLIP ...).
+        See iter_rename_results with recursive=True.
 
-        if date:
-            fixed_date = date
+        Returns:
+            str: One merged summary. Each renamed folder gets its own undo entry.
+        """
+        summary = RenameSummary(selected_extension)
+        for result in self.iter_rename_results(
+            path,
+            selected_extension,
+            date,
+            shoot_num,
+            start_seq,
+            capture_date,
+            recursive=True,
+            global_numbering=global_numbering,
+            max_workers=max_workers,
+            keep_pairs=keep_pairs,
+            duplicates=duplicates,
+        ):
+            summary.add(result)
+        return summary.message()
 
-        sorted_files = self._get_files_sorted(path)
+    def iter_rename_results(
+        self,
+        path,
+        selected_extension,
+        date,
+        shoot_num,
+        start_seq,
+        capture_date=False,
+        recursive=False,
+        global_numbering=False,
+        max_workers=None,
+        keep_pairs=False,
+        names=None,
+        continue_sequence=False,
+        duplicates=DUPLICATES_FLAG,
+    ):
+        """
+        Renames files according to a VIRIN and streams one result per file as it happens.
 
-        for file in sorted_files:
-            old_filename, ext = os.path.splitext(file)
-            if ext[1:].lower() == selected_extension:
+        Parameters:
+            path (str): The directory (or shoot tree root) containing the files to rename.
+            selected_extension: The file extension, a set of extensions, or ALL_MEDIA.
+                                Every selected format is renamed from one shared listing.
+            date (str): Option fixed date to override _get_formatted_date
+            shoot_num (int): The shoot number to include in the new name of the files.
+            start_seq (int): The starting sequence number for the renaming process, None
+                             reserves the numbers from the sequence registry, after the
+                             VIRINs of this shoot already in the folder(s).
+            capture_date (bool): Use embedded capture dates for dates and sort order.
+            recursive (bool): Rename every folder of the tree. Folders are listed, dated and
+                              renamed in parallel, one task per folder.
+            global_numbering (bool): With recursive, number the whole tree as one sequence per
+                                     date instead of restarting in every folder.
+            max_workers (int): Worker threads for recursive mode.
+            keep_pairs (bool): RAW+JPEG files with the same stem share one sequence number.
+            names (iterable): Single folder only, rename just these file names (a watch
+                              folder batch) instead of every matching file.
+            continue_sequence (bool): Single folder only, number each date after the
+                                      VIRINs of this shoot already in the folder.
+            duplicates (str): With a content index, DUPLICATES_FLAG renames files it has
+                              seen before and reports them, DUPLICATES_SKIP leaves them.
 
-                if not fixed_date:
-                    date = self._get_formatted_date(path, file)
-                # When encountering new date, we must start new sequence
-                if date != previous_date:
-                    previous_date = date
-                    sequence_number = start_seq
+        Yields:
+            RenameResult: old path, new path, status (renamed, skipped or failed) and error.
+        """
+        path = os.path.abspath(path)
+        extensions = get_extensions(selected_extension)
+        if not recursive:
+            # plan phase: one listing, every target computed and checked before anything moves
+            snapshot = self.index.snapshot(path, extensions)
+            if names is not None:
+                names = set(names)
+                snapshot.records = [
+                    record for record in snapshot.records if record.name in names
+                ]
+            content = self._check_duplicates(snapshot, duplicates)
+            yield from content[2]
+            capture_dates = (
+                get_capture_date_reader().read(snapshot) if capture_date else None
+            )
+            pairs = self._get_rename_pairs(
+                self._get_files_sorted(snapshot, capture_dates),
+                date,
+                shoot_num,
+                start_seq,
+                capture_dates,
+                keep_pairs,
+                (
+                    get_next_sequences(snapshot.names, shoot_num)
+                    if continue_sequence or start_seq is None
+                    else None
+                ),
+            )
+            yield from self._iter_snapshot_results(snapshot, pairs, content[:2])
+            return
 
-                new_filename = self._get_virin_number(
-                    date, SERVICE_BRANCH, VIRIN_ID, shoot_num, sequence_number
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            snapshots, unreadable = self._scan_tree(path, extensions, executor)
+            yield from unreadable
+            snapshots = [snapshot for snapshot in snapshots if snapshot.records]
+            contents = []
+            for snapshot in snapshots:
+                content = self._check_duplicates(snapshot, duplicates)
+                yield from content[2]
+                contents.append(content[:2])
+            if capture_date:
+                capture_dates = list(
+                    executor.map(get_capture_date_reader().read, snapshots)
                 )
-                # must increment here to prevent overwrite files on repeat accidental rename
-                sequence_number += 1
+            else:
+                capture_dates = [None] * len(snapshots)
 
-                try:
-                    if new_filename == old_filename:
-                        raise FileExistsError
-                    os.rename(
-                        os.path.join(path, file), os.path.join(path, new_filename + ext)
+            # registry numbering also starts after the VIRINs already in the tree
+            automatic = start_seq is None
+            if global_numbering:
+                pairs = self._get_global_rename_pairs(
+                    snapshots,
+                    capture_dates,
+                    date,
+                    shoot_num,
+                    start_seq,
+                    keep_pairs,
+                    (
+                        get_next_sequences(
+                            [name for snapshot in snapshots for name in snapshot.names],
+                            shoot_num,
+                        )
+                        if automatic
+                        else None
+                    ),
+                )
+            else:
+                pairs = [
+                    self._get_rename_pairs(
+                        self._get_files_sorted(snapshot, dates),
+                        date,
+                        shoot_num,
+                        start_seq,
+                        dates,
+                        keep_pairs,
+                        (
+                            get_next_sequences(snapshot.names, shoot_num)
+                            if automatic
+                            else None
+                        ),
                     )
-                    notification += f"{old_filename} > {new_filename}\n"
-                    single_write_action.update(
-                        {
-                            os.path.join(path, file): os.path.join(
-                                path, new_filename + ext
-                            )
-                        }
+                    for snapshot, dates in zip(snapshots, capture_dates)
+                ]
+            yield from self._iter_parallel_results(executor, snapshots, pairs, contents)
+
+    def _iter_snapshot_results(self, snapshot, pairs, content=({}, {})):
+        """
+        Plans and executes the renames for one directory.
+        Every applied step is journaled so undo survives a crash or restart.
+        The undo entry is added even if the caller stops early.
+
+        Args:
+            snapshot (DirectorySnapshot): Listing the pairs were computed from.
+            pairs (list): (old file name, new file name) tuples in rename order.
+            content (tuple): (content hashes, duplicates) by name from _check_duplicates.
+                             Renamed files are recorded in the content index.
+
+        Yields:
+            RenameResult: with full paths.
+        """
+        single_write_action = {}
+        path = snapshot.path
+        plan = RenamePlan(path, pairs, snapshot.names)
+
+        journal = RenameJournal(path)
+        batch = journal.begin(plan.steps) if plan.steps else None
+        records = {record.name: record for record in snapshot.records}
+        renamed_entries = {}  # new name -> (size, mtime_ns), a rename changes neither
+        hashes, duplicates = content
+        content_entries = {}  # old path -> ContentEntry under the new path
+        fingerprint = None
+        try:
+            for result in plan.execute(lambda index: journal.commit(batch, index)):
+                old_path = os.path.join(path, result.source)
+                new_path = os.path.join(path, result.target)
+                error = result.error
+                if result.status == RENAMED:
+                    single_write_action[old_path] = new_path
+                    record = records[result.source]
+                    renamed_entries[result.target] = (record.size, record.mtime_ns)
+                    error = duplicates.get(result.source)
+                    if result.source in hashes:
+                        content_entries[old_path] = ContentEntry(
+                            new_path,
+                            os.path.splitext(result.target)[0],
+                            *hashes[result.source],
+                        )
+                yield RenameResult(old_path, new_path, result.status, error)
+            fingerprint = capture_fingerprint(path, renamed_entries)
+            if batch:
+                journal.end(batch, fingerprint)
+        finally:
+            journal.close()
+            self.index.invalidate([path])
+            if content_entries:
+                # a file indexed under its old name keeps its row, and its stored hashes
+                moved = self.content_index.move(
+                    {old: entry.path for old, entry in content_entries.items()}
+                )
+                self.content_index.add(
+                    [entry for old, entry in content_entries.items() if old not in moved]
+                )
+            if single_write_action:
+                self.write_actions.append(
+                    WriteAction(
+                        path,
+                        single_write_action,
+                        fingerprint,
+                        batch,
+                        fingerprint is not None,
                     )
-                except FileNotFoundError:
-                    notification += f"File not found: {old_filename}\n"
-                except PermissionError:
-                    notification += f"Permission Denied: {old_filename}\n"
-                except IsADirectoryError:
-                    notification += f"Error: Is a directory: {old_filename}\n"
-                except FileExistsError:
-                    notification += f"File already exists: {old_filename}\n"
-                except OSError:
-                    notification += f"An error has occured with the OS module! \
-                        Please copy error and submit issue!\n{traceback.format_exc()}"
-
-        if single_write_action:
-            self.write_actions.append(single_write_action)
-            self.directory_size.append(len(sorted_files))
+                )
 
-        return (
-            f"Could not find any files with extension {selected_extension}"
-            if not notification
-            else notification
-        )
+    def _iter_parallel_results(self, executor, snapshots, pairs, contents):
+        """
+        Runs _iter_snapshot_results for every folder on the executor and yields results
+        as workers produce them. The queue is bounded so memory stays flat.
+        """
+        results = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        cancelled = threading.Event()
+
+        def run(snapshot, folder_pairs, content):
+            try:
+                for result in self._iter_snapshot_results(
+                    snapshot, folder_pairs, content
+                ):
+                    if cancelled.is_set():
+                        break
+                    results.put(result)
+            finally:
+                results.put(None)  # one end marker per folder
+
+        futures = [
+            executor.submit(run, snapshot, folder_pairs, content)
+            for snapshot, folder_pairs, content in zip(snapshots, pairs, contents)
+        ]
+        remaining = len(futures)
+        try:
+            while remaining:
+                result = results.get()
+                if result is None:
+                    remaining -= 1
+                else:
+                    yield result
+        finally:
+            # caller stopped early: let workers finish their current file and drain
+            cancelled.set()
+            while remaining:
+                if results.get() is None:
+                    remaining -= 1
+        for future in futures:
+            future.result()
+
+    def _scan_tree(self, root, extensions, executor) -> tuple:
+        """
+        Walks a shoot tree, listing every directory on the executor as soon as its parent is listed.
+        Hidden directories (.Trashes, .Spotlight-V100 ...) are skipped.
+
+        Returns:
+            tuple: (DirectorySnapshot list sorted by path, failed RenameResult for unreadable folders)
+        """
+        snapshots = []
+        unreadable = []
+        pending = {executor.submit(self.index.snapshot, root, extensions): root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory = pending.pop(future)
+                try:
+                    snapshot = future.result()
+                except OSError as error:
+                    unreadable.append(
+                        RenameResult(directory, directory, FAILED, error)
+                    )
+                    continue
+                snapshots.append(snapshot)
+                for name in snapshot.subdirectories:
+                    if not name.startswith("."):
+                        subdirectory = os.path.join(snapshot.path, name)
+                        pending[
+                            executor.submit(self.index.snapshot, subdirectory, extensions)
+                        ] = subdirectory
+        snapshots.sort(key=lambda snapshot: snapshot.path)
+        return snapshots, unreadable
 
     def _revert_to_original(self, single_write_action):
         """
         Processes the undo operation for a dictionary of file operations.
+        Uses the same plan machinery as renaming, so the directory is listed once.
 
         Returns:
         str: A notification message summarizing the results of the undo operation.
-
-        Raises:
-        FileNotFoundError: If the file that is supposed to be renamed back is not found.
-        FileExistsError: If a file with the original name already exists in the directory.
+        Missing files and names that already exist are reported per file.
         """
         notification = "Undo proceedure stats:\n\n"
-        # We put back newer name (value) to original (key)
-        for key, value in reversed(single_write_action.items()):
-            directory, old_file = os.path.split(key)
-            _, new_file = os.path.split(value)
-            try:
-                if old_file in os.listdir(directory):
-                    raise FileExistsError
-                os.rename(value, key)
-                notification += f"{new_file} > {old_file}\n"
-            except FileNotFoundError:
-                notification += f"File not found to undo! {key}\n"
-            except FileExistsError:
-                notification += f"This file exists and undo failed! {old_file}\n"
+        for result in self._iter_revert_results(single_write_action):
+            source = os.path.basename(result.source)
+            target = os.path.basename(result.target)
+            if result.status == RENAMED:
+                notification += f"{source} > {target}\n"
+            elif isinstance(result.error, FileNotFoundError):
+                notification += f"File not found to undo! {result.target}\n"
+            elif isinstance(result.error, FileExistsError):
+                notification += f"This file exists and undo failed! {target}\n"
+            else:
+                notification += f"Undo failed! {source}: {result.error}\n"
         return notification
 
+    def _iter_revert_results(self, single_write_action):
+        """
+        Puts the files of one undo entry back to their original names, journaled like a rename.
+        Files put back to a VIRIN name keep their content index row under that name, the
+        others are removed from the index, they no longer have a VIRIN.
+
+        Yields:
+            RenameResult: current path, original path, status and error.
+        """
+        directory = single_write_action.directory
+        # We put back newer name (value) to original (key)
+        pairs = [
+            (os.path.basename(value), os.path.basename(key))
+            for key, value in reversed(single_write_action.mapping.items())
+        ]
+        snapshot = self.index.snapshot(directory, [])
+        plan = RenamePlan(directory, pairs, snapshot.names)
+
+        journal = RenameJournal(directory)
+        batch = journal.begin(plan.steps, undoes=single_write_action.batch)
+        reverted = {}  # current path -> original path
+        try:
+            for result in plan.execute(lambda index: journal.commit(batch, index)):
+                if result.status == RENAMED:
+                    reverted[os.path.join(directory, result.source)] = os.path.join(
+                        directory, result.target
+                    )
+                yield RenameResult(
+                    os.path.join(directory, result.source),
+                    os.path.join(directory, result.target),
+                    result.status,
+                    result.error,
+                )
+            journal.end(batch)
+        finally:
+            journal.close()
+            self.index.invalidate([directory])
+            if reverted and self.content_index is not None:
+                moved = self.content_index.move(
+                    {
+                        path: original
+                        for path, original in reverted.items()
+                        if is_virin_name(os.path.basename(original))
+                    }
+                )
+                self.content_index.remove(
+                    [path for path in reverted if path not in moved]
+                )
+
+    def recover_write_actions(self, path) -> list:
+        """
+        Loads undo history for a directory from its rename journal.
+        Used after a restart, or to recover a batch that was interrupted by a crash.
+
+        Args:
+            path (str): The directory whose journal is replayed.
+
+        Returns:
+            list: The WriteAction entries that were added to the undo history.
+        """
+        known = {action.batch for action in self.write_actions}
+        recovered = [
+            action
+            for action in RenameJournal(path).load()
+            if action.batch not in known
+        ]
+        self.write_actions.extend(recovered)
+        return recovered
+
     def undo_rename(self) -> str:
         """
         Reverts the last renaming action performed and restores the previous state.
@@ -230,3 +1002,24 @@ class FileRenamer:
             self.write_actions.append(single_write_action)
             return notification
         return "Nothing to undo"
+
+    def undo_last(self) -> tuple:
+        """
+        Reverts the last renaming action like undo_rename, with results instead of a message.
+
+        Returns:
+            tuple: (RenameResult list, (path, reason) conflicts). Nothing is undone while
+                   there are conflicts, and both are empty when there is nothing to undo.
+        """
+        if not self.write_actions:
+            return [], []
+        single_write_action = self.write_actions[-1]
+        conflicts = find_conflicts(
+            single_write_action.directory,
+            single_write_action.mapping,
+            single_write_action.fingerprint,
+        )
+        if conflicts:
+            return [], conflicts
+        self.write_actions.pop()
+        return list(self._iter_revert_results(single_write_action)), []
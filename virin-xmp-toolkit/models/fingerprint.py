@@ -0,0 +1,117 @@
+"""
+Module Name: fingerprint
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module fingerprints the files touched by a rename so undo can be validated cheaply.
+
+A fingerprint is the directory mtime/inode plus an order-independent rolling hash of the
+renamed entries' names, sizes and mtimes. If the directory itself is unchanged, undo is
+safe without listing anything. Otherwise only the renamed files are stat'd and every
+conflict is reported by name.
+"""
+
+import hashlib
+import os
+from typing import NamedTuple
+
+HASH_MASK = (1 << 64) - 1
+
+MISSING = "missing"
+MODIFIED = "modified"
+NAME_TAKEN = "original name taken"
+
+
+class DirectoryFingerprint(NamedTuple):
+    """Directory identity plus the expected state of every renamed entry"""
+
+    dir_mtime_ns: int
+    dir_ino: int
+    entries_hash: int
+    entries: dict  # renamed file name -> (size, mtime_ns)
+
+
+def entry_hash(name, size, mtime_ns) -> int:
+    """64 bit hash of one entry. Entries are combined by addition, so order does not matter."""
+    digest = hashlib.blake2b(
+        f"{name}\0{size}\0{mtime_ns}".encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def rolling_hash(entries) -> int:
+    """Combines entry hashes for a dict of name -> (size, mtime_ns)"""
+    total = 0
+    for name, (size, mtime_ns) in entries.items():
+        total = (total + entry_hash(name, size, mtime_ns)) & HASH_MASK
+    return total
+
+
+def capture_fingerprint(directory, entries) -> DirectoryFingerprint:
+    """
+    Fingerprints a directory right after a rename.
+
+    Args:
+        directory (str): The renamed directory.
+        entries (dict): New file name -> (size, mtime_ns) taken from the rename snapshot.
+    """
+    stat = os.stat(directory)
+    return DirectoryFingerprint(
+        stat.st_mtime_ns, stat.st_ino, rolling_hash(entries), dict(entries)
+    )
+
+
+def find_conflicts(directory, mapping, fingerprint) -> list:
+    """
+    Lists every renamed file that can no longer be safely undone.
+
+    Args:
+        directory (str): The renamed directory.
+        mapping (dict): Original path -> renamed path for the write action.
+        fingerprint (DirectoryFingerprint): Captured after the rename. None for a batch
+                                            recovered after a crash, only names are checked then.
+
+    Returns:
+        list: (path, reason) tuples. Empty when undo is safe.
+    """
+    if fingerprint is not None:
+        stat = os.stat(directory)
+        if (stat.st_mtime_ns, stat.st_ino) == (
+            fingerprint.dir_mtime_ns,
+            fingerprint.dir_ino,
+        ):
+            return []
+
+    current = {}
+    conflicts = []
+    for renamed_path in mapping.values():
+        name = os.path.basename(renamed_path)
+        try:
+            file_stat = os.lstat(renamed_path)
+        except FileNotFoundError:
+            conflicts.append((renamed_path, MISSING))
+            continue
+        current[name] = (file_stat.st_size, file_stat.st_mtime_ns)
+
+    # per-file comparison is only needed when the rolling hash disagrees
+    if fingerprint is None or (
+        not conflicts and rolling_hash(current) == fingerprint.entries_hash
+    ):
+        modified = []
+    else:
+        modified = [
+            os.path.join(directory, name)
+            for name, signature in current.items()
+            if tuple(fingerprint.entries.get(name, ())) != signature
+        ]
+    conflicts.extend((path, MODIFIED) for path in modified)
+
+    renamed_names = {os.path.basename(path).casefold() for path in mapping.values()}
+    for original_path in mapping:
+        if os.path.basename(original_path).casefold() in renamed_names:
+            continue  # freed by the undo itself
+        if os.path.lexists(original_path):
+            conflicts.append((original_path, NAME_TAKEN))
+    return conflicts
@@ -0,0 +1,318 @@
+"""
+Module Name: ingest
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module ingests camera cards into one folder in a single pass: every file is read off
+the card once, hashed while it is copied and written straight to its VIRIN name. Copies are
+tagged in small batches (TAG_BATCH_FILES files or TAG_BATCH_BYTES) as soon as they are
+published, so exiftool rewrites them while they are most likely still in the page cache
+instead of reading the whole card back from disk at the end.
+
+All cards are named together first (FileRenamer.plan_tree_names), so numbering is one
+shoot across cards and continues after the VIRINs already in the destination. Each card
+then runs on its own reader and writer thread joined by a bounded chunk queue, so card
+reads and destination writes overlap and memory stays at BUFFER_CHUNKS * COPY_CHUNK per
+card. Cards run in parallel.
+
+A CSV manifest (source, target, size, BLAKE2b hash, status) is written to the destination.
+When the renamer has a content index, the copies are recorded in it with their full hash
+and a quick hash, both taken from the copy before it is tagged.
+Cards are never modified.
+"""
+
+import csv
+import hashlib
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from models.content_index import ContentEntry, quick_hash
+from models.file_rename import ALL_MEDIA, FileRenamer
+from models.meta_edit import MetaTool, format_size
+
+COPY_CHUNK = 8 << 20
+BUFFER_CHUNKS = 8  # chunks buffered between a card's reader and writer
+PART_SUFFIX = ".virin-part"
+MANIFEST_FORMAT = "virin-manifest-{stamp}.csv"
+MANIFEST_FIELDS = ["source", "target", "size", "blake2b", "status", "error"]
+COPIED = "copied"
+FAILED = "failed"
+MAX_LISTED_FAILURES = 20
+TAG_BATCH_FILES = 16  # copies tagged per exiftool write
+TAG_BATCH_BYTES = 256 << 20  # a batch is tagged early once its copies add up to this
+
+
+class IngestResult(NamedTuple):
+    """Outcome for one card file"""
+
+    source: str
+    target: str
+    size: int
+    digest: str  # BLAKE2b hex of the bytes read from the card, empty on failure
+    status: str  # copied or failed
+    error: str = None
+
+
+class IngestSummary(NamedTuple):
+    """Everything one ingest did"""
+
+    results: list
+    seconds: float
+    manifest: str
+
+    def message(self) -> str:
+        """Notification text"""
+        copied = [result for result in self.results if result.status == COPIED]
+        failed = [result for result in self.results if result.status == FAILED]
+        size = sum(result.size for result in copied)
+        rate = size / (1 << 20) / max(self.seconds, 0.001)
+        lines = [
+            f"Ingested {len(copied)} of {len(self.results)} files "
+            f"({format_size(size)}, {rate:.1f} MB/s). Failed: {len(failed)}.",
+            f"Manifest: {self.manifest}",
+        ]
+        lines.extend(
+            f"{os.path.basename(result.source)}: {result.error}"
+            for result in failed[:MAX_LISTED_FAILURES]
+        )
+        if len(failed) > MAX_LISTED_FAILURES:
+            lines.append(f"... and {len(failed) - MAX_LISTED_FAILURES} more")
+        return "\n".join(lines)
+
+
+def _publish(part, target) -> None:
+    """Gives a finished copy its final name, never replacing an existing file"""
+    try:
+        os.link(part, target)
+    except FileExistsError:
+        raise
+    except OSError:
+        # exFAT/SMB without hard links: check, then rename
+        if os.path.exists(target):
+            raise FileExistsError(target)
+        os.rename(part, target)
+        return
+    os.remove(part)
+
+
+def _read_chunks(path, chunks, cancelled) -> None:
+    """Card side: streams one file into the queue, then an end marker (or the error)"""
+    try:
+        with open(path, "rb") as file:
+            while not cancelled.is_set():
+                chunk = file.read(COPY_CHUNK)
+                if not chunk:
+                    break
+                chunks.put(chunk)
+        chunks.put(None)
+    except OSError as error:
+        chunks.put(error)
+
+
+def copy_file(source, target) -> tuple:
+    """
+    Copies one file while hashing it. The card is read by a separate thread so reading
+    the next chunk overlaps writing the last one. The copy is fsynced under a temporary
+    name and only then given its final name, with the card file's dates.
+
+    Returns:
+        tuple: (size, BLAKE2b hex digest)
+
+    Raises:
+        OSError: The file could not be read or written, FileExistsError if target exists.
+    """
+    part = os.path.join(
+        os.path.dirname(target), "." + os.path.basename(target) + PART_SUFFIX
+    )
+    chunks = queue.Queue(maxsize=BUFFER_CHUNKS)
+    cancelled = threading.Event()
+    reader = threading.Thread(target=_read_chunks, args=(source, chunks, cancelled))
+    reader.start()
+    digest = hashlib.blake2b()
+    size = 0
+    try:
+        with open(part, "xb") as file:
+            while (chunk := chunks.get()) is not None:
+                if isinstance(chunk, OSError):
+                    raise chunk
+                digest.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        shutil.copystat(source, part)  # later renames sort by these dates
+        _publish(part, target)
+    except BaseException:
+        cancelled.set()
+        while reader.is_alive():  # unblock a reader waiting on a full queue
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        reader.join()
+    return size, digest.hexdigest()
+
+
+class Ingest:
+    """
+    Copies, names and tags camera cards into one destination folder.
+
+    Args:
+        renamer (FileRenamer): Names the files, defaults to a new one.
+        meta (MetaTool): Writes metadata, created when first needed.
+    """
+
+    def __init__(self, renamer=None, meta=None) -> None:
+        self.renamer = renamer or FileRenamer()
+        self.meta = meta
+
+    def _copy_card(self, card, metadata) -> tuple:
+        """
+        Copies one card's planned files in order, tagging the copies in small batches.
+
+        Returns:
+            tuple: (IngestResult list, ContentEntry list of the untagged copies)
+        """
+        results = []
+        entries = []
+        batch = []  # indexes into results of copies not tagged yet
+        for source, target in card:
+            try:
+                size, digest = copy_file(source, target)
+            except OSError as error:
+                results.append(IngestResult(source, target, 0, "", FAILED, str(error)))
+                continue
+            results.append(IngestResult(source, target, size, digest, COPIED))
+            if self.renamer.content_index is not None:
+                entries.extend(self._get_content_entry(target, size, digest))
+            if metadata:
+                batch.append(len(results) - 1)
+                batched = sum(results[index].size for index in batch)
+                if len(batch) >= TAG_BATCH_FILES or batched >= TAG_BATCH_BYTES:
+                    self._tag(results, batch, metadata)
+                    batch = []
+        if batch:
+            self._tag(results, batch, metadata)
+        return results, entries
+
+    def _get_content_entry(self, target, size, digest) -> list:
+        """The copy's ContentEntry, taken before tagging changes its bytes. Empty if unreadable."""
+        try:
+            quick = quick_hash(target, size)
+        except OSError:
+            return []
+        virin = os.path.splitext(os.path.basename(target))[0]
+        return [ContentEntry(target, virin, size, quick, digest)]
+
+    def _tag(self, results, batch, metadata) -> None:
+        """Writes the metadata to a batch of copies, failures are noted on their results"""
+        plan = self.meta.plan_write([results[index].target for index in batch], metadata)
+        errors = {
+            result.path: result.error
+            for result in self.meta.apply_plan(plan)
+            if result.error
+        }
+        # the copy itself is fine, the manifest notes the failed tagging
+        for index in batch:
+            if results[index].target in errors:
+                results[index] = results[index]._replace(
+                    error=f"metadata: {errors[results[index].target]}"
+                )
+
+    def ingest(
+        self,
+        sources,
+        destination,
+        date,
+        shoot_num,
+        start_seq,
+        selected_extension=ALL_MEDIA,
+        capture_date=False,
+        keep_pairs=False,
+        metadata=None,
+    ) -> IngestSummary:
+        """
+        Ingests every card in parallel.
+
+        Args:
+            sources (list): Card (or card dump) folders, walked recursively.
+            destination (str): Folder the VIRIN named files are copied into.
+            date (str): Optional fixed date, empty uses the card dates.
+            shoot_num (int): The shoot number.
+            start_seq (int): First sequence number of a date without VIRINs in the destination,
+                             None reserves the numbers from the sequence registry.
+            selected_extension: Formats to ingest, see FileRenamer.iter_rename_results.
+            capture_date (bool): Date and order files by their embedded capture date.
+            keep_pairs (bool): RAW+JPEG files with the same stem share one VIRIN.
+            metadata (dict): Optional MetaTool metadata written to every copied file.
+
+        Returns:
+            IngestSummary: Per-file results, duration and the manifest path.
+        """
+        started = time.perf_counter()
+        os.makedirs(destination, exist_ok=True)
+        destination = os.path.abspath(destination)
+        folders, unreadable = self.renamer.plan_tree_names(
+            sources,
+            selected_extension,
+            date,
+            shoot_num,
+            start_seq,
+            capture_date,
+            keep_pairs,
+            existing_names=self.renamer.index.snapshot(destination).names,
+        )
+        cards = [[] for _ in sources]
+        for index, snapshot, pairs in folders:
+            cards[index].extend(
+                (
+                    os.path.join(snapshot.path, old_name),
+                    os.path.join(destination, new_name),
+                )
+                for old_name, new_name in pairs
+            )
+        if metadata and self.meta is None:
+            self.meta = MetaTool()
+        results = [
+            IngestResult(result.source, "", 0, "", FAILED, str(result.error))
+            for result in unreadable
+        ]
+        entries = []
+        with ThreadPoolExecutor(max_workers=max(len(cards), 1)) as executor:
+            for card_results, card_entries in executor.map(
+                self._copy_card, cards, [metadata] * len(cards)
+            ):
+                results.extend(card_results)
+                entries.extend(card_entries)
+        self.renamer.index.invalidate([destination])
+        if entries:
+            self.renamer.content_index.add(entries)
+        manifest = os.path.join(
+            destination, MANIFEST_FORMAT.format(stamp=time.strftime("%Y%m%d-%H%M%S"))
+        )
+        with open(manifest, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(MANIFEST_FIELDS)
+            for result in results:
+                writer.writerow(
+                    [
+                        result.source,
+                        result.target,
+                        result.size,
+                        result.digest,
+                        result.status,
+                        result.error or "",
+                    ]
+                )
+        return IngestSummary(results, time.perf_counter() - started, manifest)
@@ -9,19 +9,550 @@ This module retrieves and batch overwirtes metadata for photo/video files in sel
 Will retreive metadata for first file in directory.
 
 Much work needs to be done to support additional meta fields and append to correct location.
+
+All exiftool calls go through one shared -stay_open process (ExifToolService), so Perl only
+starts once per program run instead of on every load/write. Writes are spread over a pool
+of such processes (ExifToolPool) so large folders use more than one core.
 """
 
+import atexit
+import hashlib
+import heapq
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from typing import NamedTuple
 from exiftool import ExifToolHelper
+from exiftool.exceptions import ExifToolException
+
+from models.dir_index import DirectoryIndex
+from models.metadata_cache import MetadataCache
+from models.xmp import (
+    SIDECAR_EXTENSION,
+    XMP_PROPERTIES,
+    BrokenPacket,
+    find_sidecars,
+    read_sidecar,
+    strip_sidecar,
+    write_sidecar,
+)
+from models.xmp_reader import NATIVE_TAGS, read_native_tags
+from models.xmp_writer import write_in_place
+
+EXIFTOOL_PATHS = [
+    "/opt/homebrew/bin/exiftool",
+    "/usr/local/bin/exiftool",
+]
+EXIFTOOL_WORKERS_ENV = "VIRIN_EXIFTOOL_WORKERS"
+DEFAULT_MAX_WORKERS = 4
+BATCH_FILES = 50  # files per exiftool command
+BATCH_BYTES = 1 << 30  # a batch is closed once it holds this much data
+FILE_OVERHEAD_BYTES = 4 << 20  # per-file parse cost, counted as this much data
+MIN_SHARD_BYTES = 256 << 20  # less work than this does not pay for another process
+MAX_LISTED_FAILURES = 20
+MIXED = "<mixed>"
+BULK_CHUNK_SIZE = 500  # files per exiftool call in a bulk read
+MAX_OUTLIERS = 1000  # outlier paths kept per field
+
+
+# handles unix paths
+def get_exiftool_path() -> str:
+    """returns first possible path that exists for exiftool installation"""
+    for path in EXIFTOOL_PATHS:
+        if os.path.exists(path):
+            return path
+    return "exiftool"
+
+
+class ExifToolService:
+    """
+    Long-lived exiftool process shared by every tool in the app.
+
+    Requests from worker threads queue on a lock and run one at a time over the same
+    -stay_open pipe. If the process has died it is restarted on the next request, and it
+    is stopped when the program exits.
+
+    Args:
+        executable (str): Optional exiftool executable (defaults to get_exiftool_path()).
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, executable=None) -> None:
+        self._executable = executable or get_exiftool_path()
+        self._lock = threading.RLock()
+        self._helper = None
+        self.restarts = 0
+
+    @classmethod
+    def shared(cls) -> "ExifToolService":
+        """Returns the app-wide service. The process itself starts on the first request."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+                atexit.register(cls._shared.shutdown)
+            return cls._shared
+
+    def _get_helper(self) -> ExifToolHelper:
+        """Returns the running helper, starting a new process if there is none or it died"""
+        if self._helper is not None and not self._helper.running:
+            self._discard()
+            self.restarts += 1
+        if self._helper is None:
+            self._helper = ExifToolHelper(executable=self._executable)
+            self._helper.run()
+        return self._helper
+
+    def _discard(self) -> None:
+        """Drops the current process, whatever state it is in"""
+        helper, self._helper = self._helper, None
+        try:
+            helper.terminate()
+        except (ExifToolException, OSError):
+            pass
+
+    def call(self, method, *args, check_execute=True, **kwargs):
+        """
+        Runs one ExifToolHelper method on the shared process.
+
+        Args:
+            method (str): Helper method name, e.g. 'get_tags', 'set_tags' or 'execute'.
+            check_execute (bool): Raise ExifToolExecuteError on a non-zero exiftool status.
+
+        Returns:
+            The helper method's result.
+        """
+        with self._lock:
+            for attempt in range(2):
+                helper = self._get_helper()
+                helper.check_execute = check_execute
+                try:
+                    return getattr(helper, method)(*args, **kwargs)
+                except OSError:
+                    # broken pipe, the process died during the request: retry once on a new one
+                    self._discard()
+                    self.restarts += 1
+                    if attempt:
+                        raise
+
+    def get_tags(self, files, tags, params=None, check_execute=True) -> list:
+        """ExifToolHelper.get_tags on the shared process"""
+        return self.call(
+            "get_tags", files, tags=tags, params=params, check_execute=check_execute
+        )
+
+    def set_tags(self, files, tags, params=None, check_execute=True):
+        """ExifToolHelper.set_tags on the shared process"""
+        return self.call(
+            "set_tags", files, tags=tags, params=params, check_execute=check_execute
+        )
+
+    def set_tags_status(self, files, tags, params=None) -> tuple:
+        """
+        set_tags that reports exiftool errors instead of raising them.
+
+        Returns:
+            tuple: (exit status, stderr) of the exiftool run.
+        """
+        with self._lock:
+            self.call(
+                "set_tags", files, tags=tags, params=params, check_execute=False
+            )
+            return self._helper.last_status, self._helper.last_stderr
+
+    def shutdown(self) -> None:
+        """Stops the process. A later request starts a new one."""
+        with self._lock:
+            if self._helper is not None:
+                self._discard()
+
+
+class WriteResult(NamedTuple):
+    """Outcome of a metadata write for one file"""
+
+    path: str
+    error: str = None  # exiftool error message, None when the file was written
+
+
+def get_worker_count(workers=None) -> int:
+    """
+    Pool size: the argument, then VIRIN_EXIFTOOL_WORKERS, then the CPU count (at most 4).
+    A NAS is usually bound by the network and wants fewer workers than a local SSD.
+    """
+    if workers is None:
+        try:
+            workers = int(os.environ.get(EXIFTOOL_WORKERS_ENV, ""))
+        except ValueError:
+            workers = min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    return max(1, workers)
+
+
+def _split_batches(paths, sizes) -> list:
+    """Cuts one worker's files into commands. Big files go alone, small ones are grouped."""
+    batches = []
+    batch, batch_bytes = [], 0
+    for path in paths:
+        if batch and (
+            len(batch) >= BATCH_FILES or batch_bytes + sizes[path] > BATCH_BYTES
+        ):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(path)
+        batch_bytes += sizes[path]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def plan_shards(sizes, workers) -> list:
+    """
+    Spreads files over workers by size: largest first, each onto the least loaded worker.
+
+    Args:
+        sizes (dict): path -> file size in bytes.
+        workers (int): Maximum number of exiftool processes.
+
+    Returns:
+        list: One list of batches (lists of paths) per worker that has work.
+    """
+    weights = {path: size + FILE_OVERHEAD_BYTES for path, size in sizes.items()}
+    needed = -(-sum(weights.values()) // MIN_SHARD_BYTES)
+    workers = max(1, min(workers, len(sizes), needed))
+    loads = [(0, index) for index in range(workers)]
+    shares = [[] for _ in range(workers)]
+    for path in sorted(sizes, key=sizes.get, reverse=True):
+        load, index = heapq.heappop(loads)
+        shares[index].append(path)
+        heapq.heappush(loads, (load + weights[path], index))
+    return [_split_batches(share, sizes) for share in shares if share]
+
+
+def _parse_errors(status, stderr, batch) -> dict:
+    """
+    Maps exiftool's "Error: message - path" lines to the files of a batch.
+
+    Returns:
+        dict: path -> error message for every file exiftool named. Empty when a failed
+              command did not say which files were bad.
+    """
+    errors = {}
+    paths = set(batch)
+    for line in (stderr or "").splitlines():
+        message, separator, path = line.rpartition(" - ")
+        if separator and message.startswith("Error") and path in paths:
+            errors[path] = message
+    return errors
+
+
+class ExifToolPool:
+    """
+    Several exiftool processes writing one file list in parallel.
+
+    The first worker is the shared ExifToolService. Extra processes are only started when a
+    write is big enough to need them, and stay open for the next write.
+
+    Args:
+        workers (int): Maximum number of processes, see get_worker_count.
+    """
+
+    def __init__(self, workers=None) -> None:
+        self.workers = get_worker_count(workers)
+        self._services = []
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def _get_services(self, count) -> list:
+        with self._lock:
+            while len(self._services) < count:
+                self._services.append(
+                    ExifToolService() if self._services else ExifToolService.shared()
+                )
+            return self._services[:count]
+
+    def set_tags(self, files, tags, params=None) -> list:
+        """
+        Writes the same tags to every file.
+
+        Args:
+            files (list): File paths.
+            tags (dict): Tags to write.
+            params (list): Extra exiftool options, e.g. ["-P", "-overwrite_original"].
+
+        Returns:
+            list: WriteResult per file, in the order given.
+        """
+        sizes = {}
+        for path in files:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:
+                sizes[path] = 0  # exiftool reports the real problem
+        shards = plan_shards(sizes, self.workers)
+        services = self._get_services(len(shards))
+
+        errors = {}
+        if len(shards) == 1:
+            errors.update(self._write_shard(services[0], shards[0], tags, params))
+        else:
+            with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                for shard_errors in executor.map(
+                    self._write_shard, services, shards, repeat(tags), repeat(params)
+                ):
+                    errors.update(shard_errors)
+        return [WriteResult(path, errors.get(path)) for path in files]
+
+    def _write_shard(self, service, batches, tags, params) -> dict:
+        """Runs one worker's batches in order. Returns path -> error."""
+        errors = {}
+        for batch in batches:
+            errors.update(self._write_batch(service, batch, tags, params))
+        return errors
+
+    def _write_batch(self, service, batch, tags, params, retry=True) -> dict:
+        """
+        Writes one batch, keeping the whole batch in a single exiftool call while it works.
+
+        When the call fails without naming the bad files (a crash, a generic error), the
+        batch is split in half and each half written again, so a bad file costs about
+        log2(len(batch)) extra calls instead of a serial re-run. Files exiftool did name
+        are retried once on their own, the files written beside them are not touched again.
+
+        Returns:
+            dict: path -> error for every file that was not written.
+        """
+        try:
+            status, stderr = service.set_tags_status(batch, tags, params)
+        except (ExifToolException, OSError) as error:
+            status, stderr = 1, str(error)
+        errors = _parse_errors(status, stderr, batch)
+        if status and not errors:
+            if len(batch) == 1:
+                return {batch[0]: (stderr or "").strip() or f"exit status {status}"}
+            middle = len(batch) // 2
+            return {
+                **self._write_batch(service, batch[:middle], tags, params),
+                **self._write_batch(service, batch[middle:], tags, params),
+            }
+        if errors and retry and len(errors) < len(batch):
+            return self._write_batch(
+                service, [path for path in batch if path in errors], tags, params, False
+            )
+        return errors
+
+    def shutdown(self) -> None:
+        """Stops the extra processes. The shared service is left to its own shutdown."""
+        with self._lock:
+            for service in self._services[1:]:
+                service.shutdown()
+
+
+def format_size(size) -> str:
+    """Human readable byte count"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _get_sizes(files) -> dict:
+    sizes = {}
+    for file in files:
+        try:
+            sizes[file] = os.path.getsize(file)
+        except OSError:
+            sizes[file] = 0
+    return sizes
+
+
+def format_write_results(results, unchanged=()) -> str:
+    """
+    Notification text for a metadata write.
+
+    Args:
+        results (list): WriteResult for every file that was written.
+        unchanged (list): Files skipped because their metadata already matched.
+    """
+    failed = [result for result in results if result.error]
+    skipped = ""
+    if unchanged:
+        skipped = (
+            f" {len(unchanged)} files were already up to date "
+            f"({format_size(sum(_get_sizes(unchanged).values()))} not rewritten)."
+        )
+    if not failed:
+        if not results:
+            return "All files already up to date." + skipped
+        return "Metadata updated sucessfully!" + skipped
+    lines = [
+        f"Metadata updated for {len(results) - len(failed)} of {len(results)} files. "
+        f"Failed: {len(failed)}." + skipped
+    ]
+    lines.extend(
+        f"{os.path.basename(result.path)}: {result.error}"
+        for result in failed[:MAX_LISTED_FAILURES]
+    )
+    if len(failed) > MAX_LISTED_FAILURES:
+        lines.append(f"... and {len(failed) - MAX_LISTED_FAILURES} more")
+    return "\n".join(lines)
+
+
+def format_write_plan(files, plan) -> str:
+    """
+    Dry run report: what a write would change and how much rewriting it avoids.
+
+    Args:
+        files (list): Every matching file.
+        plan (dict): file -> tag delta, from MetaTool.plan_write.
+    """
+    sizes = _get_sizes(files)
+    rewritten = sum(sizes[file] for file in plan)
+    avoided = sum(sizes.values()) - rewritten
+    lines = [
+        f"Dry run: {len(plan)} of {len(files)} files would be rewritten "
+        f"({format_size(rewritten)}). {len(files) - len(plan)} files already match, "
+        f"{format_size(avoided)} avoided."
+    ]
+    for file, delta in list(plan.items())[:MAX_LISTED_FAILURES]:
+        lines.append(f"{os.path.basename(file)}: {', '.join(delta)}")
+    if len(plan) > MAX_LISTED_FAILURES:
+        lines.append(f"... and {len(plan) - MAX_LISTED_FAILURES} more")
+    return "\n".join(lines)
+
+
+def _group_by_tags(tags_by_file) -> list:
+    """
+    Groups files that get exactly the same tags, so each group is one write.
+
+    Returns:
+        list: (tags, files) tuples.
+    """
+    groups = {}
+    for file, tags in tags_by_file.items():
+        key = tuple(sorted((tag, _field_value(value)) for tag, value in tags.items()))
+        groups.setdefault(key, (tags, []))[1].append(file)
+    return list(groups.values())
+
+
+def merge_sidecar(embedded, sidecar) -> dict:
+    """Overlays sidecar values on an exiftool result. The sidecar wins for every tag it has."""
+    names = {key.rpartition(":")[2].lower() for key in sidecar}
+    merged = {
+        key: value
+        for key, value in embedded.items()
+        if key.rpartition(":")[2].lower() not in names
+    }
+    merged.update(sidecar)
+    return merged
+
+
+def get_tag_delta(current, metadata) -> dict:
+    """
+    Returns the tags of metadata that differ from a file's current values.
+
+    Args:
+        current (dict): The file's exiftool result ('XMP:Title': ...), any tag group.
+        metadata (dict): Tags about to be written.
+    """
+    values = {}
+    for key, value in current.items():
+        values.setdefault(key.rpartition(":")[2].lower(), []).append(
+            _field_value(value).strip()
+        )
+    delta = {}
+    for tag, value in metadata.items():
+        wanted = _field_value(value).strip()
+        found = values.get(tag.lower())
+        # an empty value matches a tag the file does not have
+        if (found is None and wanted) or (
+            found is not None and any(item != wanted for item in found)
+        ):
+            delta[tag] = value
+    return delta
+
+
+class EmbedSummary(NamedTuple):
+    """Everything one embedding of sidecars did"""
+
+    sidecars: int  # sidecars found for the files
+    results: list  # WriteResult per file written
+    unchanged: list  # files that already held their sidecar values
+    removed: int  # sidecars deleted
+    stripped: int  # sidecars rewritten without the toolkit fields, other settings kept
+
+    def message(self, selected_extension) -> str:
+        """Notification text, like write_metadata's plus the sidecars removed and stripped"""
+        if not self.sidecars:
+            return f"No sidecars found for files with extension {selected_extension}."
+        message = format_write_results(self.results, self.unchanged)
+        if self.removed or self.stripped:
+            message += f"\nRemoved {self.removed} sidecars."
+        if self.stripped:
+            message += f" Kept {self.stripped} with other settings."
+        return message
+
+
+class FieldConsensus(NamedTuple):
+    """Agreement on one metadata field across every file of a folder"""
+
+    value: str  # value held by more than half of the files, otherwise MIXED
+    common_count: int  # files holding the most common value
+    total: int
+    outliers: list  # files that differ from the most common value (at most MAX_OUTLIERS)
+
+
+def _field_value(value) -> str:
+    """exiftool value as shown in the edit fields (lists are comma joined)"""
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+class _FieldTally:
+    """
+    Counts the values of one field. Values are counted by digest and the text is only kept
+    once a second file has it, so thousands of unique captions are not held in memory.
+    """
+
+    def __init__(self) -> None:
+        self.files = {}  # digest -> indexes of the files holding the value
+        self.texts = {}  # digest -> value, for values seen more than once
+        self.first = None  # (digest, value) of the first file
+
+    def add(self, index, value) -> None:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        indexes = self.files.setdefault(digest, [])
+        indexes.append(index)
+        if self.first is None:
+            self.first = (digest, value)
+        elif len(indexes) == 2:
+            self.texts[digest] = value
+
+    def result(self, paths) -> FieldConsensus:
+        digest, indexes = max(self.files.items(), key=lambda item: len(item[1]))
+        text = self.texts.get(digest, self.first[1] if digest == self.first[0] else "")
+        common = set(indexes)
+        outliers = [
+            paths[index] for index in range(len(paths)) if index not in common
+        ][:MAX_OUTLIERS]
+        value = text if len(indexes) * 2 > len(paths) else MIXED
+        return FieldConsensus(value, len(indexes), len(paths), outliers)
 
 
 class MetaTool:
     """
     Provides functionality to write and retrieve metadata using the ExifTool library.
     The metadata can be added to and extracted from various files based on the file extension.
+
+    Args:
+        workers (int): Maximum exiftool processes for writes, see get_worker_count.
+        cache (MetadataCache): Read cache (defaults to an in-memory one).
+        index (DirectoryIndex): Listing cache shared with FileRenamer.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, workers=None, cache=None, index=None) -> None:
         self.meta_fields = {
             "Creator": "",
             "Writer": "",
@@ -35,6 +566,10 @@ class MetaTool:
             "Copyright": "",
         }
         self._exiftool_path = self._get_exiftool_path()
+        self._exiftool = ExifToolService.shared()
+        self._pool = ExifToolPool(workers)
+        self._cache = cache or MetadataCache()
+        self._index = index or DirectoryIndex.shared()
 
     def _load_files(self, path, selected_extension) -> list:
         """
@@ -47,51 +582,229 @@ class MetaTool:
         Raises:
             FileNotFoundError: If the specified directory path does not exist.
         """
+        if not path:
+            return []
         try:
-            return [
-                os.path.join(path, file)
-                for file in os.listdir(path)
-                if file.lower().endswith(selected_extension)
-            ]
+            snapshot = self._index.snapshot(path, [selected_extension])
         except FileNotFoundError:
             return []
+        return [os.path.join(path, record.name) for record in snapshot.records]
+
+    def list_files(self, path, selected_extension) -> list:
+        """Matching files of a directory, for callers that plan and apply writes themselves"""
+        return self._load_files(path, selected_extension)
 
-    # handles unix paths
     def _get_exiftool_path(self) -> str:
         """returns first possible path that exists for exiftool installation"""
-        possible_paths = [
-            "/opt/homebrew/bin/exiftool",
-            "/usr/local/bin/exiftool",
-        ]
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-        return "exiftool"
+        return get_exiftool_path()
 
-    def write_metadata(self, path, selected_extension, metadata: dict) -> str:
+    def _read_tags(self, file, tags) -> dict:
+        """Reads tags for one file, from the cache while the file is unchanged"""
+        return next(self._iter_tags([file], tags, 1))
+
+    def plan_write(self, files, metadata, sidecars=True) -> dict:
+        """
+        Reads the current values (batched) and works out what each file really needs.
+
+        Args:
+            files (list): Media files.
+            metadata (dict): Tags to write.
+            sidecars (bool): Compare against sidecar values too, False for embedded only.
+
+        Returns:
+            dict: file -> tags that differ. Files that already match are left out.
+        """
+        plan = {}
+        current_tags = self._iter_tags(files, list(metadata), BULK_CHUNK_SIZE, sidecars)
+        for file, current in zip(files, current_tags):
+            if delta := get_tag_delta(current, metadata):
+                plan[file] = delta
+        return plan
+
+    def _write_embedded(self, plan) -> list:
+        """
+        Writes planned tag deltas into the files. A delta that fits the padding of the
+        file's XMP packet is written in place, the rest goes to exiftool, where files
+        needing the same tags share a write.
+        """
+        results = []
+        rewrite = {}
+        for file, delta in plan.items():
+            if write_in_place(file, delta):
+                results.append(WriteResult(file))
+            else:
+                rewrite[file] = delta
+        for tags, group in _group_by_tags(rewrite):
+            results.extend(
+                self._pool.set_tags(
+                    group, tags=tags, params=["-P", "-overwrite_original"]
+                )
+            )
+        # -P keeps the mtime, so cached reads of these files cannot notice the write
+        self._cache.invalidate(list(plan))
+        self._index.invalidate({os.path.dirname(file) for file in plan})
+        return results
+
+    def _write_sidecars(self, plan) -> list:
+        """Writes planned tag deltas to .xmp sidecars. Only a few KB per file, media is untouched."""
+        results = []
+        for file, delta in plan.items():
+            try:
+                write_sidecar(file, delta)
+                results.append(WriteResult(file))
+            except (OSError, BrokenPacket) as error:
+                results.append(WriteResult(file, str(error)))
+        self._index.invalidate({os.path.dirname(file) for file in plan})
+        return results
+
+    def write_metadata(
+        self, path, selected_extension, metadata: dict, dry_run=False, sidecar=False
+    ) -> str:
         """
 
         Writes metadata to files within the specified directory.
+        Only files and tags that differ from what is already on disk are written, so a
+        repeated write does not rewrite large videos again.
 
         Parameters:
             path (str): The directory path containing files to modify.
             selected_extension (str): The file extension filter to select specific files.
             metadata (dict): The metadata tags to be written to the selected files.
+            dry_run (bool): Only report what would be written and the bytes it avoids.
+            sidecar (bool): Write .xmp sidecars next to the files instead of rewriting them.
+                            embed_sidecars() moves them into the files later.
 
         Returns:
-            str: A message indicating the success or failure of the metadata update operation.
+            str: A message indicating the success or failure of the metadata update operation,
+                 listing every file exiftool could not write.
 
         Raises:
             FileNotFoundError: If the specified directory path does not exist.
         """
         if files := self._load_files(path, selected_extension):
-            with ExifToolHelper(executable=self._exiftool_path) as et:
-                et.set_tags(files, tags=metadata, params=["-P", "-overwrite_original"])
-                et.terminate()
-            return "Metadata updated sucessfully!"
+            return self.write_files(files, metadata, dry_run, sidecar)
         return f"No files found with extension {selected_extension} \
                 in {"directory" if path else "(Unspecified directory)"}."
 
+    def write_files(self, files, metadata: dict, dry_run=False, sidecar=False) -> str:
+        """
+        Writes metadata to a list of files, see write_metadata.
+
+        Args:
+            files (list): Media file paths, e.g. a watch folder batch.
+            metadata (dict): The metadata tags to be written.
+            dry_run (bool): Only report what would be written.
+            sidecar (bool): Write .xmp sidecars instead of rewriting the files.
+
+        Returns:
+            str: The same message as write_metadata.
+        """
+        plan = self.plan_write(files, metadata)
+        if dry_run:
+            return format_write_plan(files, plan)
+        results = self.apply_plan(plan, sidecar)
+        unchanged = [file for file in files if file not in plan]
+        return format_write_results(results, unchanged)
+
+    def apply_plan(self, plan, sidecar=False) -> list:
+        """
+        Writes a plan from plan_write.
+
+        Args:
+            plan (dict): file -> tags that differ.
+            sidecar (bool): Write .xmp sidecars instead of rewriting the files.
+
+        Returns:
+            list: WriteResult per written file.
+        """
+        if sidecar:
+            return self._write_sidecars(plan)
+        return self._write_embedded(plan)
+
+    def embed_sidecars(self, path, selected_extension, keep_sidecars=False) -> str:
+        """
+        Writes sidecar values into the media files, see embed_sidecar_values.
+
+        Returns:
+            str: A message like write_metadata's, plus the number of sidecars removed
+                 and stripped.
+        """
+        return self.embed_sidecar_values(path, selected_extension, keep_sidecars).message(
+            selected_extension
+        )
+
+    def embed_sidecar_values(
+        self, path, selected_extension, keep_sidecars=False
+    ) -> EmbedSummary:
+        """
+        Writes sidecar values into the media files, e.g. as an off-hours batch job.
+
+        Once its values are in every media file that shares it, the toolkit's fields are
+        removed from the sidecar. Other settings (Lightroom develop settings, ratings ...)
+        stay, the file is only deleted when nothing else is in it. Sidecars without
+        toolkit fields and sidecars that also belong to files of another format are
+        left alone.
+
+        Args:
+            path (str): The directory path containing the files.
+            selected_extension (str): The file extension filter to select specific files.
+            keep_sidecars (bool): Keep the .xmp files after embedding.
+
+        Returns:
+            EmbedSummary: Write results and the sidecars removed and stripped.
+        """
+        files = self._load_files(path, selected_extension)
+        sidecars = find_sidecars(files)
+        if not sidecars:
+            return EmbedSummary(0, [], [], 0, 0)
+        keys = {tag.lower(): key for key, (_, _, _, tag) in XMP_PROPERTIES.items()}
+        parsed = {}  # a RAW+JPEG pair shares one sidecar, parse it once
+        wanted = {}
+        for file, sidecar in sidecars.items():
+            if sidecar not in parsed:
+                parsed[sidecar] = {
+                    keys[key.rpartition(":")[2].lower()]: value
+                    for key, value in read_sidecar(sidecar).items()
+                }
+            if parsed[sidecar]:
+                wanted[file] = parsed[sidecar]
+        plan = {}
+        for metadata, group in _group_by_tags(wanted):
+            plan.update(self.plan_write(group, metadata, sidecars=False))
+        results = self._write_embedded(plan)
+        unchanged = [file for file in sidecars if file not in plan]
+        if keep_sidecars:
+            return EmbedSummary(len(set(sidecars.values())), results, unchanged, 0, 0)
+
+        failed = {result.path for result in results if result.error}
+        embedded = {}  # sidecar -> every file using it was embedded
+        for file, sidecar in sidecars.items():
+            if parsed[sidecar]:  # nothing to embed, the sidecar is not ours to touch
+                embedded[sidecar] = embedded.get(sidecar, True) and file not in failed
+        # media outside this batch (e.g. the JPEG of a RAW) may still need its sidecar
+        outside = set()
+        for directory in {os.path.dirname(sidecar) for sidecar in embedded}:
+            for name in self._index.snapshot(directory).names:
+                path = os.path.join(directory, name)
+                stem, ext = os.path.splitext(name)
+                if path not in sidecars and ext.lower() != SIDECAR_EXTENSION:
+                    outside.add((directory, stem.casefold()))
+        removed = stripped = 0
+        for sidecar, done in embedded.items():
+            stem = os.path.splitext(os.path.basename(sidecar))[0].casefold()
+            if done and (os.path.dirname(sidecar), stem) not in outside:
+                try:
+                    if strip_sidecar(sidecar):
+                        removed += 1
+                    else:
+                        stripped += 1
+                except (OSError, BrokenPacket):
+                    pass  # the values are embedded, a leftover sidecar is harmless
+        self._index.invalidate({os.path.dirname(sidecar) for sidecar in embedded})
+        return EmbedSummary(
+            len(set(sidecars.values())), results, unchanged, removed, stripped
+        )
+
     def retreive_metadata(self, path, selected_extension) -> dict:
         """
         Retrieves metadata from first file of specified directory.
@@ -105,12 +818,96 @@ class MetaTool:
             Default empty values are returned for each key if nothing found.
         """
         # executable="/opt/homebrew/bin/exiftool"
+        fields = dict(self.meta_fields)  # a fresh copy, nothing carries over between folders
         if files := self._load_files(path, selected_extension):
-            with ExifToolHelper(executable=self._exiftool_path) as et:
-                tags = et.get_tags(files[0], tags=list(self.meta_fields.keys()))
-                for key, value in tags[0].items():
-                    key = key.split(":")
-                    if len(key) > 1 and key[1] in self.meta_fields:
-                        self.meta_fields[key[1]] = value
-                et.terminate()
-        return self.meta_fields
+            fields.update(self._get_fields(self._read_tags(files[0], list(fields))))
+        return fields
+
+    def _get_fields(self, tags) -> dict:
+        """Maps one file's exiftool result ('XMP:Title' ...) to meta field names"""
+        fields = {}
+        for key, value in tags.items():
+            key = key.split(":")
+            if len(key) > 1 and key[1] in self.meta_fields:
+                fields[key[1]] = value
+        return fields
+
+    def _iter_tags(self, files, tags, chunk_size, sidecars=True):
+        """
+        Yields one exiftool result per file, reading cache misses one chunk at a time.
+        JPEG and MP4/MOV files are read natively, exiftool only gets the files left over.
+        Values from .xmp sidecars override embedded ones unless sidecars is False.
+        """
+        sidecar_paths = find_sidecars(files) if sidecars else {}
+        native = {tag.lower() for tag in tags} <= NATIVE_TAGS
+        for start in range(0, len(files), chunk_size):
+            chunk = files[start : start + chunk_size]
+            with self._cache.batch():  # one SQLite commit per chunk
+                cached = self._read_chunk(chunk, tags, native)
+            for file in chunk:
+                if file in sidecar_paths:
+                    yield merge_sidecar(
+                        cached.get(file, {}), read_sidecar(sidecar_paths[file])
+                    )
+                else:
+                    yield cached.get(file, {})
+
+    def _read_chunk(self, chunk, tags, native) -> dict:
+        """Returns path -> exiftool result for a chunk, from the cache where possible"""
+        cached = {}
+        missing = {}
+        for file in chunk:
+            identity, result = self._cache.lookup(file, tags)
+            if result is None:
+                missing[file] = identity
+            else:
+                cached[file] = result
+        for file in list(missing) if native else []:
+            result = read_native_tags(file)
+            if result is not None:
+                self._cache.store(file, missing.pop(file), tags, result)
+                cached[file] = result
+        if missing:
+            try:
+                results = self._exiftool.get_tags(
+                    list(missing), tags=tags, check_execute=False
+                )
+            except ExifToolException:
+                results = []
+            by_source = {result.get("SourceFile"): result for result in results}
+            for file, identity in missing.items():
+                result = by_source.get(file)
+                if result is not None:
+                    self._cache.store(file, identity, tags, result)
+                    cached[file] = result
+        return cached
+
+    def retrieve_consensus(
+        self, path, selected_extension, chunk_size=BULK_CHUNK_SIZE
+    ) -> dict:
+        """
+        Reads the meta fields of every matching file and compares them.
+
+        Files are read in chunks of chunk_size per exiftool call and only per-field tallies
+        are kept, so memory stays flat for very large folders.
+
+        Args:
+            path: The directory path where the files are located.
+            selected_extension: The file extension to filter the files.
+            chunk_size: Files per exiftool call.
+
+        Returns:
+            dict: field name -> FieldConsensus. Empty when no file matches.
+        """
+        files = self._load_files(path, selected_extension)
+        if not files:
+            return {}
+        files.sort()
+        tallies = {field: _FieldTally() for field in self.meta_fields}
+        for index, tags in enumerate(
+            self._iter_tags(files, list(self.meta_fields), chunk_size)
+        ):
+            fields = self._get_fields(tags)
+            for field, tally in tallies.items():
+                tally.add(index, _field_value(fields.get(field, "")))
+        return {field: tally.result(files) for field, tally in tallies.items()}
@@ -0,0 +1,231 @@
+"""
+Module Name: metadata_cache
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module caches exiftool tag reads by file identity (path, size, mtime_ns, inode).
+A cached entry is only used while the file still has the same identity, so any outside
+edit forces a fresh read. Our own writes keep the mtime (-P), so they invalidate their
+files explicitly.
+
+Entries live in a bounded in-memory LRU. Optionally they are also kept in a SQLite file in
+the app data folder, so going back to a folder after a restart does not wake a NAS drive.
+SQLite writes are committed once per batch() block (a read chunk), not once per file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from models.app_data import get_app_data_dir
+
+CACHE_FOLDER = "cache"
+CACHE_DATABASE = "metadata.sqlite"
+DEFAULT_MAX_ENTRIES = 5000
+MAX_PERSISTED_ENTRIES = 100000
+PRUNE_EVERY = 1000  # persisted writes between prunes of the SQLite table
+
+
+def get_file_identity(path):
+    """
+    Returns (size, mtime_ns, inode) for a file, or None if it cannot be stat'd.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+class MetadataCache:
+    """
+    LRU cache of exiftool results for a list of requested tags.
+
+    Args:
+        max_entries (int): Files kept in memory.
+        persist (bool): Also keep entries in a SQLite file in the app data folder.
+        database (str): Optional SQLite path, implies persist.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, persist=False, database=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (identity, tag names, exiftool result)
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        self._batches = 0  # open batch() blocks, SQLite writes wait for the last one
+        self._saves = {}  # path -> row not yet written
+        self._touches = set()  # persisted paths used since the last commit
+        if persist or database:
+            self._open_database(
+                database or os.path.join(get_app_data_dir(CACHE_FOLDER), CACHE_DATABASE)
+            )
+
+    def _open_database(self, path) -> None:
+        """Opens the SQLite store. A broken cache file is replaced, never fatal."""
+        try:
+            self._db = self._connect(path)
+        except sqlite3.DatabaseError:
+            os.remove(path)
+            self._db = self._connect(path)
+
+    def _connect(self, path):
+        db = sqlite3.connect(path, check_same_thread=False)
+        try:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (path TEXT PRIMARY KEY, size INTEGER, "
+                "mtime_ns INTEGER, ino INTEGER, tags TEXT, data TEXT, used REAL)"
+            )
+            db.commit()
+        except sqlite3.DatabaseError:
+            db.close()
+            raise
+        return db
+
+    def lookup(self, path, tags) -> tuple:
+        """
+        Looks up a read of tags for a file.
+
+        Args:
+            path (str): File path.
+            tags (list): Tag names the caller needs.
+
+        Returns:
+            tuple: (identity, result). result is None on a miss, identity is passed to store().
+        """
+        path = os.path.abspath(path)
+        identity = get_file_identity(path)
+        if identity is None:
+            return None, None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None and self._db is not None:
+                entry = self._load(path)
+                if entry is not None:
+                    self._remember(path, entry)
+                    self._touch(path)
+            if entry is None or entry[0] != identity or not set(tags) <= entry[1]:
+                return identity, None
+            self._entries.move_to_end(path)
+            return identity, dict(entry[2])
+
+    def store(self, path, identity, tags, result) -> None:
+        """
+        Caches an exiftool result.
+
+        Args:
+            path (str): File path.
+            identity (tuple): From lookup(), taken before the file was read.
+            tags (list): Tag names that were requested.
+            result (dict): exiftool's tag dict for the file.
+        """
+        if identity is None:
+            return
+        path = os.path.abspath(path)
+        entry = (identity, frozenset(tags), dict(result))
+        with self._lock:
+            self._remember(path, entry)
+            if self._db is not None:
+                self._save(path, entry)
+
+    @contextmanager
+    def batch(self):
+        """
+        Holds back SQLite writes of store() and lookup() until the block ends, then
+        commits them in one transaction.
+        """
+        with self._lock:
+            self._batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches -= 1
+                if not self._batches:
+                    self._flush()
+
+    def invalidate(self, paths) -> None:
+        """Drops cached reads for files we have just written"""
+        paths = [os.path.abspath(path) for path in paths]
+        with self._lock:
+            for path in paths:
+                self._entries.pop(path, None)
+                self._saves.pop(path, None)
+                self._touches.discard(path)
+            if self._db is not None:
+                self._db.executemany(
+                    "DELETE FROM metadata WHERE path = ?", [(path,) for path in paths]
+                )
+                self._db.commit()
+
+    def _remember(self, path, entry) -> None:
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, path):
+        row = self._db.execute(
+            "SELECT size, mtime_ns, ino, tags, data FROM metadata WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None
+        return (tuple(row[:3]), frozenset(json.loads(row[3])), json.loads(row[4]))
+
+    def _save(self, path, entry) -> None:
+        identity, tags, result = entry
+        self._saves[path] = (
+            path,
+            *identity,
+            json.dumps(sorted(tags)),
+            json.dumps(result),
+            time.time(),
+        )
+        if not self._batches:
+            self._flush()
+
+    def _touch(self, path) -> None:
+        """Marks a persisted entry as used this session, so pruning keeps it"""
+        self._touches.add(path)
+        if not self._batches:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Writes pending saves and touches in one transaction"""
+        if self._db is None or not (self._saves or self._touches):
+            return
+        saves = list(self._saves.values())
+        touches = [(time.time(), path) for path in self._touches - self._saves.keys()]
+        self._saves.clear()
+        self._touches.clear()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)", saves
+        )
+        self._db.executemany("UPDATE metadata SET used = ? WHERE path = ?", touches)
+        pruned = self._writes // PRUNE_EVERY
+        self._writes += len(saves)
+        if self._writes // PRUNE_EVERY != pruned:
+            self._db.execute(
+                "DELETE FROM metadata WHERE path NOT IN "
+                "(SELECT path FROM metadata ORDER BY used DESC LIMIT ?)",
+                (MAX_PERSISTED_ENTRIES,),
+            )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """Closes the SQLite store"""
+        with self._lock:
+            if self._db is not None:
+                self._flush()
+                self._db.close()
+                self._db = None
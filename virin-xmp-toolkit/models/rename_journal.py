@@ -0,0 +1,217 @@
+"""
+Module Name: rename_journal
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module keeps an append-only journal of renames, one file per target directory.
+
+Before a batch starts, its full plan is written and fsynced. Each completed os.rename then
+appends a small commit record. Commit records are flushed to the OS straight away, so
+they survive an application crash. fsync only runs every SYNC_EVERY commits and at the
+end of the batch, so the rename loop is not slowed down. After a power loss, the few
+unsynced steps are recovered by checking the disk against the plan.
+
+Undo history is rebuilt from the journal after a restart, including half-finished batches.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import NamedTuple
+
+from models.app_data import get_app_data_dir
+from models.fingerprint import DirectoryFingerprint
+
+JOURNAL_FOLDER = "journals"
+SYNC_EVERY = 500  # commits between fsyncs
+
+PLAN = "plan"
+COMMIT = "commit"
+DONE = "done"
+
+
+class WriteAction(NamedTuple):
+    """One undoable rename batch"""
+
+    directory: str
+    mapping: dict  # original path -> current path
+    fingerprint: DirectoryFingerprint  # None when recovered from an interrupted batch
+    batch: str
+    complete: bool = True  # False when recovered from an interrupted batch
+
+
+def get_journal_path(directory, journal_dir=None) -> str:
+    """Returns the journal file used for a directory"""
+    directory = os.path.abspath(directory)
+    digest = hashlib.sha1(directory.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(journal_dir or get_app_data_dir(JOURNAL_FOLDER), digest + ".jsonl")
+
+
+class RenameJournal:
+    """
+    Append-only rename journal for one directory.
+
+    Args:
+        directory (str): The directory whose renames are recorded.
+        journal_dir (str): Optional folder for journal files (defaults to the app data folder).
+    """
+
+    def __init__(self, directory, journal_dir=None) -> None:
+        self.directory = os.path.abspath(directory)
+        self.path = get_journal_path(self.directory, journal_dir)
+        self._file = None
+        self._unsynced = 0
+
+    def _append(self, record, sync=False) -> None:
+        """Writes one record. The OS gets it straight away, fsync is batched."""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if sync or self._unsynced >= SYNC_EVERY:
+            self.sync()
+
+    def sync(self) -> None:
+        """Forces written records to disk"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """Syncs and closes the journal file"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def begin(self, steps, undoes=None) -> str:
+        """
+        Records a planned batch before any file is touched.
+
+        Args:
+            steps (list): Ordered RenameStep-like (source, target, ...) tuples, names only.
+            undoes (str): Batch id this batch reverts, if it is an undo.
+
+        Returns:
+            str: The new batch id.
+        """
+        batch = uuid.uuid4().hex
+        self._append(
+            {
+                "type": PLAN,
+                "batch": batch,
+                "time": time.time(),
+                "directory": self.directory,
+                "undoes": undoes,
+                "steps": [[step[0], step[1]] for step in steps],
+            },
+            sync=True,
+        )
+        return batch
+
+    def commit(self, batch, step_index) -> None:
+        """Records that planned step step_index has been applied"""
+        self._append({"type": COMMIT, "batch": batch, "step": step_index})
+
+    def end(self, batch, fingerprint=None) -> None:
+        """Marks a batch as finished, with the fingerprint used to validate its undo"""
+        self._append(
+            {
+                "type": DONE,
+                "batch": batch,
+                "fingerprint": None if fingerprint is None else fingerprint._asdict(),
+            },
+            sync=True,
+        )
+
+    def _read_records(self):
+        """Yields journal records. A torn last line from a crash is ignored."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def _probe_step(self, source, target) -> bool:
+        """Checks the disk for a step whose commit record may have been lost"""
+        return not os.path.lexists(
+            os.path.join(self.directory, source)
+        ) and os.path.lexists(os.path.join(self.directory, target))
+
+    def load(self) -> list:
+        """
+        Replays the journal.
+
+        Returns:
+            list: WriteAction for every batch that still has renamed files, oldest first.
+                  Interrupted batches are included with complete=False.
+        """
+        batches = {}  # batch id -> plan record with replay state
+        for record in self._read_records():
+            batch = batches.get(record.get("batch"))
+            if record.get("type") == PLAN:
+                record["current"] = {}  # original name -> current name
+                record["located"] = {}  # current name -> original name
+                record["committed"] = -1
+                record["complete"] = False
+                record["fingerprint"] = None
+                batches[record["batch"]] = record
+            elif batch is None:
+                continue
+            elif record["type"] == COMMIT:
+                self._replay_step(batches, batch, record["step"])
+            elif record["type"] == DONE:
+                batch["complete"] = True
+                if record.get("fingerprint"):
+                    batch["fingerprint"] = DirectoryFingerprint(**record["fingerprint"])
+
+        for batch in batches.values():
+            if not batch["complete"]:
+                # steps after the last synced commit may have happened without a record
+                for index in range(batch["committed"] + 1, len(batch["steps"])):
+                    if self._probe_step(*batch["steps"][index]):
+                        self._replay_step(batches, batch, index)
+
+        actions = []
+        for batch in batches.values():
+            if batch["undoes"] or not batch["current"]:
+                continue
+            actions.append(
+                WriteAction(
+                    batch["directory"],
+                    {
+                        os.path.join(batch["directory"], original): os.path.join(
+                            batch["directory"], current
+                        )
+                        for original, current in batch["current"].items()
+                    },
+                    batch["fingerprint"],
+                    batch["batch"],
+                    batch["complete"],
+                )
+            )
+        return actions
+
+    def _replay_step(self, batches, batch, index) -> None:
+        """
+        Moves one file in the replay state. Undo batches move the files of the batch they revert,
+        files that are back at their original name drop out of it.
+        """
+        source, target = batch["steps"][index]
+        batch["committed"] = max(batch["committed"], index)
+        owner = batches.get(batch["undoes"], batch)
+        original = owner["located"].pop(source, source)
+        if original == target:
+            owner["current"].pop(original, None)
+            return
+        owner["current"][original] = target
+        owner["located"][target] = original
@@ -0,0 +1,228 @@
+"""
+Module Name: rename_plan
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module splits a batch rename into a plan phase and an execute phase.
+
+The plan phase takes every source > target pair for one directory and checks them
+against a single listing using set lookups. Targets that are also sources (chains and
+swap cycles) are ordered so nothing is overwritten, cycles are broken with a temporary name.
+The execute phase applies the planned moves and reports one result per pair.
+
+Name checks are case-insensitive so plans are also safe on macOS volumes.
+"""
+
+import os
+from typing import NamedTuple
+
+TEMP_NAME_FORMAT = ".{name}.virin-tmp{count}"
+
+RENAMED = "renamed"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class StrandedFileError(OSError):
+    """The last move of a swap cycle failed and the file could not go back to its name"""
+
+    def __init__(self, temp, error) -> None:
+        super().__init__(f"{error}. The file was left as {temp}")
+        self.temp = temp
+        self.error = error
+
+
+class RenameResult(NamedTuple):
+    """Outcome for one requested source > target pair"""
+
+    source: str
+    target: str
+    status: str  # renamed, skipped or failed
+    error: Exception = None
+
+
+class RenameStep(NamedTuple):
+    """One os.rename call. pair is the index of the requested pair it belongs to."""
+
+    source: str
+    target: str
+    pair: int
+    final: bool  # False for the first half of a cycle-breaking temporary move
+
+
+def _key(name) -> str:
+    return name.casefold()
+
+
+class RenamePlan:
+    """
+    Ordered rename steps for one directory.
+
+    Args:
+        path (str): The directory the names belong to.
+        pairs (list): Ordered (source name, target name) tuples.
+        existing_names (iterable): Every entry name currently in the directory.
+    """
+
+    def __init__(self, path, pairs, existing_names) -> None:
+        self.path = os.path.abspath(path)
+        self.pairs = list(pairs)
+        self.steps = []
+        self.skipped = {}  # pair index -> exception explaining the skip
+        self._occupied = {_key(name) for name in existing_names}
+        self._temp_count = 0
+        accepted = self._check_collisions()
+        self._order_steps(accepted)
+
+    def _reject(self, index, error, accepted, by_target) -> None:
+        """
+        Skips a pair. Its source then stays in place, so a pair that targets it must be skipped too.
+        """
+        while index is not None:
+            self.skipped[index] = error
+            source, target = self.pairs[index]
+            del accepted[_key(source)]
+            del by_target[_key(target)]
+            index = by_target.get(_key(source))
+            if index is not None:
+                error = FileExistsError(self.pairs[index][1])
+
+    def _check_collisions(self) -> dict:
+        """
+        Validates every pair with hash-set lookups against the listing and the other pairs.
+
+        Returns:
+            dict: source key -> pair index for every pair that can be applied.
+        """
+        accepted = {}  # source key -> pair index
+        by_target = {}  # target key -> pair index
+        for index, (source, target) in enumerate(self.pairs):
+            source_key, target_key = _key(source), _key(target)
+            if source == target:
+                self.skipped[index] = FileExistsError(target)
+            elif source_key not in self._occupied or source_key in accepted:
+                self.skipped[index] = FileNotFoundError(source)
+            elif target_key in by_target:
+                self.skipped[index] = FileExistsError(target)
+            else:
+                accepted[source_key] = index
+                by_target[target_key] = index
+
+        # a target may only exist on disk if the file there is moved away by this plan
+        for target_key, index in list(by_target.items()):
+            if index in self.skipped:
+                continue
+            if target_key in self._occupied and target_key not in accepted:
+                error = FileExistsError(self.pairs[index][1])
+                self._reject(index, error, accepted, by_target)
+        return accepted
+
+    def _temp_name(self, name) -> str:
+        """Returns a hidden name that is not in the directory listing"""
+        while True:
+            self._temp_count += 1
+            temp = TEMP_NAME_FORMAT.format(name=name, count=self._temp_count)
+            if _key(temp) not in self._occupied:
+                self._occupied.add(_key(temp))
+                return temp
+
+    def _order_steps(self, accepted) -> None:
+        """
+        Orders moves so each target is free when its rename runs.
+        Pairs left after following every chain form cycles and get a temporary step.
+        """
+        pending = dict(accepted)  # source key -> pair index still to move
+        waiting = {}  # target key -> pair index blocked on that name
+        ready = []
+        for index in accepted.values():
+            target_key = _key(self.pairs[index][1])
+            if target_key in pending:
+                waiting[target_key] = index
+            else:
+                ready.append(index)
+
+        def drain(queue):
+            while queue:
+                index = queue.pop()
+                source, target = self.pairs[index]
+                self.steps.append(RenameStep(source, target, index, True))
+                # the source name is free now, unblock whoever targets it
+                del pending[_key(source)]
+                if _key(source) in waiting:
+                    queue.append(waiting.pop(_key(source)))
+
+        drain(ready[::-1])
+
+        # anything still pending is part of a cycle
+        for source_key in list(pending):
+            if source_key not in pending:
+                continue
+            index = pending.pop(source_key)
+            source, target = self.pairs[index]
+            temp = self._temp_name(source)
+            self.steps.append(RenameStep(source, temp, index, False))
+            waiting.pop(_key(target), None)
+            if source_key in waiting:
+                drain([waiting.pop(source_key)])
+            self.steps.append(RenameStep(temp, target, index, True))
+
+    def _restore(self, temp, source, blocked, error) -> OSError:
+        """
+        Moves a file back from its temporary name after the move to its target failed.
+        In a cycle the source name is usually taken by then, the error then names the
+        temporary file so it is not lost.
+
+        Returns:
+            OSError: The original error, or a StrandedFileError naming the temporary file.
+        """
+        source_path = os.path.join(self.path, source)
+        if _key(source) not in blocked and not os.path.lexists(source_path):
+            try:
+                os.rename(os.path.join(self.path, temp), source_path)
+                return error
+            except OSError:
+                pass
+        return StrandedFileError(os.path.join(self.path, temp), error)
+
+    def execute(self, on_step=None):
+        """
+        Applies the planned steps in order.
+
+        Args:
+            on_step (callable): Optional callback given the index of every step that succeeded.
+
+        Yields:
+            RenameResult: one result per requested pair, skipped pairs first.
+        """
+        for index, error in sorted(self.skipped.items()):
+            source, target = self.pairs[index]
+            yield RenameResult(source, target, SKIPPED, error)
+
+        failed = set()
+        blocked = set()  # names still held by a file whose move failed
+        for step_index, step in enumerate(self.steps):
+            source, target = self.pairs[step.pair]
+            if step.pair in failed:
+                continue
+            try:
+                # os.rename silently replaces an existing target on Unix
+                if _key(step.target) in blocked:
+                    raise FileExistsError(step.target)
+                os.rename(
+                    os.path.join(self.path, step.source),
+                    os.path.join(self.path, step.target),
+                )
+            except OSError as error:
+                failed.add(step.pair)
+                if step.source != source:
+                    # second half of a cycle, the file is under its temporary name
+                    error = self._restore(step.source, source, blocked, error)
+                blocked.add(_key(step.source))
+                yield RenameResult(source, target, FAILED, error)
+                continue
+            if on_step is not None:
+                on_step(step_index)
+            if step.final:
+                yield RenameResult(source, target, RENAMED)
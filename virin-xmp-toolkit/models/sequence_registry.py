@@ -0,0 +1,132 @@
+"""
+Module Name: sequence_registry
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module hands out VIRIN sequence numbers so two folders (or two windows and command
+line jobs on the same machine) never issue the same VIRIN for a date and shot. Renames with
+an empty sequence also start after the VIRINs already in the folder, so a folder numbered
+on another machine is continued too.
+
+The registry is one SQLite row per date + shot holding the next free sequence number.
+A batch reserves a block of numbers per date in a single BEGIN IMMEDIATE transaction:
+a primary key lookup and an update per date, however large the archive is. The database
+runs in WAL mode with a busy timeout, so concurrent writers wait for each other instead
+of failing, and readers are never blocked. WAL needs shared memory, so the file must be on
+a local disk, never on a network share.
+
+Numbers typed in by hand are recorded too, so automatic numbering continues after them.
+Numbers are never given back, an undone rename leaves a gap.
+"""
+
+import os
+import sqlite3
+import threading
+
+from models.app_data import get_app_data_dir
+
+REGISTRY_FOLDER = "index"
+REGISTRY_DATABASE = "sequences.sqlite"
+BUSY_TIMEOUT_MS = 30_000
+FIRST_SEQUENCE = 1
+
+
+class SequenceRegistry:
+    """
+    Atomic allocator of sequence numbers per date and shot.
+
+    Args:
+        database (str): Optional SQLite path on a local disk, defaults to the app data
+                        folder.
+    """
+
+    def __init__(self, database=None) -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            database
+            or os.path.join(get_app_data_dir(REGISTRY_FOLDER), REGISTRY_DATABASE),
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # transactions are opened explicitly
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sequences (date TEXT, shot INTEGER, "
+            "next INTEGER NOT NULL, PRIMARY KEY (date, shot)) WITHOUT ROWID"
+        )
+
+    def reserve(self, shoot_num, counts, minimums=None) -> dict:
+        """
+        Reserves a block of consecutive sequence numbers for every date of a batch.
+
+        Args:
+            shoot_num (int): The shoot number.
+            counts (dict): 'YYYYMMDD' -> how many numbers the batch needs that day.
+            minimums (dict): Optional date -> lowest number to hand out, e.g. the first
+                             number after the VIRINs already in the folder.
+
+        Returns:
+            dict: 'YYYYMMDD' -> first number of the block reserved for that date.
+        """
+        minimums = minimums or {}
+        firsts = {}
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for date, count in counts.items():
+                    first = max(
+                        self._get_next(date, shoot_num),
+                        minimums.get(date, FIRST_SEQUENCE),
+                    )
+                    self._set_next(date, shoot_num, first + count)
+                    firsts[date] = first
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return firsts
+
+    def record(self, shoot_num, used) -> None:
+        """
+        Marks numbers assigned without the registry (typed in by hand) as used.
+
+        Args:
+            shoot_num (int): The shoot number.
+            used (dict): 'YYYYMMDD' -> highest sequence number used that day.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for date, highest in used.items():
+                    if self._get_next(date, shoot_num) <= highest:
+                        self._set_next(date, shoot_num, highest + 1)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def next_sequence(self, date, shoot_num) -> int:
+        """The number the next reservation for a date and shot starts at"""
+        with self._lock:
+            return self._get_next(date, shoot_num)
+
+    def _get_next(self, date, shoot_num) -> int:
+        row = self._db.execute(
+            "SELECT next FROM sequences WHERE date = ? AND shot = ?", (date, shoot_num)
+        ).fetchone()
+        return row[0] if row else FIRST_SEQUENCE
+
+    def _set_next(self, date, shoot_num, next_sequence) -> None:
+        self._db.execute(
+            "INSERT INTO sequences VALUES (?, ?, ?) "
+            "ON CONFLICT (date, shot) DO UPDATE SET next = excluded.next",
+            (date, shoot_num, next_sequence),
+        )
+
+    def close(self) -> None:
+        """Closes the SQLite file"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,160 @@
+"""
+Module Name: startup_profile
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module times application startup phase by phase: imports, QApplication, setupUi,
+model construction, widget setup and the first paint of the window.
+
+main.py imports it before anything else, so the clock starts before PyQt6, the generated
+UI module and exiftool are loaded. Marks are always recorded (a perf_counter call each),
+the report is only printed with --profile-startup. It goes to stdout as one JSON line and
+to stderr as a table. --quit-after-paint exits once the window is drawn, for benchmarks.
+
+Python's own -X importtime output can be summarized per package with summarize_imports.
+A frozen (PyInstaller) build cannot take -X options, it still reports its phases.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+STARTED = time.perf_counter()  # when main.py imported this module
+PROFILE_STARTUP_FLAG = "--profile-startup"
+QUIT_AFTER_PAINT_FLAG = "--quit-after-paint"
+STARTUP_BUDGET_ENV = "VIRIN_STARTUP_BUDGET"
+STARTUP_BUDGET_SECONDS = 3.0  # process start to first paint, see bench_startup
+DEFERRED_MODULES = ("ollama",)  # must not be loaded before the window is drawn
+
+
+class ImportTiming(NamedTuple):
+    """One line of -X importtime output, times in microseconds"""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def get_startup_budget() -> float:
+    """Seconds from process start to first paint, STARTUP_BUDGET_ENV overrides it"""
+    return float(os.environ.get(STARTUP_BUDGET_ENV) or STARTUP_BUDGET_SECONDS)
+
+
+def parse_importtime(text) -> list:
+    """
+    Parses the stderr of a python -X importtime run.
+
+    Returns:
+        list: ImportTiming per imported module, in import order. Other lines are ignored.
+    """
+    timings = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        timings.append(
+            ImportTiming(fields[2].strip(), int(fields[0]), int(fields[1]))
+        )
+    return timings
+
+
+def summarize_imports(timings, count=15) -> list:
+    """
+    Adds up the import time of every top-level package (PyQt6, exiftool, views ...).
+
+    Args:
+        timings (list): ImportTiming records, see parse_importtime.
+        count (int): Packages returned.
+
+    Returns:
+        list: (package, milliseconds) tuples, slowest first.
+    """
+    packages = {}
+    for timing in timings:
+        package = timing.name.split(".")[0]
+        packages[package] = packages.get(package, 0) + timing.self_us
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return [(package, micros / 1000) for package, micros in slowest[:count]]
+
+
+def format_report(report) -> str:
+    """Startup report as a table"""
+    lines = [f"{'phase':<24}{'ms':>10}{'total ms':>12}"]
+    total = 0.0
+    for phase, milliseconds in report["phases"].items():
+        total += milliseconds
+        lines.append(f"{phase:<24}{milliseconds:>10.1f}{total:>12.1f}")
+    if report["deferred_loaded"]:
+        lines.append(f"loaded before first paint: {', '.join(report['deferred_loaded'])}")
+    return "\n".join(lines)
+
+
+class StartupProfile:
+    """
+    Records the time spent in each startup phase.
+
+    Args:
+        enabled (bool): Print the report when startup finishes.
+        started (float): perf_counter value startup is measured from.
+        clock (callable): Replaced in tests.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, enabled=False, started=None, clock=time.perf_counter) -> None:
+        self.enabled = enabled
+        self.clock = clock
+        self.phases = {}  # phase -> seconds since the previous mark
+        self._last = clock() if started is None else started
+        self.on_finish = None  # called after the report, e.g. to quit for a benchmark
+        self.report = None
+
+    @classmethod
+    def shared(cls) -> "StartupProfile":
+        """Returns the profile of this run, timed from when main.py started importing"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(started=STARTED)
+            return cls._shared
+
+    def mark(self, phase) -> None:
+        """Ends a phase. Does nothing once startup has finished."""
+        if self.report is not None:
+            return
+        now = self.clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self, phase) -> dict:
+        """
+        Ends the last phase, prints the report when enabled and calls on_finish.
+        Only the first call counts.
+
+        Returns:
+            dict: phases (ms), total_ms, frozen and deferred_loaded, None if already finished.
+        """
+        if self.report is not None:
+            return None
+        self.mark(phase)
+        self.report = {
+            "phases": {
+                name: round(seconds * 1000, 1) for name, seconds in self.phases.items()
+            },
+            "total_ms": round(sum(self.phases.values()) * 1000, 1),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "deferred_loaded": [name for name in DEFERRED_MODULES if name in sys.modules],
+        }
+        if self.enabled:
+            print(json.dumps(self.report), flush=True)
+            print(format_report(self.report), file=sys.stderr, flush=True)
+        if self.on_finish:
+            self.on_finish()
+        return self.report
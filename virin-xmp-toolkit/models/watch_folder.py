@@ -0,0 +1,276 @@
+"""
+Module Name: watch_folder
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module watches a drop folder and renames and tags new files automatically.
+
+The folder is polled: a file is only picked up once its size and mtime have stopped
+changing for SETTLE_SECONDS, so cards still being copied are left alone. Settled files are
+collected until nothing new has arrived for DEBOUNCE_SECONDS, then the whole batch is
+renamed with FileRenamer (numbering continues after the VIRINs already in the folder) and
+tagged with MetaTool in one exiftool pass. When several cards keep copying without a
+pause, a batch is forced after MAX_BATCH_WAIT seconds so the queue never stalls.
+
+The rename and metadata settings are a WatchProfile, saved in the app data folder when a
+watch starts. A watch started without settings (an empty shot number in the window, or
+python -m cli watch) runs with the saved profile.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from models.app_data import get_app_data_dir
+from models.dir_snapshot import normalize_extension
+from models.file_rename import (
+    ALL_MEDIA,
+    FileRenamer,
+    get_extensions,
+    is_virin_name,
+)
+from models.meta_edit import MetaTool
+from models.rename_plan import RENAMED
+
+PROFILE_FOLDER = "profiles"
+WATCH_PROFILE = "watch.json"
+POLL_SECONDS = 1.0
+SETTLE_SECONDS = 3.0  # unchanged size/mtime for this long means the copy has finished
+DEBOUNCE_SECONDS = 5.0  # quiet time after the last arrival before a batch runs
+MAX_BATCH_WAIT = 60.0  # a settled file never waits longer than this for a batch
+MAX_BATCH_FILES = 500
+RATE_WINDOW = 60.0  # seconds of finished batches used for the throughput counters
+
+
+class WatchProfile(NamedTuple):
+    """Rename and metadata settings applied to every batch"""
+
+    selected_extension: str = ALL_MEDIA
+    shoot_num: int = 0
+    start_seq: int = 1  # None numbers from the sequence registry
+    date: str = ""  # fixed date, empty uses the file dates
+    capture_date: bool = False
+    keep_pairs: bool = False
+    metadata: dict = None  # MetaTool metadata keys -> values, None writes nothing
+
+
+class WatchStats(NamedTuple):
+    """Throughput counters of a running watch"""
+
+    files: int  # renamed since the watch started
+    failed: int
+    batches: int
+    queue_depth: int  # files seen but not processed yet
+    files_per_minute: float
+    mb_per_second: float
+
+
+def _get_profile_path() -> str:
+    return os.path.join(get_app_data_dir(PROFILE_FOLDER), WATCH_PROFILE)
+
+
+def load_profile():
+    """Returns the saved watch profile, None if there is none"""
+    try:
+        with open(_get_profile_path(), encoding="utf-8") as file:
+            saved = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return WatchProfile(
+        **{key: value for key, value in saved.items() if key in WatchProfile._fields}
+    )
+
+
+def save_profile(profile) -> None:
+    """Saves the watch profile so the next watch (or a restart) uses the same settings"""
+    with open(_get_profile_path(), "w", encoding="utf-8") as file:
+        json.dump(profile._asdict(), file, indent=2)
+
+
+class WatchFolder:
+    """
+    Polls one drop folder and processes settled files in batches.
+
+    Args:
+        path (str): The drop folder.
+        profile (WatchProfile): Settings for every batch.
+        renamer (FileRenamer): Defaults to a new one.
+        meta (MetaTool): Defaults to a new one, only created when the profile writes metadata.
+        clock (callable): Monotonic time source, replaced in tests.
+    """
+
+    def __init__(self, path, profile, renamer=None, meta=None, clock=time.monotonic):
+        self.path = os.path.abspath(path)
+        self.profile = profile
+        self.renamer = renamer or FileRenamer()
+        self.meta = meta
+        self.clock = clock
+        self.extensions = get_extensions(profile.selected_extension)
+        self._pending = {}  # name -> [size, mtime_ns, last change, first seen]
+        self._ignored = set()  # names that failed once, retried only if they change
+        self._last_arrival = None
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._done = deque()  # (finished at, files, bytes) per batch in the rate window
+        self._files = 0
+        self._failed = 0
+        self._batches = 0
+
+    def _scan(self, now) -> None:
+        """Updates the pending files. Hidden files and VIRINs are skipped before any stat."""
+        seen = set()
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or is_virin_name(name):
+                    continue  # hidden copy temp files, and our own results
+                extension = normalize_extension(os.path.splitext(name)[1])
+                if extension not in self.extensions:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue  # vanished between listing and stat
+                seen.add(name)
+                state = (stat.st_size, stat.st_mtime_ns)
+                pending = self._pending.get(name)
+                if pending is None:
+                    self._pending[name] = [*state, now, now]
+                    self._last_arrival = now
+                elif tuple(pending[:2]) != state:
+                    pending[:3] = [*state, now]
+                    self._last_arrival = now
+                    self._ignored.discard(name)
+        for name in set(self._pending) - seen:
+            del self._pending[name]
+            self._ignored.discard(name)
+
+    def _get_batch(self, now) -> list:
+        """Settled files to process now, empty while the debounce window is still open"""
+        settled = [
+            name
+            for name, (_, _, changed, _) in self._pending.items()
+            if now - changed >= SETTLE_SECONDS and name not in self._ignored
+        ]
+        if not settled:
+            return []
+        oldest = min(self._pending[name][3] for name in settled)
+        if (
+            now - self._last_arrival >= DEBOUNCE_SECONDS
+            or now - oldest >= MAX_BATCH_WAIT
+            or len(settled) >= MAX_BATCH_FILES
+        ):
+            settled.sort(key=lambda name: self._pending[name][3])
+            return settled[:MAX_BATCH_FILES]
+        return []
+
+    def poll(self) -> list:
+        """
+        Scans the folder once and processes a batch if one is due.
+
+        Returns:
+            list: RenameResult for every file of the processed batch, empty if none ran.
+        """
+        now = self.clock()
+        self._scan(now)
+        batch = self._get_batch(now)
+        return self._process(batch) if batch else []
+
+    def _process(self, names) -> list:
+        """Renames a batch, then writes the profile metadata to the renamed files at once"""
+        profile = self.profile
+        size = sum(self._pending[name][0] for name in names)
+        # the listing may predate the last growth of these files, sizes must be current
+        self.renamer.index.invalidate([self.path])
+        results = list(
+            self.renamer.iter_rename_results(
+                self.path,
+                self.extensions,
+                profile.date,
+                profile.shoot_num,
+                profile.start_seq,
+                profile.capture_date,
+                keep_pairs=profile.keep_pairs,
+                names=names,
+                continue_sequence=True,
+            )
+        )
+        renamed = [result.target for result in results if result.status == RENAMED]
+        sources = {
+            result.target: os.path.basename(result.source)
+            for result in results
+            if result.status == RENAMED
+        }
+        failed = {
+            os.path.basename(result.source)
+            for result in results
+            if result.status != RENAMED
+        }
+        if profile.metadata and renamed:
+            if self.meta is None:
+                self.meta = MetaTool()
+            plan = self.meta.plan_write(renamed, profile.metadata)
+            written = self.meta.apply_plan(plan)
+            # failures are kept under the name the file arrived with, like rename failures
+            failed.update(
+                sources.get(result.path, os.path.basename(result.path))
+                for result in written
+                if result.error
+            )
+        # a file that failed (e.g. locked) is only retried once it changes instead of on
+        # every scan. A renamed file whose metadata failed is not picked up again (it has a
+        # VIRIN now), it is still counted as failed.
+        for name in names:
+            if name in failed:
+                self._ignored.add(name)
+            else:
+                self._pending.pop(name, None)
+        with self._lock:
+            self._files += len(renamed)
+            self._failed += len(failed)
+            self._batches += 1
+            self._done.append((self.clock(), len(renamed), size))
+        return results
+
+    def stats(self) -> WatchStats:
+        """Current counters, safe to call from another thread"""
+        now = self.clock()
+        with self._lock:
+            while self._done and now - self._done[0][0] > RATE_WINDOW:
+                self._done.popleft()
+            window = max(min(RATE_WINDOW, now - self._started), 1.0)
+            files = sum(entry[1] for entry in self._done)
+            size = sum(entry[2] for entry in self._done)
+            return WatchStats(
+                self._files,
+                self._failed,
+                self._batches,
+                len(self._pending) - len(self._ignored),
+                files * 60 / window,
+                size / (1 << 20) / window,
+            )
+
+    def run(self, stop, interval=POLL_SECONDS, on_poll=None) -> None:
+        """
+        Polls until stop is set.
+
+        Args:
+            stop (threading.Event): Set to end the watch.
+            interval (float): Seconds between scans.
+            on_poll (callable): Called with (results, stats) after every scan.
+        """
+        while not stop.is_set():
+            try:
+                results = self.poll()
+            except OSError:
+                results = []  # drop folder unreachable (NAS reconnecting), keep trying
+            if on_poll:
+                on_poll(results, self.stats())
+            stop.wait(interval)
@@ -0,0 +1,368 @@
+"""
+Module Name: xmp
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module builds, updates and parses XMP packets for the toolkit's metadata fields,
+and reads/writes .xmp sidecar files (IMG_0001.CR3 -> IMG_0001.xmp).
+
+Updating keeps every property the toolkit does not manage (develop settings from
+Lightroom, camera data ...), only our fields are replaced. Parsed values use the same
+'Group:Tag' keys as exiftool so they can be merged with embedded reads. A packet that
+cannot be parsed raises BrokenPacket and is never rewritten, only an empty one is
+started from scratch.
+"""
+
+import os
+import re
+import xml.etree.ElementTree as ET
+
+SIDECAR_EXTENSION = ".xmp"
+XPACKET_ID = "W5M0MpCehiHzreSzNTczkc9d"
+XPACKET_BEGIN = f'<?xpacket begin="\ufeff" id="{XPACKET_ID}"?>\n'
+XPACKET_END = '<?xpacket end="w"?>'
+XPACKET_PATTERN = re.compile(r"<\?xpacket[^>]*\?>")
+
+NAMESPACES = {
+    "x": "adobe:ns:meta/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "photoshop": "http://ns.adobe.com/photoshop/1.0/",
+    "xmp": "http://ns.adobe.com/xap/1.0/",
+    "xmpMM": "http://ns.adobe.com/xap/1.0/mm/",
+    "exif": "http://ns.adobe.com/exif/1.0/",
+    "tiff": "http://ns.adobe.com/tiff/1.0/",
+    "aux": "http://ns.adobe.com/exif/1.0/aux/",
+    "crs": "http://ns.adobe.com/camera-raw-settings/1.0/",
+    "pdf": "http://ns.adobe.com/pdf/1.3/",
+    "xml": "http://www.w3.org/XML/1998/namespace",
+}
+for _prefix, _uri in NAMESPACES.items():
+    if _prefix != "xml":
+        ET.register_namespace(_prefix, _uri)
+
+TEXT = "text"
+ALT = "Alt"
+BAG = "Bag"
+SEQ = "Seq"
+
+# metadata key (as written by MetaTool) -> (namespace prefix, property, kind, exiftool tag name)
+XMP_PROPERTIES = {
+    "creator": ("dc", "creator", SEQ, "Creator"),
+    "writer": ("photoshop", "CaptionWriter", TEXT, "Writer"),
+    "title": ("dc", "title", ALT, "Title"),
+    "description": ("dc", "description", ALT, "Description"),
+    "keywords": ("dc", "subject", BAG, "Keywords"),
+    "headline": ("photoshop", "Headline", TEXT, "Headline"),
+    "city": ("photoshop", "City", TEXT, "City"),
+    "state": ("photoshop", "State", TEXT, "State"),
+    "country": ("photoshop", "Country", TEXT, "Country"),
+    "copyright": ("dc", "rights", ALT, "Copyright"),
+    "rights": ("dc", "rights", ALT, "Rights"),
+}
+
+# other properties exiftool reports under the same tag name, read when ours is missing
+XMP_ALTERNATES = {
+    "Keywords": [("pdf", "Keywords", TEXT)],
+}
+
+
+class BrokenPacket(ValueError):
+    """An XMP packet has content that cannot be parsed, rewriting it would lose that content"""
+
+
+def _qname(prefix, name) -> str:
+    return f"{{{NAMESPACES[prefix]}}}{name}"
+
+
+def get_sidecar_path(path) -> str:
+    """IMG_0001.CR3 -> IMG_0001.xmp"""
+    return os.path.splitext(path)[0] + SIDECAR_EXTENSION
+
+
+def find_sidecars(files) -> dict:
+    """
+    Finds existing sidecars with one listing per directory instead of one stat per file.
+
+    Returns:
+        dict: media path -> sidecar path, only for files that have one.
+    """
+    listings = {}
+    sidecars = {}
+    for file in files:
+        directory = os.path.dirname(file)
+        if directory not in listings:
+            try:
+                listings[directory] = {
+                    name.casefold(): name
+                    for name in os.listdir(directory or ".")
+                    if name.lower().endswith(SIDECAR_EXTENSION)
+                }
+            except OSError:
+                listings[directory] = {}
+        name = os.path.basename(get_sidecar_path(file))
+        if name.casefold() in listings[directory]:
+            sidecars[file] = os.path.join(directory, listings[directory][name.casefold()])
+    return sidecars
+
+
+def _split_values(kind, value) -> list:
+    """Keywords are written comma separated, every other list holds one item"""
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    if kind == BAG:
+        return [item.strip() for item in str(value).split(",") if item.strip()]
+    return [str(value)]
+
+
+def _get_description(root):
+    """Returns the rdf:Description our properties go in, creating the tree as needed"""
+    rdf = root.find(_qname("rdf", "RDF"))
+    if rdf is None:
+        rdf = ET.SubElement(root, _qname("rdf", "RDF"))
+    description = rdf.find(_qname("rdf", "Description"))
+    if description is None:
+        description = ET.SubElement(rdf, _qname("rdf", "Description"))
+        description.set(_qname("rdf", "about"), "")
+    return rdf, description
+
+
+def _remove_property(rdf, prefix, name) -> None:
+    """Removes a property in element or attribute form from every rdf:Description"""
+    for description in rdf.findall(_qname("rdf", "Description")):
+        description.attrib.pop(_qname(prefix, name), None)
+        for element in description.findall(_qname(prefix, name)):
+            description.remove(element)
+
+
+def _set_property(description, prefix, name, kind, value) -> None:
+    values = _split_values(kind, value)
+    element = ET.SubElement(description, _qname(prefix, name))
+    if kind == TEXT:
+        element.text = values[0]
+        return
+    container = ET.SubElement(element, _qname("rdf", kind))
+    for item in values:
+        li = ET.SubElement(container, _qname("rdf", "li"))
+        if kind == ALT:
+            li.set(_qname("xml", "lang"), "x-default")
+        li.text = item
+
+
+def _parse_element(packet, tag):
+    """Parses the first <tag> ... </tag> of a packet, None when there is none"""
+    start = packet.find(f"<{tag}")
+    end = packet.rfind(f"</{tag}>")
+    if start == -1 or end == -1:
+        return None
+    try:
+        return ET.fromstring(packet[start : end + len(f"</{tag}>")])
+    except ET.ParseError as error:  # e.g. an HTML entity like &eacute;
+        raise BrokenPacket(f"{tag}: {error}") from error
+
+
+def _parse_root(packet):
+    """
+    Returns the x:xmpmeta element of a packet, a new one for an empty packet.
+
+    Raises:
+        BrokenPacket: The packet has content but no x:xmpmeta or rdf:RDF that parses.
+    """
+    if isinstance(packet, bytes):
+        packet = packet.decode("utf-8", errors="replace")
+    root = _parse_element(packet, "x:xmpmeta")
+    if root is not None:
+        return root
+    root = ET.Element(_qname("x", "xmpmeta"))
+    rdf = _parse_element(packet, "rdf:RDF")
+    if rdf is not None:
+        root.append(rdf)
+    elif XPACKET_PATTERN.sub("", packet).strip(" \t\r\n\ufeff\x00"):
+        raise BrokenPacket("no x:xmpmeta or rdf:RDF element")
+    return root
+
+
+def update_packet(packet, metadata, padding=0) -> bytes:
+    """
+    Sets our fields in an XMP packet, keeping every other property.
+
+    Args:
+        packet (bytes): Existing packet, or b"" for a new one.
+        metadata (dict): MetaTool metadata keys -> values. An empty value removes the field.
+        padding (int): Whitespace bytes to leave before the trailer for later in-place edits.
+
+    Returns:
+        bytes: The complete UTF-8 packet.
+
+    Raises:
+        BrokenPacket: The existing packet cannot be parsed.
+    """
+    root = _parse_root(packet)
+    rdf, description = _get_description(root)
+    for key, value in metadata.items():
+        if key.lower() not in XMP_PROPERTIES:
+            continue
+        prefix, name, kind, _ = XMP_PROPERTIES[key.lower()]
+        _remove_property(rdf, prefix, name)
+        if _split_values(kind, value) and str(value) != "":
+            _set_property(description, prefix, name, kind, value)
+    ET.indent(root, space=" ")
+    body = ET.tostring(root, encoding="unicode")
+    padding_text = (" " * 99 + "\n") * (padding // 100) if padding else ""
+    return (XPACKET_BEGIN + body + "\n" + padding_text + XPACKET_END).encode("utf-8")
+
+
+def fit_packet(packet, metadata, size):
+    """
+    Updates a packet and pads it to exactly its old size, for an in-place rewrite.
+
+    Args:
+        packet (bytes): Existing packet as stored in the file.
+        metadata (dict): MetaTool metadata keys -> values.
+        size (int): Bytes the packet occupies in the file.
+
+    Returns:
+        bytes: The new packet of exactly size bytes, or None when it no longer fits,
+               the packet is marked read-only, is not UTF-8 or cannot be parsed.
+    """
+    if b'<?xpacket end="r"' in packet or packet[:2] in (b"\xfe\xff", b"\xff\xfe"):
+        return None
+    try:
+        updated = update_packet(packet, metadata)
+    except BrokenPacket:
+        return None  # exiftool rewrites it
+    fill = size - len(updated)
+    if fill < 0:
+        return None
+    trailer = XPACKET_END.encode("utf-8")
+    padding = ((b" " * 99 + b"\n") * (fill // 100 + 1))[:fill]
+    return updated[: -len(trailer)] + padding + trailer
+
+
+def _read_property(description, prefix, name, kind):
+    value = description.get(_qname(prefix, name))
+    if value is not None:
+        return value
+    element = description.find(_qname(prefix, name))
+    if element is None:
+        return None
+    if kind == TEXT or len(element) == 0:
+        return (element.text or "").strip()
+    items = [(li.text or "") for li in element.iter(_qname("rdf", "li"))]
+    if kind == ALT:
+        return items[0] if items else ""
+    return items if len(items) != 1 else items[0]
+
+
+def _find_property(descriptions, candidates):
+    """First value found for any of the (prefix, name, kind) candidates, in order"""
+    for prefix, name, kind in candidates:
+        for description in descriptions:
+            value = _read_property(description, prefix, name, kind)
+            if value is not None:
+                return value
+    return None
+
+
+def parse_packet(packet) -> dict:
+    """
+    Reads our fields from an XMP packet.
+
+    Returns:
+        dict: 'XMP:Title' style keys -> value (lists for multi-item bags), like exiftool.
+
+    Raises:
+        BrokenPacket: The packet cannot be parsed.
+    """
+    root = _parse_root(packet)
+    tags = {}
+    descriptions = list(root.iter(_qname("rdf", "Description")))
+    for prefix, name, kind, tag in XMP_PROPERTIES.values():
+        value = _find_property(
+            descriptions, [(prefix, name, kind)] + XMP_ALTERNATES.get(tag, [])
+        )
+        if value is not None:
+            tags[f"XMP:{tag}"] = value
+    return tags
+
+
+def read_sidecar(path) -> dict:
+    """Parsed fields of a sidecar file, empty if it cannot be read or parsed"""
+    try:
+        with open(path, "rb") as file:
+            return parse_packet(file.read())
+    except (OSError, BrokenPacket):
+        return {}
+
+
+def write_sidecar(path, metadata) -> None:
+    """
+    Creates or updates the sidecar of a media file. The new sidecar replaces the old one
+    in a single rename, so readers never see half a file.
+
+    Args:
+        path (str): Media file the sidecar belongs to.
+        metadata (dict): MetaTool metadata keys -> values.
+
+    Raises:
+        BrokenPacket: The existing sidecar cannot be parsed, it is left as it is.
+    """
+    sidecar = find_sidecars([path]).get(path, get_sidecar_path(path))
+    try:
+        with open(sidecar, "rb") as file:
+            existing = file.read()
+    except FileNotFoundError:
+        existing = b""
+    _replace_file(sidecar, update_packet(existing, metadata))
+
+
+def _replace_file(path, data) -> None:
+    """Replaces a file in a single rename, so readers never see half a file"""
+    temp = path + ".virin-tmp"
+    with open(temp, "wb") as file:
+        file.write(data)
+    os.replace(temp, path)
+
+
+def _is_empty(root) -> bool:
+    """True when a packet holds nothing but empty rdf:Description elements"""
+    for rdf in root:
+        if rdf.tag != _qname("rdf", "RDF"):
+            return False
+        for description in rdf:
+            if description.tag != _qname("rdf", "Description") or len(description):
+                return False
+            if set(description.attrib) - {_qname("rdf", "about")}:
+                return False
+    return True
+
+
+def strip_sidecar(sidecar) -> bool:
+    """
+    Removes the toolkit's fields from a sidecar once they are embedded in the media.
+    Everything else (develop settings, ratings ...) stays, the file is only deleted when
+    nothing is left.
+
+    Args:
+        sidecar (str): The .xmp file.
+
+    Returns:
+        bool: True when the sidecar was deleted, False when it was rewritten.
+
+    Raises:
+        BrokenPacket: The sidecar cannot be parsed, it is left as it is.
+    """
+    with open(sidecar, "rb") as file:
+        root = _parse_root(file.read())
+    rdf, _ = _get_description(root)
+    for prefix, name, _, _ in XMP_PROPERTIES.values():
+        _remove_property(rdf, prefix, name)
+    if _is_empty(root):
+        os.remove(sidecar)
+        return True
+    ET.indent(root, space=" ")
+    body = ET.tostring(root, encoding="unicode")
+    _replace_file(sidecar, (XPACKET_BEGIN + body + "\n" + XPACKET_END).encode("utf-8"))
+    return False
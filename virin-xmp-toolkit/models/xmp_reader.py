@@ -0,0 +1,190 @@
+"""
+Module Name: xmp_reader
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module reads the toolkit's metadata fields without starting exiftool.
+
+The file is memory-mapped and only its structure is walked: JPEG segments up to the
+image data, MP4/MOV box headers down to the XMP box. Only the few KB of the XMP packet
+(and the EXIF copyright of a JPEG) are ever paged in, so a folder load is bound by
+directory I/O rather than by a Perl process.
+
+Files the reader cannot fully answer for (IPTC blocks, QuickTime text tags, other formats)
+return None so the caller falls back to exiftool.
+"""
+
+import mmap
+import struct
+
+from models.xmp import XMP_PROPERTIES, parse_packet
+
+JPEG_XMP_HEADER = b"http://ns.adobe.com/xap/1.0/\x00"
+JPEG_EXTENDED_XMP_HEADER = b"http://ns.adobe.com/xmp/extension/\x00"
+JPEG_EXIF_HEADER = b"Exif\x00\x00"
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+JPEG_APP1 = 0xE1
+JPEG_APP13 = 0xED  # Photoshop IRB, holds IPTC
+EXIF_COPYRIGHT = 0x8298
+EXIF_ASCII = 2
+
+XMP_UUID = bytes.fromhex("BE7ACFCB97A942E89C71999491E3AFAC")
+MP4_CONTAINERS = {b"moov", b"udta"}
+# QuickTime text tags exiftool would also report (©nam, ItemList in meta ...)
+MP4_TEXT_BOXES = {b"meta", b"ilst", b"keys"}
+
+NATIVE_TAGS = set(XMP_PROPERTIES)  # lower case tag names the reader can answer
+
+
+class Unsupported(Exception):
+    """The file holds metadata only exiftool can read"""
+
+
+def _read_exif_copyright(data, start, end):
+    """Reads IFD0 Copyright from an EXIF APP1 payload, None if there is none"""
+    tiff = start + len(JPEG_EXIF_HEADER)
+    order = data[tiff : tiff + 2]
+    if order not in (b"II", b"MM"):
+        return None
+    endian = "<" if order == b"II" else ">"
+    (ifd,) = struct.unpack_from(endian + "I", data, tiff + 4)
+    entries_at = tiff + ifd
+    if entries_at + 2 > end:
+        return None
+    (count,) = struct.unpack_from(endian + "H", data, entries_at)
+    for index in range(count):
+        entry = entries_at + 2 + index * 12
+        if entry + 12 > end:
+            return None
+        tag, kind, length = struct.unpack_from(endian + "HHI", data, entry)
+        if tag != EXIF_COPYRIGHT or kind != EXIF_ASCII:
+            continue
+        if length <= 4:
+            value = data[entry + 8 : entry + 8 + length]
+        else:
+            (offset,) = struct.unpack_from(endian + "I", data, entry + 8)
+            value = data[tiff + offset : tiff + offset + length]
+        return value.split(b"\x00")[0].decode("utf-8", errors="replace").strip()
+    return None
+
+
+def _scan_jpeg(data) -> tuple:
+    """
+    Walks JPEG segments up to the start of scan.
+
+    Returns:
+        tuple: ((start, end) of the XMP packet or None, tags read from EXIF)
+    """
+    tags = {}
+    packet = None
+    position = 2
+    size = len(data)
+    while position + 4 <= size:
+        if data[position] != 0xFF:
+            raise Unsupported("broken segment")
+        marker = data[position + 1]
+        if marker == 0xFF:  # fill byte
+            position += 1
+            continue
+        if marker in (JPEG_SOS, JPEG_EOI):
+            break
+        (length,) = struct.unpack_from(">H", data, position + 2)
+        start = position + 4
+        end = position + 2 + length
+        if marker == JPEG_APP13:
+            raise Unsupported("IPTC")
+        if marker == JPEG_APP1:
+            if data[start : start + len(JPEG_XMP_HEADER)] == JPEG_XMP_HEADER:
+                packet = (start + len(JPEG_XMP_HEADER), end)
+            elif data[start : start + len(JPEG_EXTENDED_XMP_HEADER)] == (
+                JPEG_EXTENDED_XMP_HEADER
+            ):
+                raise Unsupported("extended XMP")
+            elif data[start : start + len(JPEG_EXIF_HEADER)] == JPEG_EXIF_HEADER:
+                copyright_text = _read_exif_copyright(data, start, end)
+                if copyright_text:
+                    tags["EXIF:Copyright"] = copyright_text
+        position = end
+    return packet, tags
+
+
+def _iter_boxes(data, start, end):
+    """Yields (type, payload start, box end) for the boxes between start and end"""
+    position = start
+    while position + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, position)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, position + 8)
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header or position + size > end:
+            raise Unsupported("broken box")
+        yield kind, position + header, position + size
+        position += size
+
+
+def _find_mp4_packet(data, start, end):
+    """
+    Returns (start, end) of the first XMP packet inside the boxes between start and end.
+    Every box is walked, QuickTime text tags after the packet still need exiftool.
+    """
+    packet = None
+    for kind, payload, box_end in _iter_boxes(data, start, end):
+        if kind in MP4_TEXT_BOXES or kind[:1] == b"\xa9":
+            raise Unsupported("QuickTime tags")
+        if kind == b"uuid" and data[payload : payload + 16] == XMP_UUID:
+            packet = packet or (payload + 16, box_end)
+        elif kind == b"XMP_":
+            packet = packet or (payload, box_end)
+        elif kind in MP4_CONTAINERS:
+            packet = _find_mp4_packet(data, payload, box_end) or packet
+    return packet
+
+
+def scan_packet(data):
+    """
+    Locates the XMP packet of a memory-mapped JPEG or MP4/MOV file.
+    MP4 box headers are walked, so mdat is skipped by its size without being read.
+
+    Returns:
+        tuple: ((start, end) of the packet or None when there is none, tags read from
+               outside the packet), or None for a file the reader does not handle.
+
+    Raises:
+        Unsupported: The file holds metadata only exiftool can read.
+    """
+    if data[:2] == b"\xff\xd8":
+        return _scan_jpeg(data)
+    if data[4:8] in (b"ftyp", b"moov", b"wide", b"free", b"mdat"):
+        return _find_mp4_packet(data, 0, len(data)), {}
+    return None
+
+
+def read_native_tags(path):
+    """
+    Reads the toolkit's fields straight from a JPEG or MP4/MOV file.
+
+    Args:
+        path (str): Media file.
+
+    Returns:
+        dict: exiftool-style result ('SourceFile', 'XMP:Title' ...), or None when
+              exiftool has to read the file.
+    """
+    try:
+        with open(path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                scan = scan_packet(data)
+                if scan is None:
+                    return None
+                packet, tags = scan
+                if packet is not None:
+                    tags.update(parse_packet(bytes(data[packet[0] : packet[1]])))
+    except (OSError, ValueError, struct.error, Unsupported):
+        return None
+    return {"SourceFile": path, **tags}
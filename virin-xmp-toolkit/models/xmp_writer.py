@@ -0,0 +1,69 @@
+"""
+Module Name: xmp_writer
+Author: Josh Voyles
+Created: 18 Oct 26
+
+Description:
+
+This module updates the XMP packet of a JPEG or MP4/MOV file in place.
+
+Writers leave whitespace padding inside the packet for exactly this: when the edited
+packet still fits, only those few KB are overwritten and fsynced, the rest of the file
+(an 8 GB clip) is never copied and no free space is needed. When it does not fit, or the
+fields also live outside XMP, the caller falls back to exiftool.
+"""
+
+import mmap
+import os
+import struct
+
+from models.xmp import fit_packet
+from models.xmp_reader import Unsupported, scan_packet
+
+# fields exiftool reads and writes under the same name in XMP only. Anything else
+# (Copyright -> EXIF, Keywords, Headline and City -> IPTC, Writer ...) is left to
+# exiftool, so the other locations never disagree with the packet.
+IN_PLACE_TAGS = {
+    "creator",
+    "title",
+    "description",
+    "state",
+    "country",
+    "rights",
+}
+
+
+def write_in_place(path, metadata) -> bool:
+    """
+    Writes metadata into the existing XMP packet of a file, keeping its size and mtime.
+
+    Args:
+        path (str): Media file.
+        metadata (dict): MetaTool metadata keys -> values.
+
+    Returns:
+        bool: True when the file was updated, False when exiftool has to write it.
+    """
+    if not {key.lower() for key in metadata} <= IN_PLACE_TAGS:
+        return False
+    try:
+        stat = os.stat(path)
+        with open(path, "r+b") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                scan = scan_packet(data)
+                if scan is None or scan[0] is None:
+                    return False
+                start, end = scan[0]
+                packet = bytes(data[start:end])
+            updated = fit_packet(packet, metadata, end - start)
+            if updated is None:
+                return False
+            file.seek(start)
+            file.write(updated)
+            file.flush()
+            os.fsync(file.fileno())
+        # like exiftool -P, the file keeps its modification time
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    except (OSError, ValueError, struct.error, Unsupported):
+        return False
+    return True
@@ -0,0 +1,38 @@
+import os
+import pytest
+from models.app_data import APP_DATA_ENV
+from models.file_rename import FileRenamer
+
+JULY_12_2022 = 1657650000
+
+
+@pytest.fixture(autouse=True)
+def app_data(tmp_path, monkeypatch):
+    """Keeps journals, caches and registries out of the real ~/.virin-xmp-toolkit"""
+    path = tmp_path / "app"
+    monkeypatch.setenv(APP_DATA_ENV, str(path))
+    return path
+
+
+@pytest.fixture
+def undo_history(monkeypatch):
+    """Starts with no renames to undo, as a fresh process would"""
+    history = []
+    monkeypatch.setattr(FileRenamer, "write_actions", history)
+    return history
+
+
+@pytest.fixture
+def make_media(tmp_path):
+    """Writes files named after themselves, one second apart on 12 July 2022"""
+
+    def make(folder, names, offset=0):
+        directory = tmp_path / folder
+        directory.mkdir(parents=True, exist_ok=True)
+        for timestamp, name in enumerate(names, JULY_12_2022 + offset):
+            path = directory / name
+            path.write_text(name)
+            os.utime(path, (timestamp, timestamp))
+        return directory
+
+    return make
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import types
+import pytest
+from models.ai_backend import AI_NOT_STARTED, AI_READY, AI_UNAVAILABLE, VIRINAI
+
+TOOLKIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fake_ollama(monkeypatch, generate=None, chat=None):
+    ollama = types.ModuleType("ollama")
+    ollama.generate = generate or (lambda **kwargs: {})
+    ollama.chat = chat or (lambda **kwargs: iter([]))
+    monkeypatch.setitem(sys.modules, "ollama", ollama)
+
+
+def _refuse(**kwargs):
+    raise ConnectionError("Failed to connect to Ollama")
+
+
+def test_importing_the_backend_does_not_import_ollama():
+    script = "import sys, models.ai_backend; print('ollama' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=TOOLKIT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert output.stdout.strip() == "False"
+
+
+def test_warm_up_reports_readiness(tmp_path, monkeypatch):
+    ai = VIRINAI(str(tmp_path))
+    assert ai.state == AI_NOT_STARTED
+    _fake_ollama(monkeypatch, generate=_refuse)
+    assert ai.warm_up() == AI_UNAVAILABLE
+    assert "Failed to connect" in ai.error
+    _fake_ollama(monkeypatch)
+    assert ai.warm_up() == AI_READY and ai.error is None
+
+
+def test_caption_works_without_warm_up(tmp_path, monkeypatch):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "pre_prompt.txt").write_text("Write a caption.")
+    chunks = [{"message": {"content": "Airmen "}}, {"message": {"content": "play."}}]
+    prompts = []
+    _fake_ollama(
+        monkeypatch,
+        chat=lambda **kwargs: prompts.append(kwargs["messages"]) or iter(chunks),
+    )
+    ai = VIRINAI(str(tmp_path))
+    text = "".join(chunk["message"]["content"] for chunk in ai.get_caption("band"))
+    assert text == "Airmen play." and ai.state == AI_READY
+    assert prompts[0][0]["content"].endswith("\nband")
+    _fake_ollama(monkeypatch, chat=_refuse)
+    with pytest.raises(ConnectionError):
+        list(ai.get_caption("band"))
+    assert ai.state == AI_UNAVAILABLE
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+import pytest
+from models import capture_date
+from models.capture_date import CaptureDateReader, parse_exif_date, _pick_capture_date
+from models.dir_snapshot import DirectorySnapshot
+
+JULY_12_2022 = 1657627200.0  # 2022-07-12 12:00:00 as written
+
+
+def test_parse_exif_date():
+    assert parse_exif_date("2022:07:12 12:00:00") == JULY_12_2022
+    assert parse_exif_date("2022:07:12 12:00:00.25-04:00") == JULY_12_2022
+    assert parse_exif_date("0000:00:00 00:00:00") is None
+    assert parse_exif_date("") is None
+
+
+def test_pick_capture_date_priority():
+    tags = {
+        "SourceFile": "MVI_0001.MP4",
+        "QuickTime:CreateDate": "2022:07:13 02:00:00",
+        "XMP:CreateDate": "2022:07:12 12:00:00",
+    }
+    assert _pick_capture_date(tags) == JULY_12_2022
+    tags["EXIF:DateTimeOriginal"] = "2022:07:11 12:00:00"
+    assert _pick_capture_date(tags) == JULY_12_2022 - 86400
+    assert _pick_capture_date({"QuickTime:CreateDate": "0000:00:00 00:00:00"}) is None
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_quicktime_dates_are_utc(new_york):
+    # 10 pm on July 12 in New York, written by the camera as 2 am UTC on July 13
+    video = {"QuickTime:CreateDate": "2022:07:13 02:00:00"}
+    assert _pick_capture_date(video) == JULY_12_2022 + 10 * 3600
+    photo = {"EXIF:DateTimeOriginal": "2022:07:12 22:00:00"}
+    assert _pick_capture_date(photo) == _pick_capture_date(video)
+    # exiftool -api QuickTimeUTC style values already carry their zone
+    assert _pick_capture_date(
+        {"QuickTime:CreateDate": "2022:07:12 22:00:00-04:00"}
+    ) == JULY_12_2022 + 10 * 3600
+
+
+class FakeService:
+    def get_tags(self, files, tags, params=None, check_execute=True):
+        return [
+            {"SourceFile": file, "EXIF:DateTimeOriginal": "2022:07:12 12:00:00"}
+            for file in files
+        ]
+
+
+def test_date_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(CaptureDateReader, "cache", OrderedDict())
+    monkeypatch.setattr(capture_date, "MAX_CACHED_DATES", 2)
+    for name in ["a.jpg", "b.jpg", "c.jpg"]:
+        (tmp_path / name).write_bytes(b"jpeg")
+    reader = CaptureDateReader(FakeService())
+    snapshot = DirectorySnapshot(str(tmp_path), ["jpg"])
+    assert set(reader.read(snapshot).values()) == {JULY_12_2022}
+    assert len(CaptureDateReader.cache) == 2
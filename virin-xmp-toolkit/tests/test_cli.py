@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+import cli
+from exiftool.exceptions import ExifToolException
+from models import meta_edit
+from models.meta_edit import WriteResult
+from models.xmp import write_sidecar
+
+TOOLKIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _make_card(path, names):
+    path.mkdir()
+    for name in names:
+        (path / name).write_bytes(name.encode())
+    return str(path)
+
+
+def _run(capsys, *argv):
+    code = cli.main(list(argv))
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_rename_and_undo_print_json(tmp_path, capsys, undo_history):
+    card = _make_card(tmp_path / "card", ["a.jpg", "b.mp4"])
+    code, output = _run(capsys, "rename", card, "--shot", "0", "--date", "20240101")
+    assert code == cli.EXIT_OK
+    assert output["renamed"] == 2 and output["failed"] == 0
+    assert sorted(os.listdir(card)) == [
+        "20240101-F-F3965-0001.jpg",
+        "20240101-F-F3965-0002.mp4",
+    ]
+    code, output = _run(capsys, "undo", card)
+    assert code == cli.EXIT_OK and output["undone"]
+    assert sorted(os.listdir(card)) == ["a.jpg", "b.mp4"]
+    code, output = _run(capsys, "undo", card)
+    assert not output["undone"] and not output["results"]
+
+
+def test_missing_folder_is_an_error(tmp_path, capsys):
+    code, output = _run(capsys, "rename", str(tmp_path / "gone"), "--shot", "0")
+    assert code == cli.EXIT_FAILED and "error" in output
+
+
+def test_rename_never_imports_the_gui_or_ai(tmp_path):
+    card = _make_card(tmp_path / "card", ["a.jpg"])
+    script = (
+        "import sys, cli\n"
+        f"cli.main(['rename', {card!r}, '--shot', '0', '--ext', 'jpg'])\n"
+        "heavy = {'PyQt6', 'ollama', 'exiftool'}\n"
+        "print(sorted({name.split('.')[0] for name in sys.modules} & heavy))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=TOOLKIT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    assert json.loads(output[0])["renamed"] == 1
+    assert output[1] == "[]"
+
+
+def test_watch_needs_a_saved_profile(tmp_path, capsys):
+    code, output = _run(capsys, "watch", str(tmp_path))
+    assert code == cli.EXIT_FAILED and "profile" in output["error"]
+
+
+class FakeService:
+    def get_tags(self, files, tags, check_execute=True):
+        return [{"SourceFile": file, "XMP:Title": "Old"} for file in files]
+
+
+class FailingPool:
+    def __init__(self, workers=None):
+        pass
+
+    def set_tags(self, files, tags, params=None):
+        return [WriteResult(file, "Error: locked") for file in files]
+
+
+def test_embed_sidecars_reports_counts_and_failures(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    monkeypatch.setattr(meta_edit, "ExifToolPool", FailingPool)
+    card = _make_card(tmp_path / "card", ["C0001.mp4"])
+    write_sidecar(os.path.join(card, "C0001.mp4"), {"title": "Concert"})
+    code, output = _run(capsys, "meta", "embed-sidecars", card, "--ext", "mp4")
+    assert code == cli.EXIT_FAILED
+    assert (output["sidecars"], output["embedded"], output["removed"]) == (1, 0, 0)
+    assert output["failed"] == [
+        {"path": os.path.join(card, "C0001.mp4"), "error": "Error: locked"}
+    ]
+    assert os.path.exists(os.path.join(card, "C0001.xmp"))
+
+
+def test_exiftool_errors_are_json(tmp_path, monkeypatch, capsys):
+    def fail(*args):
+        raise ExifToolException("exiftool is not installed")
+
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    monkeypatch.setattr(meta_edit.MetaTool, "retrieve_consensus", fail)
+    code, output = _run(capsys, "meta", "read", str(tmp_path), "--ext", "mp4")
+    assert code == cli.EXIT_FAILED
+    assert output == {"error": "exiftool is not installed"}
@@ -0,0 +1,200 @@
+import os
+import models.content_index as content_index
+from models.content_index import ContentEntry, ContentIndex
+from models.file_rename import DUPLICATES_SKIP, FileRenamer
+from models.ingest import Ingest
+from models.rename_plan import RENAMED, SKIPPED
+
+
+def _make_card(path, files):
+    path.mkdir()
+    for name, data in files.items():
+        (path / name).write_bytes(data)
+    return str(path)
+
+
+def _renamer(tmp_path):
+    index = ContentIndex(str(tmp_path / "content.sqlite"))
+    return FileRenamer(content_index=index), index
+
+
+def test_prefilter_only_hashes_collisions(tmp_path, monkeypatch):
+    index = ContentIndex(str(tmp_path / "content.sqlite"))
+    big = os.urandom(300_000)
+    same_ends = big[:150_000] + b"x" + big[150_001:]  # differs only in the middle
+    folder = _make_card(
+        tmp_path / "card", {"a.jpg": big, "b.jpg": same_ends, "c.jpg": b"other"}
+    )
+    paths = [os.path.join(folder, name) for name in ("a.jpg", "b.jpg", "c.jpg")]
+    hashes = index.quick_hashes(paths)
+    full = content_index.full_hash(paths[0])
+    index.add([ContentEntry(paths[0], "VIRIN-A", *hashes[paths[0]], full)])
+    hashed = []
+    real_full_hash = content_index.full_hash
+    monkeypatch.setattr(
+        content_index, "full_hash", lambda path: hashed.append(path) or real_full_hash(path)
+    )
+    # b collides on size + ends, only the full hash tells it apart, c is never read again
+    # and the indexed file is never read at all
+    assert index.find_duplicates({p: hashes[p] for p in paths[1:]}) == {}
+    assert hashed == [paths[1]]
+    # an indexed file never matches itself
+    assert index.find_duplicates({paths[0]: hashes[paths[0]]}) == {}
+
+
+def test_reoffloaded_card_is_flagged(tmp_path):
+    renamer, index = _renamer(tmp_path)
+    files = {"a.jpg": b"first", "b.jpg": b"second"}
+    first = _make_card(tmp_path / "first", files)
+    assert "Renamed 2 of 2" in renamer.rename_all_files(first, "jpg", "20240101", 0, 1)
+    assert len(index) == 2
+    second = _make_card(tmp_path / "second", {**files, "c.jpg": b"new"})
+    results = list(renamer.iter_rename_results(second, "jpg", "20240101", 1, 1))
+    assert all(result.status == RENAMED for result in results)
+    flagged = [result for result in results if result.error]
+    assert len(flagged) == 2
+    assert {result.error.virin for result in flagged} == {
+        os.path.splitext(name)[0] for name in os.listdir(first)
+    }
+    assert len(index) == 5
+
+
+def test_skip_leaves_duplicates_alone(tmp_path):
+    renamer, index = _renamer(tmp_path)
+    first = _make_card(tmp_path / "first", {"a.jpg": b"first"})
+    renamer.rename_all_files(first, "jpg", "20240101", 0, 1)
+    second = _make_card(tmp_path / "second", {"a.jpg": b"first", "b.jpg": b"new"})
+    message = renamer.rename_all_files(
+        second, "jpg", "20240101", 1, 1, duplicates=DUPLICATES_SKIP
+    )
+    assert "Renamed 1 of 2 files. Skipped: 1. Failed: 0. Duplicates: 1." in message
+    assert "Duplicate, already ingested as" in message
+    assert (tmp_path / "second" / "a.jpg").exists()
+    results = list(
+        renamer.iter_rename_results(
+            second, "jpg", "20240101", 1, 5, duplicates=DUPLICATES_SKIP
+        )
+    )
+    # the file renamed a moment ago is in the index under its new name, not a duplicate
+    assert [result.status for result in results].count(SKIPPED) == 1
+
+
+def test_ingested_files_are_recorded(tmp_path):
+    renamer, index = _renamer(tmp_path)
+    card = _make_card(tmp_path / "card", {"a.jpg": b"first", "b.jpg": b"second"})
+    summary = Ingest(renamer).ingest([card], str(tmp_path / "out"), "20240101", 0, 1)
+    assert len(index) == 2
+    message = renamer.rename_all_files(
+        card, "jpg", "20240101", 0, 1, duplicates=DUPLICATES_SKIP
+    )
+    assert "Skipped: 2" in message and "Duplicates: 2" in message
+    virins = {os.path.splitext(os.path.basename(r.target))[0] for r in summary.results}
+    assert all(virin in message for virin in virins)
+
+
+def test_stored_hashes_outlive_metadata_writes(tmp_path):
+    renamer, index = _renamer(tmp_path)
+    first = _make_card(tmp_path / "first", {"a.jpg": b"first", "b.jpg": b"second"})
+    renamer.rename_all_files(first, "jpg", "20240101", 0, 1)
+    # exiftool rewrites both renamed files
+    names = sorted(os.listdir(first))
+    for name in names:
+        (tmp_path / "first" / name).write_bytes(b"tagged " + name.encode())
+    second = _make_card(tmp_path / "second", {"a.jpg": b"first", "b.jpg": b"second"})
+    results = list(renamer.iter_rename_results(second, "jpg", "20240101", 1, 1))
+    assert sorted(result.error.virin for result in results) == [
+        os.path.splitext(name)[0] for name in names
+    ]
+
+
+def test_missing_indexed_file_is_not_a_duplicate(tmp_path):
+    renamer, index = _renamer(tmp_path)
+    first = _make_card(tmp_path / "first", {"a.jpg": b"first", "b.jpg": b"second"})
+    renamer.rename_all_files(first, "jpg", "20240101", 0, 1)
+    os.remove(os.path.join(first, sorted(os.listdir(first))[0]))
+    second = _make_card(tmp_path / "second", {"a.jpg": b"first", "b.jpg": b"second"})
+    results = list(renamer.iter_rename_results(second, "jpg", "20240101", 1, 1))
+    flagged = [result.error.path for result in results if result.error]
+    assert flagged == [os.path.join(first, os.listdir(first)[0])]
+
+
+def test_renaming_a_folder_again_moves_its_rows(tmp_path, undo_history):
+    renamer, index = _renamer(tmp_path)
+    card = _make_card(tmp_path / "card", {"a.jpg": b"first", "b.jpg": b"second"})
+    renamer.rename_all_files(card, "jpg", "20240101", 0, 1)
+    first_names = sorted(os.listdir(card))
+    for shot in (1, 2):
+        message = renamer.rename_all_files(
+            card, "jpg", "20240101", shot, 1, duplicates=DUPLICATES_SKIP
+        )
+        assert "Renamed 2 of 2 files. Skipped: 0" in message
+    rows = index._db.execute("SELECT path, virin FROM content ORDER BY path").fetchall()
+    assert rows == [
+        (os.path.join(card, name), os.path.splitext(name)[0])
+        for name in sorted(os.listdir(card))
+    ]
+    # undo puts the rows back under the VIRINs the files get back
+    renamer.undo_last()
+    renamer.undo_last()
+    assert sorted(row[0] for row in index._db.execute("SELECT path FROM content")) == [
+        os.path.join(card, name) for name in first_names
+    ]
+    renamer.undo_last()
+    assert len(index) == 0
+
+
+def test_undo_forgets_the_renamed_files(tmp_path, undo_history):
+    renamer, index = _renamer(tmp_path)
+    card = _make_card(tmp_path / "card", {"a.jpg": b"first", "b.jpg": b"second"})
+    renamer.rename_all_files(card, "jpg", "20240101", 0, 1)
+    assert len(index) == 2
+    results, conflicts = renamer.undo_last()
+    assert len(results) == 2 and not conflicts
+    assert len(index) == 0
+    results = list(renamer.iter_rename_results(card, "jpg", "20240101", 0, 1))
+    assert not any(result.error for result in results)
+
+
+def test_renamed_files_are_read_in_full_only_on_a_collision(tmp_path, monkeypatch):
+    renamer, index = _renamer(tmp_path)
+    hashed = []
+    real_full_hash = content_index.full_hash
+    monkeypatch.setattr(
+        content_index,
+        "full_hash",
+        lambda path: hashed.append(os.path.basename(path)) or real_full_hash(path),
+    )
+    first = _make_card(tmp_path / "first", {"a.jpg": b"first", "b.jpg": b"second"})
+    renamer.rename_all_files(first, "jpg", "20240101", 0, 1)
+    assert hashed == []
+    second = _make_card(tmp_path / "second", {"a.jpg": b"first", "c.jpg": b"new"})
+    results = list(renamer.iter_rename_results(second, "jpg", "20240101", 1, 1))
+    assert sum(result.error is not None for result in results) == 1
+    # the new a.jpg and the file it collided with, whose hash is kept
+    indexed = [name for name in os.listdir(first) if name in hashed]
+    assert sorted(hashed) == sorted(indexed + ["a.jpg"]) and len(indexed) == 1
+    stored = index._db.execute("SELECT COUNT(*) FROM content WHERE full IS NOT NULL")
+    assert stored.fetchone()[0] == 1
+
+
+class TaggingMeta:
+    def plan_write(self, files, metadata):
+        return dict.fromkeys(files, metadata)
+
+    def apply_plan(self, plan, sidecar=False):
+        for file in plan:
+            with open(file, "ab") as media:
+                media.write(b"<xmp/>")
+        return []
+
+
+def test_ingest_records_the_untagged_copies(tmp_path):
+    renamer, index = _renamer(tmp_path)
+    card = _make_card(tmp_path / "card", {"a.jpg": b"first", "b.jpg": b"second"})
+    Ingest(renamer, TaggingMeta()).ingest(
+        [card], str(tmp_path / "out"), "20240101", 0, 1, metadata={"title": "Concert"}
+    )
+    message = renamer.rename_all_files(
+        card, "jpg", "20240101", 0, 1, duplicates=DUPLICATES_SKIP
+    )
+    assert "Duplicates: 2" in message
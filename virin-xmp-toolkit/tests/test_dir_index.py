@@ -0,0 +1,56 @@
+import os
+from models.dir_index import DirectoryIndex
+from models.file_rename import FileRenamer
+from models.meta_edit import MetaTool
+
+OLD = 1_600_000_000  # directory mtime outside the racy window
+
+
+def _make_folder(path, names):
+    path.mkdir()
+    for name in names:
+        (path / name).write_bytes(b"x")
+    os.utime(path, (OLD, OLD))
+    return str(path)
+
+
+def test_listing_is_reused_until_the_folder_changes(tmp_path):
+    folder = _make_folder(tmp_path / "card", ["a.MP4", "b.mp4", "c.jpg", "d.xmp"])
+    index = DirectoryIndex()
+    assert index.counts(folder) == {"mp4": 2, "jpg": 1, "xmp": 1}
+    assert [r.name for r in index.snapshot(folder, ["jpg"]).records] == ["c.jpg"]
+    assert index.scans == 1
+    (tmp_path / "card" / "e.jpg").write_bytes(b"x")
+    os.utime(folder, (OLD + 10, OLD + 10))
+    assert index.counts(folder)["jpg"] == 2
+    assert index.scans == 2
+    index.invalidate([folder])
+    index.snapshot(folder)
+    assert index.scans == 3
+
+
+def test_recently_changed_folder_is_not_trusted(tmp_path):
+    folder = tmp_path / "card"
+    folder.mkdir()
+    index = DirectoryIndex()
+    index.snapshot(str(folder))
+    index.snapshot(str(folder))
+    assert index.scans == 2
+
+
+def test_models_share_the_index(tmp_path):
+    folder = _make_folder(tmp_path / "card", ["a.mp4", "b.mp4", "c.jpg"])
+    index = DirectoryIndex()
+    meta = MetaTool(index=index)
+    assert sorted(os.path.basename(f) for f in meta._load_files(folder, "mp4")) == [
+        "a.mp4",
+        "b.mp4",
+    ]
+    assert meta._load_files("", "mp4") == []
+    renamer = FileRenamer(index)
+    results = list(renamer.iter_rename_results(folder, "mp4", "20240101", 0, 1))
+    assert len(results) == 2 and index.scans == 1
+    # the rename drops the listing, the next query sees the new names
+    assert index.counts(folder)["mp4"] == 2
+    assert index.scans == 2
+    assert not (tmp_path / "card" / "a.mp4").exists()
@@ -0,0 +1,50 @@
+import os
+import pytest
+from models.dir_snapshot import DirectorySnapshot, count_entries
+from models.file_rename import FileRenamer
+
+
+def _make_file(directory, name, timestamp):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(b"0")
+    os.utime(path, (timestamp, timestamp))
+    return path
+
+
+@pytest.fixture
+def media_dir(tmp_path):
+    directory = tmp_path / "media"
+    directory.mkdir()
+    # 2022-07-12 and 2022-07-13 (UTC)
+    _make_file(directory, "MVI_0002.MP4", 1657660000)
+    _make_file(directory, "MVI_0001.MP4", 1657650000)
+    _make_file(directory, "MVI_0003.mp4", 1657720000)
+    _make_file(directory, "IMG_0001.JPG", 1657650000)
+    os.mkdir(os.path.join(directory, "Terry Concert.mp4"))
+    return directory
+
+
+def test_snapshot_filters_extension_and_directories(media_dir):
+    snapshot = DirectorySnapshot(media_dir, [".MP4"])
+    assert snapshot.entry_count == 5
+    assert [record.name for record in snapshot.sorted_records()] == [
+        "MVI_0001.MP4",
+        "MVI_0002.MP4",
+        "MVI_0003.mp4",
+    ]
+    assert count_entries(media_dir) == 5
+
+
+def test_rename_uses_snapshot_dates(media_dir, undo_history):
+    renamer = FileRenamer()
+    renamer.rename_all_files(media_dir, "mp4", "", 0, 1)
+    assert sorted(os.listdir(media_dir)) == [
+        "20220712-F-F3965-0001.MP4",
+        "20220712-F-F3965-0002.MP4",
+        "20220713-F-F3965-0001.mp4",
+        "IMG_0001.JPG",
+        "Terry Concert.mp4",
+    ]
+    renamer.undo_rename()
+    assert "MVI_0001.MP4" in os.listdir(media_dir)
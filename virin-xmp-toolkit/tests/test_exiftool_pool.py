@@ -0,0 +1,118 @@
+import pytest
+from models import meta_edit
+from models.meta_edit import (
+    ExifToolPool,
+    ExifToolService,
+    format_write_results,
+    get_worker_count,
+    plan_shards,
+)
+
+GB = 1 << 30
+MB = 1 << 20
+
+
+class FakeHelper:
+    written = []
+
+    def __init__(self, executable=None):
+        self.running = False
+        self.check_execute = True
+        self.last_status = 0
+        self.last_stderr = ""
+
+    def run(self):
+        self.running = True
+
+    def terminate(self):
+        self.running = False
+
+    def set_tags(self, files, tags, params=None):
+        FakeHelper.written.append(list(files))
+        bad = [path for path in files if "bad" in path]
+        self.last_status = 1 if bad else 0
+        self.last_stderr = "\n".join(f"Error: Not a valid JPG - {path}" for path in bad)
+
+
+@pytest.fixture
+def fake_exiftool(monkeypatch):
+    monkeypatch.setattr(meta_edit, "ExifToolHelper", FakeHelper)
+    monkeypatch.setattr(ExifToolService, "_shared", None)
+    FakeHelper.written = []
+
+
+def test_worker_count(monkeypatch):
+    assert get_worker_count(3) == 3
+    monkeypatch.setenv(meta_edit.EXIFTOOL_WORKERS_ENV, "2")
+    assert get_worker_count() == 2
+    assert get_worker_count(0) == 1
+
+
+def test_videos_are_spread_and_jpegs_batched():
+    sizes = {f"video{n}.mp4": (8 - n) * GB for n in range(4)}
+    sizes.update({f"img{n:03}.jpg": 8 * MB for n in range(120)})
+    shards = plan_shards(sizes, 4)
+    assert len(shards) == 4
+    videos = [[path for batch in shard for path in batch if "video" in path] for shard in shards]
+    assert sorted(len(share) for share in videos) == [1, 1, 1, 1]
+    for shard in shards:
+        assert all(len(batch) <= meta_edit.BATCH_FILES for batch in shard)
+        assert all(len(batch) == 1 for batch in shard if "video" in batch[0])
+
+
+def test_small_folder_uses_one_process():
+    assert len(plan_shards({f"img{n}.jpg": MB for n in range(10)}, 8)) == 1
+
+
+def test_per_file_results(fake_exiftool, tmp_path):
+    files = []
+    for name in ["a.jpg", "bad.jpg", "c.jpg"]:
+        (tmp_path / name).write_bytes(b"x")
+        files.append(str(tmp_path / name))
+    results = ExifToolPool(4).set_tags(files, {"Title": "t"})
+    assert [result.error for result in results] == [None, "Error: Not a valid JPG", None]
+    assert format_write_results(results).startswith(
+        "Metadata updated for 2 of 3 files. Failed: 1.\nbad.jpg: Error: Not a valid JPG"
+    )
+
+
+class CrashingHelper(FakeHelper):
+    """Fails the whole command without naming the file when a batch holds a bad file"""
+
+    def set_tags(self, files, tags, params=None):
+        FakeHelper.written.append(list(files))
+        if any("bad" in path for path in files):
+            raise BrokenPipeError()
+        self.last_status = 0
+        self.last_stderr = ""
+
+
+def test_failed_batch_is_bisected(monkeypatch, tmp_path):
+    monkeypatch.setattr(meta_edit, "ExifToolHelper", CrashingHelper)
+    monkeypatch.setattr(ExifToolService, "_shared", None)
+    FakeHelper.written = []
+    files = []
+    for number in range(16):
+        name = "bad.jpg" if number == 5 else f"{number:02}.jpg"
+        (tmp_path / name).write_bytes(b"x")
+        files.append(str(tmp_path / name))
+    results = ExifToolPool(1).set_tags(files, {"Title": "t"})
+    assert [result.path for result in results if result.error] == [files[5]]
+    assert all(result.error is None for result in results if result.path != files[5])
+    # the service retries a crashed call once, count each batch a single time
+    calls = [
+        batch
+        for index, batch in enumerate(FakeHelper.written)
+        if index == 0 or batch != FakeHelper.written[index - 1]
+    ]
+    # only the half holding the bad file is split again
+    assert [len(batch) for batch in calls] == [16, 8, 4, 4, 2, 1, 1, 2, 8]
+
+
+def test_named_failures_are_retried_alone(fake_exiftool, tmp_path):
+    files = []
+    for name in ["a.jpg", "bad.jpg", "c.jpg"]:
+        (tmp_path / name).write_bytes(b"x")
+        files.append(str(tmp_path / name))
+    ExifToolPool(1).set_tags(files, {"Title": "t"})
+    assert FakeHelper.written == [files, [files[1]]]
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from models import meta_edit
+from models.meta_edit import ExifToolService
+
+
+class FakeHelper:
+    started = 0
+
+    def __init__(self, executable=None):
+        self.running = False
+        self.check_execute = True
+        self.fail_next = False
+
+    def run(self):
+        FakeHelper.started += 1
+        self.running = True
+
+    def terminate(self):
+        self.running = False
+
+    def get_tags(self, files, tags, params=None):
+        if self.fail_next:
+            self.running = False
+            raise BrokenPipeError()
+        return [{"SourceFile": files, "XMP:Title": "title"}]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(meta_edit, "ExifToolHelper", FakeHelper)
+    FakeHelper.started = 0
+    return ExifToolService("exiftool")
+
+
+def test_process_is_reused(service):
+    threads = [
+        threading.Thread(target=service.get_tags, args=(f"{n}.jpg", ["Title"]))
+        for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeHelper.started == 1
+
+
+def test_dead_process_is_restarted(service):
+    service.get_tags("a.jpg", ["Title"])
+    service._helper.running = False
+    service.get_tags("a.jpg", ["Title"])
+    service._helper.fail_next = True
+    assert service.get_tags("b.jpg", ["Title"])[0]["SourceFile"] == "b.jpg"
+    assert FakeHelper.started == 3 and service.restarts == 2
+
+
+def test_shutdown(service):
+    service.get_tags("a.jpg", ["Title"])
+    service.shutdown()
+    assert service._helper is None
+    service.get_tags("a.jpg", ["Title"])
+    assert FakeHelper.started == 2
@@ -0,0 +1,43 @@
+import os
+import pytest
+from models.file_rename import FileRenamer
+from models.fingerprint import MISSING, MODIFIED, NAME_TAKEN, find_conflicts
+
+
+@pytest.fixture
+def renamed_dir(make_media, undo_history):
+    directory = make_media("media", [f"MVI_{number:04}.MP4" for number in range(1, 6)])
+    renamer = FileRenamer()
+    renamer.rename_all_files(directory, "mp4", "", 0, 1)
+    return directory, renamer
+
+
+def test_unchanged_directory_has_no_conflicts(renamed_dir):
+    directory, renamer = renamed_dir
+    action = renamer.write_actions[-1]
+    assert find_conflicts(directory, action.mapping, action.fingerprint) == []
+
+
+def test_new_unrelated_file_does_not_block_undo(renamed_dir):
+    directory, renamer = renamed_dir
+    (directory / "notes.txt").write_text("notes")
+    assert renamer._is_directory_modified(renamer.write_actions[-1]) == ""
+    renamer.undo_rename()
+    assert "MVI_0001.MP4" in os.listdir(directory)
+
+
+def test_conflicts_are_listed_exactly(renamed_dir):
+    directory, renamer = renamed_dir
+    action = renamer.write_actions[-1]
+    os.remove(directory / "20220712-F-F3965-0001.MP4")
+    (directory / "20220712-F-F3965-0002.MP4").write_text("edited")
+    (directory / "MVI_0003.MP4").write_text("new card")
+
+    conflicts = dict(find_conflicts(directory, action.mapping, action.fingerprint))
+    assert conflicts == {
+        str(directory / "20220712-F-F3965-0001.MP4"): MISSING,
+        str(directory / "20220712-F-F3965-0002.MP4"): MODIFIED,
+        str(directory / "MVI_0003.MP4"): NAME_TAKEN,
+    }
+    assert "Unable to undo" in renamer.undo_rename()
+    assert len(renamer.write_actions) == 1
@@ -0,0 +1,115 @@
+import csv
+import hashlib
+import os
+import pytest
+from models.dir_index import DirectoryIndex
+from models.file_rename import FileRenamer
+from models import ingest
+from models.ingest import COPIED, FAILED, Ingest, copy_file
+from models.meta_edit import WriteResult
+
+DAY = 1657650000  # 2022-07-12 (UTC)
+
+
+def _make_card(root, files, start=0):
+    for offset, (relative, data) in enumerate(files, start):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        os.utime(path, (DAY + offset, DAY + offset))
+    return str(root)
+
+
+class FakeMeta:
+    def __init__(self):
+        self.written = []
+
+    def plan_write(self, files, metadata):
+        return dict.fromkeys(files, metadata)
+
+    def apply_plan(self, plan, sidecar=False):
+        self.written.extend(plan)
+        return [WriteResult(file) for file in plan]
+
+
+def test_copy_file_hashes_what_it_copies(tmp_path):
+    source = tmp_path / "C0001.MP4"
+    data = os.urandom(3 * 1024 * 1024 + 5)
+    source.write_bytes(data)
+    os.utime(source, (DAY, DAY))
+    target = tmp_path / "out.MP4"
+    assert copy_file(str(source), str(target)) == (
+        len(data),
+        hashlib.blake2b(data).hexdigest(),
+    )
+    assert target.read_bytes() == data
+    assert os.stat(target).st_mtime == DAY
+    with pytest.raises(FileExistsError):
+        copy_file(str(source), str(target))
+    assert sorted(os.listdir(tmp_path)) == ["C0001.MP4", "out.MP4"]
+
+
+def test_cards_are_numbered_as_one_shoot(tmp_path):
+    card_a = _make_card(
+        tmp_path / "a",
+        [("DCIM/100CANON/IMG_0001.JPG", b"a1"), ("DCIM/100CANON/IMG_0002.JPG", b"a2")],
+    )
+    card_b = _make_card(
+        tmp_path / "b", [("PRIVATE/M4ROOT/CLIP/C0001.MP4", b"b1" * 1000)], start=10
+    )
+    destination = tmp_path / "shoot"
+    destination.mkdir()
+    (destination / "20220712-F-F3965-1004.JPG").write_bytes(b"old")
+    meta = FakeMeta()
+    summary = Ingest(FileRenamer(DirectoryIndex()), meta).ingest(
+        [card_a, card_b], str(destination), "", 1, 1, metadata={"title": "Concert"}
+    )
+    assert [result.status for result in summary.results] == [COPIED] * 3
+    names = sorted(os.path.basename(result.target) for result in summary.results)
+    assert names == [
+        "20220712-F-F3965-1005.JPG",
+        "20220712-F-F3965-1006.JPG",
+        "20220712-F-F3965-1007.MP4",
+    ]
+    assert sorted(meta.written) == sorted(result.target for result in summary.results)
+    assert (destination / "20220712-F-F3965-1007.MP4").read_bytes() == b"b1" * 1000
+    with open(summary.manifest, newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert {row["blake2b"] for row in rows} == {
+        hashlib.blake2b(data).hexdigest() for data in [b"a1", b"a2", b"b1" * 1000]
+    }
+    assert summary.message().startswith("Ingested 3 of 3 files")
+
+
+def test_unreadable_file_is_reported(tmp_path):
+    card = _make_card(tmp_path / "a", [("IMG_0001.JPG", b"a1"), ("IMG_0002.JPG", b"a2")])
+    os.chmod(tmp_path / "a" / "IMG_0002.JPG", 0)
+    if os.access(tmp_path / "a" / "IMG_0002.JPG", os.R_OK):
+        pytest.skip("running as root, permissions are not enforced")
+    destination = tmp_path / "shoot"
+    summary = Ingest(FileRenamer(DirectoryIndex())).ingest(
+        [card], str(destination), "", 1, 1
+    )
+    statuses = {os.path.basename(r.source): r.status for r in summary.results}
+    assert statuses == {"IMG_0001.JPG": COPIED, "IMG_0002.JPG": FAILED}
+    assert len(os.listdir(destination)) == 2  # one copy and the manifest, no part file
+
+
+def test_copies_are_tagged_while_the_card_is_copied(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "TAG_BATCH_FILES", 2)
+    card = _make_card(
+        tmp_path / "a", [(f"IMG_000{number}.JPG", b"a") for number in range(1, 6)]
+    )
+    destination = tmp_path / "shoot"
+    batches = []
+
+    class RecordingMeta(FakeMeta):
+        def apply_plan(self, plan, sidecar=False):
+            # how many copies existed when this batch was tagged
+            batches.append((len(plan), len(os.listdir(destination))))
+            return super().apply_plan(plan, sidecar)
+
+    Ingest(FileRenamer(DirectoryIndex()), RecordingMeta()).ingest(
+        [card], str(destination), "", 1, 1, metadata={"title": "Concert"}
+    )
+    assert batches == [(2, 2), (2, 4), (1, 5)]
@@ -0,0 +1,105 @@
+import os
+import pytest
+from models import meta_edit
+from models.meta_edit import MetaTool
+from models.metadata_cache import MetadataCache
+
+TAGS = ["Title", "Creator"]
+RESULT = {"SourceFile": "a.jpg", "XMP:Title": "title"}
+
+
+@pytest.fixture
+def media(tmp_path):
+    directory = tmp_path / "media"
+    directory.mkdir()
+    for name in ["a.jpg", "b.jpg", "c.jpg"]:
+        (directory / name).write_bytes(b"jpeg")
+    return directory
+
+
+def _cache_read(cache, path):
+    identity, result = cache.lookup(path, TAGS)
+    if result is None:
+        cache.store(path, identity, TAGS, RESULT)
+    return result
+
+
+def test_hit_until_file_changes(media):
+    cache = MetadataCache()
+    path = str(media / "a.jpg")
+    assert _cache_read(cache, path) is None
+    assert _cache_read(cache, path) == RESULT
+    assert cache.lookup(path, TAGS + ["City"])[1] is None
+    (media / "a.jpg").write_bytes(b"edited elsewhere")
+    assert _cache_read(cache, path) is None
+
+
+def test_lru_eviction(media):
+    cache = MetadataCache(max_entries=2)
+    for name in ["a.jpg", "b.jpg", "a.jpg", "c.jpg"]:
+        _cache_read(cache, str(media / name))
+    assert len(cache) == 2
+    assert cache.lookup(str(media / "a.jpg"), TAGS)[1] == RESULT
+    assert cache.lookup(str(media / "b.jpg"), TAGS)[1] is None
+
+
+def test_persisted_between_sessions(media):
+    path = str(media / "a.jpg")
+    cache = MetadataCache(persist=True)
+    _cache_read(cache, path)
+    cache.close()
+    assert MetadataCache(persist=True).lookup(path, TAGS)[1] == RESULT
+
+
+def test_broken_database_is_replaced(media, tmp_path):
+    database = tmp_path / "broken.sqlite"
+    database.write_bytes(b"not a database" * 100)
+    cache = MetadataCache(database=str(database))
+    _cache_read(cache, str(media / "a.jpg"))
+    assert cache.lookup(str(media / "a.jpg"), TAGS)[1] == RESULT
+
+
+class FakeService:
+    reads = 0
+
+    def get_tags(self, files, tags, check_execute=True):
+        FakeService.reads += 1
+        files = [files] if isinstance(files, str) else files
+        return [{"SourceFile": file, "XMP:Title": "title"} for file in files]
+
+
+class FakePool:
+    def __init__(self, workers=None):
+        pass
+
+    def set_tags(self, files, tags, params=None):
+        return [meta_edit.WriteResult(path) for path in files]
+
+
+def test_own_writes_invalidate(media, monkeypatch):
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    monkeypatch.setattr(meta_edit, "ExifToolPool", FakePool)
+    FakeService.reads = 0
+    tool = MetaTool()
+    tool.retreive_metadata(str(media), "jpg")
+    tool.retreive_metadata(str(media), "jpg")
+    assert FakeService.reads == 1
+    # the write reads the two files it has not seen yet in one batch
+    tool.write_metadata(str(media), "jpg", {"Title": "new"})
+    assert FakeService.reads == 2
+    assert tool.retreive_metadata(str(media), "jpg")["Title"] == "title"
+    assert FakeService.reads == 3
+
+
+def test_batch_commits_once(media, tmp_path):
+    cache = MetadataCache(database=str(tmp_path / "cache.sqlite"))
+    statements = []
+    cache._db.set_trace_callback(statements.append)
+    with cache.batch():
+        for name in ["a.jpg", "b.jpg", "c.jpg"]:
+            _cache_read(cache, str(media / name))
+        assert not any("INSERT" in statement for statement in statements)
+    assert sum(statement == "COMMIT" for statement in statements) == 1
+    cache.close()
+    reopened = MetadataCache(database=str(tmp_path / "cache.sqlite"))
+    assert reopened.lookup(str(media / "c.jpg"), TAGS)[1] == RESULT
@@ -0,0 +1,53 @@
+import pytest
+from models import meta_edit
+from models.meta_edit import MIXED, MetaTool
+
+CAPTION = "Airmen perform at the base concert."
+
+
+class FakeService:
+    calls = []
+    tags = {}
+
+    def get_tags(self, files, tags, check_execute=True):
+        files = [files] if isinstance(files, str) else files
+        FakeService.calls.append(len(files))
+        return [
+            {"SourceFile": file, **FakeService.tags[file]}
+            for file in files
+            if file in FakeService.tags
+        ]
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    FakeService.calls = []
+    FakeService.tags = {}
+    for number in range(10):
+        path = tmp_path / f"IMG_{number:02}.jpg"
+        path.write_bytes(b"jpeg")
+        FakeService.tags[str(path)] = {
+            "XMP:Description": "" if number in (3, 7) else CAPTION,
+            "XMP:Title": f"Title {number % 3}",
+            "IPTC:Keywords": ["USAFBand", "Concert"],
+        }
+    return tmp_path
+
+
+def test_consensus_and_outliers(folder):
+    consensus = MetaTool().retrieve_consensus(str(folder), "jpg", chunk_size=4)
+    assert FakeService.calls == [4, 4, 2]
+    description = consensus["Description"]
+    assert description.value == CAPTION and description.common_count == 8
+    assert description.outliers == [str(folder / "IMG_03.jpg"), str(folder / "IMG_07.jpg")]
+    assert consensus["Title"].value == MIXED
+    assert consensus["Keywords"].value == "USAFBand, Concert"
+    assert consensus["City"] == ("", 10, 10, [])
+
+
+def test_no_leak_between_folders(folder, tmp_path_factory):
+    tool = MetaTool()
+    assert tool.retreive_metadata(str(folder), "jpg")["Description"] == CAPTION
+    empty = tmp_path_factory.mktemp("empty")
+    assert tool.retreive_metadata(str(empty), "jpg")["Description"] == ""
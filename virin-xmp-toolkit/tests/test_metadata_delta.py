@@ -0,0 +1,74 @@
+import pytest
+from models import meta_edit
+from models.meta_edit import MetaTool, get_tag_delta
+
+METADATA = {"title": "Concert", "keywords": "USAFBand, Concert", "city": ""}
+
+
+def test_tag_delta():
+    current = {
+        "SourceFile": "a.mp4",
+        "XMP:Title": "Concert",
+        "IPTC:Keywords": ["USAFBand", "Concert"],
+    }
+    assert get_tag_delta(current, METADATA) == {}
+    current["XMP:Title"] = "Rehearsal"
+    assert get_tag_delta(current, METADATA) == {"title": "Concert"}
+    current["XMP:City"] = "Dayton"
+    assert get_tag_delta(current, METADATA) == {"title": "Concert", "city": ""}
+    assert get_tag_delta({"SourceFile": "b.mp4"}, METADATA) == {
+        "title": "Concert",
+        "keywords": "USAFBand, Concert",
+    }
+
+
+class FakeService:
+    tags = {}
+
+    def get_tags(self, files, tags, check_execute=True):
+        return [{"SourceFile": file, **FakeService.tags[file]} for file in files]
+
+
+class FakePool:
+    writes = []
+
+    def __init__(self, workers=None):
+        pass
+
+    def set_tags(self, files, tags, params=None):
+        FakePool.writes.append((sorted(files), tags))
+        return [meta_edit.WriteResult(file) for file in files]
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    monkeypatch.setattr(meta_edit, "ExifToolPool", FakePool)
+    FakePool.writes = []
+    titles = {"a.mp4": "Concert", "b.mp4": "Rehearsal", "c.mp4": "Rehearsal"}
+    for name, title in titles.items():
+        (tmp_path / name).write_bytes(b"x" * 1024)
+        FakeService.tags[str(tmp_path / name)] = {
+            "XMP:Title": title,
+            "IPTC:Keywords": ["USAFBand", "Concert"],
+        }
+    return tmp_path
+
+
+def test_only_changed_files_are_written(folder):
+    message = MetaTool().write_metadata(str(folder), "mp4", METADATA)
+    assert FakePool.writes == [
+        ([str(folder / "b.mp4"), str(folder / "c.mp4")], {"title": "Concert"})
+    ]
+    assert message == (
+        "Metadata updated sucessfully! 1 files were already up to date (1.0 KB not rewritten)."
+    )
+
+
+def test_dry_run(folder):
+    report = MetaTool().write_metadata(str(folder), "mp4", METADATA, dry_run=True)
+    assert FakePool.writes == []
+    assert report.splitlines()[0] == (
+        "Dry run: 2 of 3 files would be rewritten (2.0 KB). 1 files already match, 1.0 KB avoided."
+    )
+    assert "b.mp4: title" in report
@@ -0,0 +1,46 @@
+import os
+import pytest
+from models.file_rename import ALL_MEDIA, FileRenamer, RenameSummary, get_extensions
+
+
+@pytest.fixture
+def media_dir(make_media, undo_history):
+    names = ["IMG_0001.CR3", "IMG_0001.JPG", "IMG_0002.CR3", "MVI_0003.MP4", "notes.txt"]
+    return make_media("media", names)
+
+
+def test_get_extensions():
+    assert get_extensions(".MP4") == {"mp4"}
+    assert get_extensions(["JPG", ".cr3"]) == {"jpg", "cr3"}
+    assert "txt" not in get_extensions(ALL_MEDIA)
+
+
+def test_all_media_one_pass(media_dir):
+    FileRenamer().rename_all_files(media_dir, ALL_MEDIA, "", 0, 1)
+    assert sorted(os.listdir(media_dir)) == [
+        "20220712-F-F3965-0001.CR3",
+        "20220712-F-F3965-0002.JPG",
+        "20220712-F-F3965-0003.CR3",
+        "20220712-F-F3965-0004.MP4",
+        "notes.txt",
+    ]
+
+
+def test_keep_pairs(media_dir):
+    renamer = FileRenamer()
+    renamer.rename_all_files(media_dir, ["cr3", "jpg", "mp4"], "", 0, 1, keep_pairs=True)
+    assert sorted(os.listdir(media_dir)) == [
+        "20220712-F-F3965-0001.CR3",
+        "20220712-F-F3965-0001.JPG",
+        "20220712-F-F3965-0002.CR3",
+        "20220712-F-F3965-0003.MP4",
+        "notes.txt",
+    ]
+    renamer.undo_rename()
+    assert "IMG_0001.JPG" in os.listdir(media_dir)
+
+
+def test_summary_lists_extension_set():
+    assert RenameSummary(["mp4", "jpg"]).message() == (
+        "Could not find any files with extension jpg, mp4"
+    )
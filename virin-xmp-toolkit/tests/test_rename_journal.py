@@ -0,0 +1,50 @@
+import os
+import pytest
+from models.file_rename import FileRenamer
+from models.rename_journal import RenameJournal
+from models.rename_plan import RenamePlan
+
+NAMES = [f"MVI_{number:04}.MP4" for number in range(1, 11)]
+
+
+@pytest.fixture
+def media_dir(make_media, undo_history):
+    return make_media("media", NAMES)
+
+
+def test_undo_after_restart(media_dir):
+    FileRenamer().rename_all_files(media_dir, "mp4", "", 0, 1)
+    assert "MVI_0001.MP4" not in os.listdir(media_dir)
+
+    FileRenamer.write_actions.clear()  # program restarted
+    renamer = FileRenamer()
+    recovered = renamer.recover_write_actions(media_dir)
+    assert len(recovered) == 1 and recovered[0].complete
+    renamer.undo_rename()
+    assert sorted(os.listdir(media_dir)) == NAMES
+
+    # the undo is journaled too, nothing left to recover
+    FileRenamer.write_actions.clear()
+    assert renamer.recover_write_actions(media_dir) == []
+
+
+def test_recover_interrupted_batch(media_dir):
+    pairs = [(name, f"NEW_{index}.MP4") for index, name in enumerate(NAMES)]
+    plan = RenamePlan(media_dir, pairs, os.listdir(media_dir))
+    journal = RenameJournal(media_dir)
+    batch = journal.begin(plan.steps)
+    results = plan.execute(lambda index: journal.commit(batch, index))
+    for _ in range(4):
+        next(results)
+    # two more renames happen but their commit records are lost (power cut)
+    for source, target in pairs[4:6]:
+        os.rename(media_dir / source, media_dir / target)
+    journal._file.close()
+
+    renamer = FileRenamer()
+    recovered = renamer.recover_write_actions(media_dir)
+    assert len(recovered) == 1
+    assert not recovered[0].complete
+    assert len(recovered[0].mapping) == 6
+    renamer.undo_rename()
+    assert sorted(os.listdir(media_dir)) == NAMES
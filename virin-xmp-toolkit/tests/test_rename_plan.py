@@ -0,0 +1,106 @@
+import os
+import pytest
+from models import rename_plan
+from models.rename_plan import RENAMED, SKIPPED, FAILED, RenamePlan, StrandedFileError
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for name in ["a.mp4", "b.mp4", "c.mp4", "d.mp4", "keep.mp4"]:
+        with open(os.path.join(tmp_path, name), "w") as file:
+            file.write(name)
+    return tmp_path
+
+
+def _contents(directory):
+    result = {}
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name)) as file:
+            result[name] = file.read()
+    return result
+
+
+def _apply(directory, pairs):
+    plan = RenamePlan(directory, pairs, os.listdir(directory))
+    return {result.source: result for result in plan.execute()}
+
+
+def test_chain_is_ordered(directory):
+    results = _apply(directory, [("a.mp4", "b.mp4"), ("b.mp4", "x.mp4")])
+    assert {result.status for result in results.values()} == {RENAMED}
+    assert _contents(directory)["b.mp4"] == "a.mp4"
+    assert _contents(directory)["x.mp4"] == "b.mp4"
+
+
+def test_swap_cycle_uses_temporary_name(directory):
+    results = _apply(
+        directory, [("a.mp4", "b.mp4"), ("b.mp4", "c.mp4"), ("c.mp4", "a.mp4")]
+    )
+    assert {result.status for result in results.values()} == {RENAMED}
+    contents = _contents(directory)
+    assert contents["b.mp4"] == "a.mp4"
+    assert contents["c.mp4"] == "b.mp4"
+    assert contents["a.mp4"] == "c.mp4"
+    assert len(contents) == 5
+
+
+def test_collisions_are_skipped_and_cascade(directory):
+    results = _apply(
+        directory,
+        [
+            ("a.mp4", "keep.mp4"),  # target exists and is not moved
+            ("d.mp4", "a.mp4"),  # a.mp4 now stays put
+            ("b.mp4", "y.mp4"),
+            ("c.mp4", "y.mp4"),  # duplicate target
+            ("missing.mp4", "z.mp4"),
+        ],
+    )
+    assert results["a.mp4"].status == SKIPPED
+    assert isinstance(results["d.mp4"].error, FileExistsError)
+    assert results["b.mp4"].status == RENAMED
+    assert isinstance(results["c.mp4"].error, FileExistsError)
+    assert isinstance(results["missing.mp4"].error, FileNotFoundError)
+    assert _contents(directory)["keep.mp4"] == "keep.mp4"
+
+
+def test_case_only_rename(directory):
+    results = _apply(directory, [("a.mp4", "A.mp4")])
+    assert results["a.mp4"].status == RENAMED
+    assert "A.mp4" in os.listdir(directory)
+
+
+def test_failed_move_blocks_dependent_move(directory):
+    plan = RenamePlan(
+        directory, [("a.mp4", "x.mp4"), ("b.mp4", "a.mp4")], os.listdir(directory)
+    )
+    os.remove(os.path.join(directory, "a.mp4"))
+    os.mkdir(os.path.join(directory, "a.mp4"))
+    os.mkdir(os.path.join(directory, "x.mp4"))
+    with open(os.path.join(directory, "x.mp4", "inner"), "w"):
+        pass
+    results = {result.source: result for result in plan.execute()}
+    assert results["a.mp4"].status == FAILED
+    assert results["b.mp4"].status == FAILED
+    assert _contents_safe(directory, "b.mp4") == "b.mp4"
+
+
+def test_failed_cycle_move_names_the_temporary_file(directory, monkeypatch):
+    rename = os.rename
+
+    def failing_rename(source, target):
+        if ".virin-tmp" in os.path.basename(source):
+            raise PermissionError(target)
+        rename(source, target)
+
+    monkeypatch.setattr(rename_plan.os, "rename", failing_rename)
+    results = _apply(directory, [("a.mp4", "b.mp4"), ("b.mp4", "a.mp4")])
+    error = next(result.error for result in results.values() if result.error)
+    assert isinstance(error, StrandedFileError)
+    # b.mp4 took the name a.mp4, the error says where a.mp4 went
+    assert _contents_safe(directory, os.path.basename(error.temp)) == "a.mp4"
+    assert os.path.basename(error.temp) in str(error)
+
+
+def _contents_safe(directory, name):
+    with open(os.path.join(directory, name)) as file:
+        return file.read()
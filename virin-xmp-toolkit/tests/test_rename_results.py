@@ -0,0 +1,47 @@
+import os
+import pytest
+from models.file_rename import FileRenamer, RenameSummary
+from models.rename_plan import RENAMED, SKIPPED
+
+
+@pytest.fixture
+def media_dir(make_media, undo_history):
+    directory = make_media("media", [f"MVI_{number:04}.MP4" for number in range(1, 31)])
+    # already taken by a file that is not renamed
+    (directory / "20220712-F-F3965-0003.MP4").mkdir()
+    return directory
+
+
+def test_results_are_streamed_records(media_dir):
+    results = list(FileRenamer().iter_rename_results(media_dir, "mp4", "", 0, 1))
+    assert len(results) == 30
+    assert results[0] == (
+        str(media_dir / "MVI_0003.MP4"),
+        str(media_dir / "20220712-F-F3965-0003.MP4"),
+        SKIPPED,
+        results[0].error,
+    )
+    assert isinstance(results[0].error, FileExistsError)
+    assert sum(result.status == RENAMED for result in results) == 29
+
+
+def test_summary_is_counted(media_dir):
+    message = FileRenamer().rename_all_files(media_dir, "mp4", "", 0, 1)
+    assert message.startswith("Renamed 29 of 30 files. Skipped: 1. Failed: 0.")
+    assert "File already exists: MVI_0003" in message
+
+
+def test_stopping_early_keeps_undo(media_dir):
+    renamer = FileRenamer()
+    results = renamer.iter_rename_results(media_dir, "mp4", "", 0, 1)
+    for _ in range(5):
+        next(results)
+    results.close()
+    action = renamer.write_actions[-1]
+    assert len(action.mapping) == 4 and not action.complete
+    renamer.undo_rename()
+    assert "MVI_0002.MP4" in os.listdir(media_dir)
+
+
+def test_empty_summary():
+    assert RenameSummary("mp4").message() == "Could not find any files with extension mp4"
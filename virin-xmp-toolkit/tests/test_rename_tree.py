@@ -0,0 +1,58 @@
+import os
+import pytest
+from models.file_rename import FileRenamer
+
+
+@pytest.fixture
+def shoot_tree(tmp_path, make_media, undo_history):
+    folders = {
+        "DCIM/100CANON": ["MVI_0001.MP4", "MVI_0002.MP4"],
+        "DCIM/101CANON": ["MVI_0003.MP4"],
+        "PRIVATE/M4ROOT/CLIP": ["C0001.MP4", "C0002.MP4"],
+        ".Trashes": ["OLD.MP4"],
+    }
+    offset = 0
+    for folder, names in folders.items():
+        make_media(f"card/{folder}", names, offset)
+        offset += len(names)
+    return tmp_path / "card"
+
+
+def _tree(root):
+    return {
+        os.path.relpath(directory, root): sorted(files)
+        for directory, _, files in os.walk(root)
+        if files
+    }
+
+
+def test_per_folder_numbering(shoot_tree):
+    renamer = FileRenamer()
+    renamer.rename_tree(shoot_tree, "mp4", "", 0, 1, max_workers=4)
+    tree = _tree(shoot_tree)
+    assert tree["DCIM/100CANON"] == [
+        "20220712-F-F3965-0001.MP4",
+        "20220712-F-F3965-0002.MP4",
+    ]
+    assert tree["DCIM/101CANON"] == ["20220712-F-F3965-0001.MP4"]
+    assert tree["PRIVATE/M4ROOT/CLIP"] == [
+        "20220712-F-F3965-0001.MP4",
+        "20220712-F-F3965-0002.MP4",
+    ]
+    assert tree[".Trashes"] == ["OLD.MP4"]
+    assert len(renamer.write_actions) == 3
+
+
+def test_global_numbering_and_undo(shoot_tree):
+    renamer = FileRenamer()
+    renamer.rename_tree(shoot_tree, "mp4", "", 0, 1, global_numbering=True)
+    tree = _tree(shoot_tree)
+    assert tree["DCIM/101CANON"] == ["20220712-F-F3965-0003.MP4"]
+    assert tree["PRIVATE/M4ROOT/CLIP"] == [
+        "20220712-F-F3965-0004.MP4",
+        "20220712-F-F3965-0005.MP4",
+    ]
+    while renamer.write_actions:
+        renamer.undo_rename()
+    assert _tree(shoot_tree)["DCIM/100CANON"] == ["MVI_0001.MP4", "MVI_0002.MP4"]
+    assert _tree(shoot_tree)["PRIVATE/M4ROOT/CLIP"] == ["C0001.MP4", "C0002.MP4"]
@@ -0,0 +1,86 @@
+import os
+import threading
+from models.dir_index import DirectoryIndex
+from models.file_rename import FileRenamer
+from models.sequence_registry import SequenceRegistry
+
+
+def _make_folder(path, names):
+    path.mkdir()
+    for name in names:
+        (path / name).write_bytes(b"x")
+    return str(path)
+
+
+def test_concurrent_reservations_never_overlap(tmp_path):
+    database = str(tmp_path / "sequences.sqlite")
+    blocks = []
+
+    def reserve():
+        registry = SequenceRegistry(database)  # one connection per operator
+        for _ in range(20):
+            first = registry.reserve(0, {"20240101": 5})["20240101"]
+            blocks.append(range(first, first + 5))
+        registry.close()
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    numbers = [number for block in blocks for number in block]
+    assert sorted(numbers) == list(range(1, 401))
+    assert SequenceRegistry(database).next_sequence("20240101", 0) == 401
+
+
+def test_reserve_respects_minimums_and_shots(tmp_path):
+    registry = SequenceRegistry(str(tmp_path / "sequences.sqlite"))
+    assert registry.reserve(1, {"20240101": 3, "20240102": 2}, {"20240102": 7}) == {
+        "20240101": 1,
+        "20240102": 7,
+    }
+    assert registry.reserve(1, {"20240102": 1}) == {"20240102": 9}
+    assert registry.reserve(2, {"20240101": 1}) == {"20240101": 1}
+    registry.record(1, {"20240101": 50, "20240102": 2})
+    assert registry.next_sequence("20240101", 1) == 51
+    assert registry.next_sequence("20240102", 1) == 10
+
+
+def test_empty_sequence_numbers_folders_without_collisions(tmp_path):
+    registry = SequenceRegistry(str(tmp_path / "sequences.sqlite"))
+    renamer = FileRenamer(DirectoryIndex(), registry=registry)
+    first = _make_folder(tmp_path / "first", ["a.jpg", "b.jpg"])
+    second = _make_folder(tmp_path / "second", ["c.jpg", "d.jpg"])
+    renamer.rename_all_files(first, "jpg", "20240101", 0, None)
+    renamer.rename_all_files(second, "jpg", "20240101", 0, None)
+    names = sorted(os.listdir(first) + os.listdir(second))
+    assert names == [f"20240101-F-F3965-000{seq}.jpg" for seq in range(1, 5)]
+    # numbers typed in by hand are recorded, automatic numbering continues after them
+    third = _make_folder(tmp_path / "third", ["e.jpg"])
+    renamer.rename_all_files(third, "jpg", "20240101", 0, 40)
+    fourth = _make_folder(tmp_path / "fourth", ["f.jpg"])
+    renamer.rename_all_files(fourth, "jpg", "20240101", 0, None)
+    assert os.listdir(fourth) == ["20240101-F-F3965-0041.jpg"]
+
+
+def test_empty_sequence_continues_after_virins_in_the_folder(tmp_path):
+    registry = SequenceRegistry(str(tmp_path / "sequences.sqlite"))
+    renamer = FileRenamer(DirectoryIndex(), registry=registry)
+    # numbered on another machine, this registry has never seen these VIRINs
+    folder = _make_folder(tmp_path / "folder", ["20240101-F-F3965-0007.jpg", "a.jpg"])
+    renamer.rename_all_files(folder, "jpg", "20240101", 0, None)
+    assert sorted(os.listdir(folder)) == [
+        "20240101-F-F3965-0008.jpg",
+        "20240101-F-F3965-0009.jpg",
+    ]
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_folder(tree / "one", ["20240102-F-F3965-0003.jpg", "b.jpg"])
+    _make_folder(tree / "two", ["c.jpg"])
+    list(
+        renamer.iter_rename_results(
+            str(tree), "jpg", "20240102", 0, None, recursive=True, global_numbering=True
+        )
+    )
+    names = sorted(os.listdir(tree / "one") + os.listdir(tree / "two"))
+    assert names == [f"20240102-F-F3965-000{seq}.jpg" for seq in (4, 5, 6)]
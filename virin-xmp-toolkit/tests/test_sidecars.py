@@ -0,0 +1,91 @@
+import os
+import pytest
+from models import meta_edit
+from models.meta_edit import MetaTool
+from models.xmp import read_sidecar
+
+
+class FakeService:
+    tags = {}
+
+    def get_tags(self, files, tags, check_execute=True):
+        return [{"SourceFile": file, **FakeService.tags[file]} for file in files]
+
+
+class FakePool:
+    writes = []
+
+    def __init__(self, workers=None):
+        pass
+
+    def set_tags(self, files, tags, params=None):
+        FakePool.writes.append((sorted(files), tags))
+        for file in files:
+            FakeService.tags[file].update({f"XMP:{tag.capitalize()}": value for tag, value in tags.items()})
+        return [meta_edit.WriteResult(file) for file in files]
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    monkeypatch.setattr(meta_edit, "ExifToolPool", FakePool)
+    FakePool.writes = []
+    FakeService.tags = {}
+    for name in ["C0001.MP4", "C0002.MP4"]:
+        (tmp_path / name).write_bytes(b"video")
+        FakeService.tags[str(tmp_path / name)] = {"XMP:Title": "Old", "XMP:City": "Dayton"}
+    return tmp_path
+
+
+def test_sidecar_write_leaves_media_alone(folder):
+    tool = MetaTool()
+    tool.write_metadata(str(folder), "mp4", {"title": "Concert", "city": "Dayton"}, sidecar=True)
+    assert FakePool.writes == []
+    assert read_sidecar(str(folder / "C0001.xmp")) == {"XMP:Title": "Concert"}
+    assert (folder / "C0001.MP4").read_bytes() == b"video"
+    fields = tool.retreive_metadata(str(folder), "mp4")
+    assert (fields["Title"], fields["City"]) == ("Concert", "Dayton")
+
+
+def test_embed_sidecars(folder):
+    tool = MetaTool()
+    tool.write_metadata(str(folder), "mp4", {"title": "Concert"}, sidecar=True)
+    message = tool.embed_sidecars(str(folder), "mp4")
+    assert FakePool.writes == [
+        ([str(folder / "C0001.MP4"), str(folder / "C0002.MP4")], {"title": "Concert"})
+    ]
+    assert message.endswith("Removed 2 sidecars.")
+    assert not any(name.endswith(".xmp") for name in os.listdir(folder))
+    assert tool.retreive_metadata(str(folder), "mp4")["Title"] == "Concert"
+
+
+def test_shared_sidecar_is_kept(folder):
+    (folder / "C0001.JPG").write_bytes(b"photo")
+    tool = MetaTool()
+    tool.write_metadata(str(folder), "mp4", {"title": "Concert"}, sidecar=True)
+    assert tool.embed_sidecars(str(folder), "mp4").endswith("Removed 1 sidecars.")
+    assert os.path.exists(folder / "C0001.xmp")
+
+
+LIGHTROOM = b"""<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:crs="http://ns.adobe.com/camera-raw-settings/1.0/"
+    crs:Exposure2012="+0.50"/>
+ </rdf:RDF>
+</x:xmpmeta>"""
+
+
+def test_embed_keeps_other_settings(folder):
+    (folder / "C0001.xmp").write_bytes(LIGHTROOM)
+    (folder / "C0002.xmp").write_bytes(LIGHTROOM)
+    tool = MetaTool()
+    tool.write_metadata(str(folder), "mp4", {"title": "Concert"}, sidecar=True)
+    os.remove(folder / "C0002.xmp")
+    (folder / "C0002.xmp").write_bytes(LIGHTROOM)  # nothing of ours to embed
+    message = tool.embed_sidecars(str(folder), "mp4")
+    assert message.endswith("Removed 0 sidecars. Kept 1 with other settings.")
+    stripped = (folder / "C0001.xmp").read_bytes()
+    assert b"Exposure2012" in stripped and b"Concert" not in stripped
+    assert read_sidecar(str(folder / "C0001.xmp")) == {}
+    assert (folder / "C0002.xmp").read_bytes() == LIGHTROOM
@@ -0,0 +1,114 @@
+import os
+import pytest
+from models.dir_index import DirectoryIndex
+from models.file_rename import FileRenamer
+from models.meta_edit import WriteResult
+from models.watch_folder import WatchFolder, WatchProfile, load_profile, save_profile
+
+DAY = 1657650000  # 2022-07-12 (UTC)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeMeta:
+    def __init__(self):
+        self.written = []
+
+    def plan_write(self, files, metadata):
+        return dict.fromkeys(files, metadata)
+
+    def apply_plan(self, plan, sidecar=False):
+        self.written.append(sorted(os.path.basename(file) for file in plan))
+        return []
+
+
+@pytest.fixture
+def drop(tmp_path):
+    folder = tmp_path / "drop"
+    folder.mkdir()
+    return folder
+
+
+def _copy(folder, name, size):
+    path = folder / name
+    with open(path, "ab") as file:
+        file.write(b"x" * size)
+    os.utime(path, (DAY, DAY + size))
+
+
+def _watch(drop, clock, meta=None, **profile):
+    profile = WatchProfile(selected_extension="mp4", shoot_num=1, **profile)
+    return WatchFolder(str(drop), profile, FileRenamer(DirectoryIndex()), meta, clock)
+
+
+def test_batch_waits_for_growth_and_debounce(drop):
+    clock = Clock()
+    meta = FakeMeta()
+    watch = _watch(drop, clock, meta, metadata={"title": "Concert"})
+    (drop / "20220712-F-F3965-1004.mp4").write_bytes(b"done")
+    _copy(drop, "C0001.mp4", 10)
+    _copy(drop, "C0002.mp4", 10)
+    assert watch.poll() == []
+    clock.now += 4
+    _copy(drop, "C0002.mp4", 10)  # still copying
+    assert watch.poll() == []
+    assert watch.stats().queue_depth == 2
+    clock.now += 4  # C0001 settled, but C0002 grew 4 s ago: debounce still open
+    assert watch.poll() == []
+    clock.now += 2
+    results = watch.poll()
+    assert sorted(os.path.basename(result.target) for result in results) == [
+        "20220712-F-F3965-1005.mp4",
+        "20220712-F-F3965-1006.mp4",
+    ]
+    assert meta.written == [["20220712-F-F3965-1005.mp4", "20220712-F-F3965-1006.mp4"]]
+    stats = watch.stats()
+    assert (stats.files, stats.batches, stats.queue_depth) == (2, 1, 0)
+    assert stats.files_per_minute > 0 and stats.mb_per_second > 0
+    clock.now += 10
+    assert watch.poll() == []  # renamed files are not picked up again
+
+
+def test_constant_arrivals_still_get_processed(drop):
+    clock = Clock()
+    watch = _watch(drop, clock)
+    _copy(drop, "C0001.mp4", 10)
+    processed = []
+    for number in range(2, 40):
+        clock.now += 2
+        _copy(drop, f"C{number:04}.mp4", 10)  # another card never pauses
+        processed.extend(watch.poll())
+    assert processed
+    assert "C0001.mp4" in {os.path.basename(result.source) for result in processed}
+
+
+def test_profile_is_saved(drop):
+    assert load_profile() is None
+    profile = WatchProfile("jpg", 2, 5, metadata={"title": "Concert"})
+    save_profile(profile)
+    assert load_profile() == profile
+
+
+class FailingMeta(FakeMeta):
+    def apply_plan(self, plan, sidecar=False):
+        return [WriteResult(file, "locked") for file in plan]
+
+
+def test_metadata_failures_count_by_source_name(drop):
+    clock = Clock()
+    watch = _watch(drop, clock, FailingMeta(), metadata={"title": "Concert"})
+    _copy(drop, "C0001.mp4", 10)
+    watch.poll()
+    clock.now += 10
+    assert len(watch.poll()) == 1
+    assert watch._ignored == {"C0001.mp4"}
+    assert watch.stats().failed == 1
+    clock.now += 10
+    watch.poll()
+    assert watch.stats().queue_depth == 0
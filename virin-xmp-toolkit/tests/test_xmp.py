@@ -0,0 +1,71 @@
+import pytest
+from models.xmp import (
+    BrokenPacket,
+    fit_packet,
+    find_sidecars,
+    get_sidecar_path,
+    parse_packet,
+    update_packet,
+)
+
+LIGHTROOM = b"""<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:crs="http://ns.adobe.com/camera-raw-settings/1.0/"
+    xmlns:photoshop="http://ns.adobe.com/photoshop/1.0/"
+   crs:Exposure2012="+0.50"
+   photoshop:City="Dayton"/>
+ </rdf:RDF>
+</x:xmpmeta>"""
+
+
+def test_round_trip():
+    packet = update_packet(
+        b"",
+        {
+            "title": "Concert",
+            "keywords": "USAFBand, Concert",
+            "creator": "USAF Band Production",
+            "city": "",
+        },
+    )
+    assert packet.startswith(b"<?xpacket begin=")
+    assert parse_packet(packet) == {
+        "XMP:Creator": "USAF Band Production",
+        "XMP:Title": "Concert",
+        "XMP:Keywords": ["USAFBand", "Concert"],
+    }
+
+
+def test_update_keeps_other_properties():
+    packet = update_packet(LIGHTROOM, {"city": "Columbus", "title": "Rehearsal"})
+    assert b'crs:Exposure2012="+0.50"' in packet
+    assert parse_packet(packet) == {"XMP:Title": "Rehearsal", "XMP:City": "Columbus"}
+    assert parse_packet(update_packet(packet, {"city": ""})) == {"XMP:Title": "Rehearsal"}
+
+
+def test_broken_packet_is_never_replaced():
+    broken = LIGHTROOM.replace(b'"Dayton"', b'"Montr&eacute;al"')
+    with pytest.raises(BrokenPacket):
+        update_packet(broken, {"title": "Concert"})
+    assert fit_packet(broken, {"title": "Concert"}, 4096) is None
+    # only a packet without content starts over
+    empty = b'<?xpacket begin="" id="x"?>\n' + b" " * 100 + b'<?xpacket end="w"?>'
+    assert parse_packet(update_packet(empty, {"title": "Concert"})) == {
+        "XMP:Title": "Concert"
+    }
+
+
+def test_padding():
+    assert len(update_packet(b"", {"title": "x"}, padding=2000)) >= 2000
+
+
+def test_find_sidecars(tmp_path):
+    for name in ["IMG_0001.CR3", "IMG_0001.JPG", "IMG_0001.XMP", "IMG_0002.CR3"]:
+        (tmp_path / name).write_bytes(b"")
+    files = [str(tmp_path / name) for name in ["IMG_0001.CR3", "IMG_0001.JPG", "IMG_0002.CR3"]]
+    assert find_sidecars(files) == {
+        files[0]: str(tmp_path / "IMG_0001.XMP"),
+        files[1]: str(tmp_path / "IMG_0001.XMP"),
+    }
+    assert get_sidecar_path(files[2]) == str(tmp_path / "IMG_0002.xmp")
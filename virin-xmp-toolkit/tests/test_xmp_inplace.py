@@ -0,0 +1,101 @@
+import os
+import struct
+from models import meta_edit
+from models.meta_edit import MetaTool
+from models.xmp import fit_packet, update_packet
+from models.xmp_reader import XMP_UUID, read_native_tags
+from models.xmp_writer import write_in_place
+
+PACKET = update_packet(b"", {"title": "Concert"}, padding=2048)
+
+
+def _segment(marker, payload):
+    return b"\xff" + bytes([marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def _jpeg(packet):
+    xmp = _segment(0xE1, b"http://ns.adobe.com/xap/1.0/\x00" + packet)
+    return b"\xff\xd8" + xmp + b"\xff\xda\x00\x02" + b"\x01" * 1000 + b"\xff\xd9"
+
+
+def _box(kind, payload):
+    return struct.pack(">I", len(payload) + 8) + kind + payload
+
+
+def _mp4(packet):
+    return (
+        _box(b"ftyp", b"isom\x00\x00\x02\x00")
+        + _box(b"uuid", XMP_UUID + packet)
+        + _box(b"mdat", b"\x01" * 4096)
+    )
+
+
+def test_fit_packet_keeps_size():
+    packet = fit_packet(PACKET, {"description": "Band at the park"}, len(PACKET))
+    assert len(packet) == len(PACKET)
+    assert packet.endswith(b'<?xpacket end="w"?>')
+    assert fit_packet(PACKET, {"description": "x" * 4096}, len(PACKET)) is None
+    read_only = PACKET.replace(b'end="w"', b'end="r"')
+    assert fit_packet(read_only, {"title": "New"}, len(read_only)) is None
+
+
+def test_jpeg_and_mp4_updated_in_place(tmp_path):
+    for name, build in [("a.jpg", _jpeg), ("a.mp4", _mp4)]:
+        path = tmp_path / name
+        original = build(PACKET)
+        path.write_bytes(original)
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        assert write_in_place(str(path), {"title": "Parade", "state": "DC"})
+        data = path.read_bytes()
+        assert len(data) == len(original)
+        assert data[-1000:] == original[-1000:]  # image / mdat untouched
+        assert os.stat(path).st_mtime_ns == 1_000_000_000
+        tags = read_native_tags(str(path))
+        assert tags["XMP:Title"] == "Parade" and tags["XMP:State"] == "DC"
+
+
+def test_falls_back_to_exiftool(tmp_path):
+    tight = tmp_path / "tight.jpg"
+    tight.write_bytes(_jpeg(update_packet(b"", {"title": "Concert"})))
+    no_packet = tmp_path / "none.mp4"
+    no_packet.write_bytes(_box(b"ftyp", b"isom") + _box(b"mdat", b"\x01" * 64))
+    padded = tmp_path / "padded.jpg"
+    padded.write_bytes(_jpeg(PACKET))
+    before = padded.read_bytes()
+    assert not write_in_place(str(tight), {"title": "A much longer title than before"})
+    assert not write_in_place(str(no_packet), {"title": "Parade"})
+    # copyright also lives in EXIF, exiftool has to write it there
+    assert not write_in_place(str(padded), {"copyright": "Public Domain"})
+    # so do headline and city, a JPEG can carry them in its IPTC block too
+    assert not write_in_place(str(padded), {"headline": "Parade", "city": "Washington"})
+    assert padded.read_bytes() == before
+
+
+class FakePool:
+    writes = []
+
+    def __init__(self, workers=None):
+        pass
+
+    def set_tags(self, files, tags, params):
+        FakePool.writes.append(list(files))
+        return [meta_edit.WriteResult(file) for file in files]
+
+
+class FakeService:
+    def get_tags(self, files, tags, params=None, check_execute=True):
+        return [{"SourceFile": file} for file in files]
+
+
+def test_write_metadata_only_rewrites_what_does_not_fit(tmp_path, monkeypatch):
+    monkeypatch.setattr(meta_edit, "ExifToolPool", FakePool)
+    monkeypatch.setattr(
+        meta_edit.ExifToolService, "shared", classmethod(lambda cls: FakeService())
+    )
+    FakePool.writes = []
+    (tmp_path / "a.jpg").write_bytes(_jpeg(PACKET))
+    (tmp_path / "b.jpg").write_bytes(_jpeg(update_packet(b"", {"title": "Concert"})))
+    message = MetaTool().write_metadata(str(tmp_path), "jpg", {"title": "Parade at the Mall"})
+    assert message == "Metadata updated sucessfully!"
+    assert FakePool.writes == [[str(tmp_path / "b.jpg")]]
+    assert read_native_tags(str(tmp_path / "a.jpg"))["XMP:Title"] == "Parade at the Mall"
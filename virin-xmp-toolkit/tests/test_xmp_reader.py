@@ -0,0 +1,103 @@
+import struct
+import pytest
+from models import meta_edit
+from models.meta_edit import MetaTool
+from models.xmp import update_packet
+from models.xmp_reader import XMP_UUID, read_native_tags
+
+PACKET = update_packet(b"", {"title": "Concert", "keywords": "USAFBand, Concert"})
+FIELDS = {"XMP:Title": "Concert", "XMP:Keywords": ["USAFBand", "Concert"]}
+
+
+def _segment(marker, payload):
+    return b"\xff" + bytes([marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def _exif_copyright(text):
+    value = text.encode() + b"\x00"
+    ifd = struct.pack("<H", 1) + struct.pack("<HHII", 0x8298, 2, len(value), 26)
+    return b"Exif\x00\x00" + b"II*\x00" + struct.pack("<I", 8) + ifd + b"\x00" * 4 + value
+
+
+def _jpeg(*segments):
+    return b"\xff\xd8" + b"".join(segments) + b"\xff\xda\x00\x02" + b"\x00" * 1000 + b"\xff\xd9"
+
+
+def _box(kind, payload):
+    return struct.pack(">I", len(payload) + 8) + kind + payload
+
+
+def _mp4(*boxes):
+    return _box(b"ftyp", b"isom\x00\x00\x02\x00") + b"".join(boxes) + _box(b"mdat", b"\x00" * 4096)
+
+
+def test_jpeg(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(
+        _jpeg(
+            _segment(0xE1, _exif_copyright("Public Domain")),
+            _segment(0xE1, b"http://ns.adobe.com/xap/1.0/\x00" + PACKET),
+        )
+    )
+    assert read_native_tags(str(path)) == {
+        "SourceFile": str(path),
+        "EXIF:Copyright": "Public Domain",
+        **FIELDS,
+    }
+
+
+def test_jpeg_with_iptc_falls_back(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(_jpeg(_segment(0xED, b"Photoshop 3.0\x00")))
+    assert read_native_tags(str(path)) is None
+
+
+def test_mp4_boxes(tmp_path):
+    udta = tmp_path / "udta.mp4"
+    udta.write_bytes(_mp4(_box(b"moov", _box(b"udta", _box(b"XMP_", PACKET)))))
+    assert read_native_tags(str(udta)) == {"SourceFile": str(udta), **FIELDS}
+    uuid = tmp_path / "uuid.mp4"
+    uuid.write_bytes(_mp4(_box(b"moov", b""), _box(b"uuid", XMP_UUID + PACKET)))
+    assert read_native_tags(str(uuid)) == {"SourceFile": str(uuid), **FIELDS}
+    bare = tmp_path / "bare.mp4"
+    bare.write_bytes(_mp4(_box(b"moov", _box(b"trak", b""))))
+    assert read_native_tags(str(bare)) == {"SourceFile": str(bare)}
+
+
+def test_unsupported_falls_back(tmp_path):
+    quicktime = tmp_path / "a.mov"
+    quicktime.write_bytes(_mp4(_box(b"moov", _box(b"udta", _box(b"\xa9nam", b"Title")))))
+    png = tmp_path / "a.png"
+    png.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 100)
+    empty = tmp_path / "empty.jpg"
+    empty.write_bytes(b"")
+    # QuickTime tags after the XMP box still need exiftool
+    late = tmp_path / "late.mov"
+    late.write_bytes(
+        _mp4(
+            _box(b"uuid", XMP_UUID + PACKET),
+            _box(b"moov", _box(b"meta", _box(b"ilst", b""))),
+        )
+    )
+    for path in [quicktime, png, empty, late]:
+        assert read_native_tags(str(path)) is None
+
+
+class FakeService:
+    reads = []
+
+    def get_tags(self, files, tags, check_execute=True):
+        FakeService.reads.extend(files)
+        return [{"SourceFile": file, "XMP:Title": "From exiftool"} for file in files]
+
+
+def test_meta_tool_skips_exiftool(tmp_path, monkeypatch):
+    monkeypatch.setattr(meta_edit.ExifToolService, "shared", FakeService)
+    FakeService.reads = []
+    for name in ["a.mp4", "c.mp4"]:
+        (tmp_path / name).write_bytes(_mp4(_box(b"uuid", XMP_UUID + PACKET)))
+    (tmp_path / "b.mp4").write_bytes(b"not an mp4")
+    consensus = MetaTool().retrieve_consensus(str(tmp_path), "mp4")
+    assert FakeService.reads == [str(tmp_path / "b.mp4")]
+    assert consensus["Title"].value == "Concert"
+    assert consensus["Title"].outliers == [str(tmp_path / "b.mp4")]
@@ -9,15 +9,51 @@ This module tries the front end gui to backend for virin xmp toolkit.
 
 """
 
-from PyQt6.QtWidgets import QFileDialog, QMainWindow, QMessageBox
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QMainWindow,
+    QMessageBox,
+    QPushButton,
+)
 from PyQt6 import QtGui
 from PyQt6.QtGui import QRegularExpressionValidator
-from PyQt6.QtCore import QRegularExpression, QThread, pyqtSignal
-from models.file_rename import FileRenamer
-from models.meta_edit import MetaTool
-from models.ai_backend import VIRINAI
+from PyQt6.QtCore import (
+    QFileSystemWatcher,
+    QRegularExpression,
+    QThread,
+    QTimer,
+    Qt,
+    pyqtSignal,
+)
+from models.content_index import ContentIndex
+from models.dir_index import DirectoryIndex
+from models.file_rename import (
+    ALL_MEDIA,
+    DUPLICATES_FLAG,
+    DUPLICATES_SKIP,
+    MEDIA_EXTENSIONS,
+    FileRenamer,
+    RenameSummary,
+)
+from models.meta_edit import MIXED, MetaTool
+from models.metadata_cache import MetadataCache
+from models.ingest import Ingest
+from models.sequence_registry import SequenceRegistry
+from models.startup_profile import StartupProfile
+from models.watch_folder import WatchFolder, WatchProfile, load_profile, save_profile
+from models.ai_backend import (
+    AI_READY,
+    AI_STARTING,
+    AI_UNAVAILABLE,
+    MODEL_NAME,
+    VIRINAI,
+)
 from views.main_window_ui import Ui_MainWindow
 import os
+import threading
 
 SOFTWARE_VERSION = "1.0.0"
 APPLICATION_TITLE = "VIRIN XMP Toolkit"
@@ -28,12 +64,16 @@ EMPTY_STRING = ""
 DEFAULT_CREATOR = "USAF Band Production"
 DEFAULT_KEYWORD = "USAFBand"
 PUBLIC_DOMAIN_COPYRIGHT = "Public Domain"
+PROGRESS_BATCH_SIZE = 250  # files between rename progress updates
+MAX_LISTED_OUTLIERS = 5  # file names shown per field after a load
+FOLDER_CHANGE_DELAY_MS = 500  # a rename fires many change notifications, refresh once
 
 
 class FileRenameWorker(QThread):
     """Worker thread for file rename operations"""
 
     finished = pyqtSignal(str)
+    progress = pyqtSignal(int, int)  # renamed, processed
 
     def __init__(
         self,
@@ -44,6 +84,11 @@ class FileRenameWorker(QThread):
         shot=None,
         seq=None,
         operation="rename",
+        capture_date=False,
+        recursive=False,
+        global_numbering=False,
+        keep_pairs=False,
+        duplicates=DUPLICATES_FLAG,
     ) -> None:
         super().__init__()
         self.fr = renamer
@@ -53,19 +98,43 @@ class FileRenameWorker(QThread):
         self.shot = shot
         self.seq = seq
         self.operation = operation
+        self.capture_date = capture_date
+        self.recursive = recursive
+        self.global_numbering = global_numbering
+        self.keep_pairs = keep_pairs
+        self.duplicates = duplicates
 
     def run(self):
         try:
             if self.operation == "rename":
-                result = self.fr.rename_all_files(
-                    self.file_path, self.ext, self.date, self.shot, self.seq
-                )
+                result = self._rename()
             else:  # undo
                 result = self.fr.undo_rename()
             self.finished.emit(result)
         except Exception as e:
             self.finished.emit(f"Error: {str(e)}")
 
+    def _rename(self) -> str:
+        """Consumes streamed rename results, emitting progress every PROGRESS_BATCH_SIZE files"""
+        summary = RenameSummary(self.ext)
+        results = self.fr.iter_rename_results(
+            self.file_path,
+            self.ext,
+            self.date,
+            self.shot,
+            self.seq,
+            capture_date=self.capture_date,
+            recursive=self.recursive,
+            global_numbering=self.global_numbering,
+            keep_pairs=self.keep_pairs,
+            duplicates=self.duplicates,
+        )
+        for result in results:
+            summary.add(result)
+            if summary.total % PROGRESS_BATCH_SIZE == 0:
+                self.progress.emit(summary.renamed, summary.total)
+        return summary.message()
+
 
 class MetadataWorker(QThread):
     """Worker thread for metadata operations"""
@@ -73,28 +142,95 @@ class MetadataWorker(QThread):
     finished = pyqtSignal(dict)  # For load operations
     message = pyqtSignal(str)  # For write operations
 
-    def __init__(self, meta_tool, file_path, file_format, operation, metadata=None):
+    def __init__(
+        self,
+        meta_tool,
+        file_path,
+        file_format,
+        operation,
+        metadata=None,
+        dry_run=False,
+        sidecar=False,
+    ):
         super().__init__()
         self.meta = meta_tool
         self.file_path = file_path
         self.file_format = file_format
-        self.operation = operation  # 'load' or 'write'
+        self.operation = operation  # 'load', 'write' or 'embed'
         self.metadata = metadata
+        self.dry_run = dry_run
+        self.sidecar = sidecar
 
     def run(self):
         try:
             if self.operation == "load":
-                result = self.meta.retreive_metadata(self.file_path, self.file_format)
-                self.finished.emit(result)
+                result = self.meta.retrieve_consensus(self.file_path, self.file_format)
+                if result:
+                    self.finished.emit(result)
+                else:
+                    self.message.emit(
+                        f"No files found with extension {self.file_format}"
+                    )
+            elif self.operation == "embed":
+                result = self.meta.embed_sidecars(self.file_path, self.file_format)
+                self.message.emit(result)
             else:  # write
                 result = self.meta.write_metadata(
-                    self.file_path, self.file_format, self.metadata
+                    self.file_path,
+                    self.file_format,
+                    self.metadata,
+                    self.dry_run,
+                    self.sidecar,
                 )
                 self.message.emit(result)
         except Exception as e:
             self.message.emit(f"Error: {str(e)}")
 
 
+class WatchFolderWorker(QThread):
+    """Worker thread that runs a watch folder until it is stopped"""
+
+    progress = pyqtSignal(object)  # WatchStats after every scan
+    message = pyqtSignal(str)
+
+    def __init__(self, watch):
+        super().__init__()
+        self.watch = watch
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Ends the watch after the current batch"""
+        self._stop.set()
+
+    def run(self):
+        try:
+            self.watch.run(
+                self._stop, on_poll=lambda results, stats: self.progress.emit(stats)
+            )
+        except Exception as e:
+            self.message.emit(f"Watch folder stopped. Error: {str(e)}")
+
+
+class IngestWorker(QThread):
+    """Worker thread that copies a card into the selected folder"""
+
+    finished = pyqtSignal(str)
+
+    def __init__(self, ingest, card, destination, options):
+        super().__init__()
+        self.ingest = ingest
+        self.card = card
+        self.destination = destination
+        self.options = options  # keyword arguments for Ingest.ingest
+
+    def run(self):
+        try:
+            summary = self.ingest.ingest([self.card], self.destination, **self.options)
+            self.finished.emit(summary.message())
+        except Exception as e:
+            self.finished.emit(f"Error: {str(e)}")
+
+
 class AICaptionWorker(QThread):
     """Worker thread to update AI caption"""
 
@@ -121,21 +257,28 @@ class MainWindow(QMainWindow):
     MainWindow class that manages the user interface for renaming files and editing metadata.
     """
 
+    ai_state_changed = pyqtSignal()  # emitted from the AI warm-up thread
+
     def __init__(self, resolved_app_path):
         """
         Initializes the main window and sets up the user interface components,
         validators, and signals for various buttons.
         """
         super().__init__()
+        profile = StartupProfile.shared()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.ui.retranslateUi(self)
+        profile.mark("setupUi")
         self.current_window_index = 0
         self.file_path = EMPTY_STRING
         # dependencies
-        self.fr = FileRenamer()
-        self.meta = MetaTool()
+        self.index = DirectoryIndex.shared()
+        self.content_index = ContentIndex()
+        self.fr = FileRenamer(self.index, self.content_index, SequenceRegistry())
+        self.meta = MetaTool(cache=MetadataCache(persist=True), index=self.index)
         self.ai = VIRINAI(resolved_app_path)
+        profile.mark("models")
 
         self.setWindowTitle(APPLICATION_TITLE + " " + SOFTWARE_VERSION)
         # must reset logo to gui for pyinstaller executables
@@ -149,9 +292,112 @@ class MainWindow(QMainWindow):
         )
         self.rename_thread = None
         self.metadata_thread = None
-
+        self.watch_thread = None
+        self.ingest_thread = None
+        self.ai_thread = None
+        self._ai_warm_up = None
+        self._painted = False
+
+        self._setup_rename_options()
+        self._setup_metadata_options()
+        self._setup_folder_watcher()
+        self._setup_ai_status()
         self._setup_validators()
         self._connect_buttons()
+        profile.mark("widgets")
+
+    def _setup_ai_status(self):
+        """Adds the model readiness line above the AI page text boxes"""
+        self.aiStatusLabel = QLabel(parent=self.ui.aiScrollContents)
+        self.aiStatusLabel.setContentsMargins(20, 0, 20, 0)
+        self.aiStatusLabel.setWordWrap(True)
+        self.ui.aiVerticalLayout.insertWidget(0, self.aiStatusLabel)
+        self.ai_state_changed.connect(self._show_ai_state)
+        self._show_ai_state()
+
+    def _setup_rename_options(self):
+        """Adds rename option widgets below the VIRIN inputs"""
+        self.renameOptionsLayout = QHBoxLayout()
+        self.renameOptionsLayout.setContentsMargins(50, 0, 100, 20)
+        self.captureDateCheckBox = QCheckBox("Use Capture Date", parent=self.ui.filePage)
+        self.captureDateCheckBox.setToolTip(
+            "Read DateTimeOriginal/CreateDate from the files instead of filesystem dates"
+        )
+        self.renameOptionsLayout.addWidget(self.captureDateCheckBox)
+        self.subfoldersCheckBox = QCheckBox("Include Subfolders", parent=self.ui.filePage)
+        self.subfoldersCheckBox.setToolTip(
+            "Rename every folder of a card dump (DCIM/100CANON, PRIVATE/M4ROOT/CLIP ...)"
+        )
+        self.renameOptionsLayout.addWidget(self.subfoldersCheckBox)
+        self.globalNumberingCheckBox = QCheckBox(
+            "Number Across Folders", parent=self.ui.filePage
+        )
+        self.globalNumberingCheckBox.setToolTip(
+            "One sequence per date for the whole tree instead of one per folder"
+        )
+        self.globalNumberingCheckBox.setEnabled(False)
+        self.subfoldersCheckBox.toggled.connect(self.globalNumberingCheckBox.setEnabled)
+        self.renameOptionsLayout.addWidget(self.globalNumberingCheckBox)
+        self.keepPairsCheckBox = QCheckBox("Keep RAW+JPEG Pairs", parent=self.ui.filePage)
+        self.keepPairsCheckBox.setToolTip(
+            "A RAW and JPEG/HEIC with the same name get the same VIRIN"
+        )
+        self.renameOptionsLayout.addWidget(self.keepPairsCheckBox)
+        self.skipDuplicatesCheckBox = QCheckBox("Skip Duplicates", parent=self.ui.filePage)
+        self.skipDuplicatesCheckBox.setToolTip(
+            "Leave files that already got a VIRIN (a card offloaded twice) instead of "
+            "renaming and listing them"
+        )
+        self.renameOptionsLayout.addWidget(self.skipDuplicatesCheckBox)
+        self.watchButton = QPushButton("Watch Folder", parent=self.ui.filePage)
+        self.watchButton.setCheckable(True)
+        self.watchButton.setToolTip(
+            "Rename new files as they arrive and write the metadata page fields to them. "
+            "With an empty shot number the last watch settings are used"
+        )
+        self.renameOptionsLayout.addWidget(self.watchButton)
+        self.ingestButton = QPushButton("Ingest Card", parent=self.ui.filePage)
+        self.ingestButton.setToolTip(
+            "Copy a card into the selected folder with VIRIN names and metadata in one pass"
+        )
+        self.renameOptionsLayout.addWidget(self.ingestButton)
+        self.renameOptionsLayout.addStretch()
+        self.ui.filenameFirstColumnLayoutV.insertLayout(1, self.renameOptionsLayout)
+        # an empty sequence is numbered from the registry, never reusing a VIRIN
+        self.ui.seqEdit.setPlaceholderText("Auto")
+        self.ui.seqEdit.setToolTip(
+            "Leave empty to continue after every VIRIN already issued for this date and shot"
+        )
+        # renames every supported format from one directory listing
+        self.ui.fileFormatComboBox.insertItem(0, ALL_MEDIA)
+
+    def _setup_metadata_options(self):
+        """Adds write options and the Embed button next to the Write button"""
+        parent = self.ui.scrollAreaWidgetContents
+        self.dryRunCheckBox = QCheckBox("Dry Run", parent=parent)
+        self.dryRunCheckBox.setToolTip(
+            "Only report which files would change and how much rewriting is avoided"
+        )
+        self.sidecarCheckBox = QCheckBox("Sidecars", parent=parent)
+        self.sidecarCheckBox.setToolTip(
+            "Write .xmp sidecar files instead of rewriting large videos and RAW files"
+        )
+        self.embedButton = QPushButton("Embed", parent=parent)
+        self.embedButton.setToolTip("Move .xmp sidecar values into the files")
+        self.embedButton.setMaximumSize(self.ui.writeButton.maximumSize())
+        layout = self.ui.metaButtonLayout
+        layout.insertWidget(layout.indexOf(self.ui.writeButton), self.dryRunCheckBox)
+        layout.insertWidget(layout.indexOf(self.ui.writeButton), self.sidecarCheckBox)
+        layout.insertWidget(layout.indexOf(self.ui.writeButton) + 1, self.embedButton)
+
+    def _setup_folder_watcher(self):
+        """Keeps the directory index of the open folder current while it is open"""
+        self.folderWatcher = QFileSystemWatcher(self)
+        self.folderChangeTimer = QTimer(self)
+        self.folderChangeTimer.setSingleShot(True)
+        self.folderChangeTimer.setInterval(FOLDER_CHANGE_DELAY_MS)
+        self.folderChangeTimer.timeout.connect(self._update_format_counts)
+        self.folderWatcher.directoryChanged.connect(self._on_folder_changed)
 
     def _setup_validators(self):
         """Set up input validators"""
@@ -178,6 +424,9 @@ class MainWindow(QMainWindow):
         self.ui.loadButton.clicked.connect(self.load_metadata)
         self.ui.clearButton.clicked.connect(self.clear_metadata_fields)
         self.ui.writeButton.clicked.connect(self.write_metadata_to_files)
+        self.embedButton.clicked.connect(self.embed_sidecars)
+        self.watchButton.toggled.connect(self.toggle_watch_folder)
+        self.ingestButton.clicked.connect(self.ingest_card)
         self.ui.aiSubmitButton.clicked.connect(self.prompt_ai)
         self.ui.aiResetButton.clicked.connect(self.clear_ai_fields)
 
@@ -188,11 +437,16 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.information(self, title, message)
 
-    def _display_empty_shot_seq_warning(self):
-        """Displays a warning message if shot or sequence numbers are not provided."""
-        message = "Please enter a shot and sequence number"
+    def _display_empty_shot_warning(self):
+        """Displays a warning message if no shot number is provided."""
+        message = "Please enter a shot number"
         self._show_message_box("Number Error", message, "warning")
 
+    def _get_start_seq(self):
+        """Typed sequence number, None lets the sequence registry number the files"""
+        seq = self.ui.seqEdit.text()
+        return int(seq) if seq else None
+
     def _display_empty_path_warning(self):
         """Displays a warning message if no file path is selected."""
         if not self.file_path:
@@ -205,17 +459,57 @@ class MainWindow(QMainWindow):
             return self.ui.fileFormatComboBox.currentText()
         return self.ui.metaFileFormatComboBox.currentText()
 
-    def _update_metadata_fields(self, metadata):
-        """Updates UI with loaded metadata"""
-        self.ui.creatorEdit.setText(metadata["Creator"])
-        self.ui.writerEdit.setText(metadata["Writer"])
-        self.ui.descriptionEdit.setPlainText(metadata["Description"])
-        self.ui.titleEdit.setText(metadata["Title"])
-        self.ui.keywordEdit.setText(metadata["Keywords"])
-        self.ui.cityEdit.setText(metadata["City"])
-        self.ui.countryEdit.setText(metadata["Country"])
-        self.ui.stateEdit.setText(metadata["State"])
-        self.ui.copyrightEdit.setText(metadata["Copyright"])
+    def _get_metadata_edits(self):
+        """Meta field name -> edit widget"""
+        return {
+            "Creator": self.ui.creatorEdit,
+            "Writer": self.ui.writerEdit,
+            "Description": self.ui.descriptionEdit,
+            "Title": self.ui.titleEdit,
+            "Keywords": self.ui.keywordEdit,
+            "City": self.ui.cityEdit,
+            "Country": self.ui.countryEdit,
+            "State": self.ui.stateEdit,
+            "Copyright": self.ui.copyrightEdit,
+        }
+
+    def _is_mixed(self, edit):
+        """True for a field that was left empty while the files disagree on it"""
+        text = edit.toPlainText() if edit is self.ui.descriptionEdit else edit.text()
+        return text == EMPTY_STRING and edit.placeholderText() == MIXED
+
+    def _update_metadata_fields(self, consensus):
+        """Updates UI with the loaded per-field consensus and lists files that differ"""
+        report = []
+        for field, edit in self._get_metadata_edits().items():
+            result = consensus[field]
+            if result.value == MIXED:
+                edit.clear()
+                edit.setPlaceholderText(MIXED)
+                report.append(
+                    f"{field}: mixed, most common value on {result.common_count} "
+                    f"of {result.total} files"
+                )
+                continue
+            edit.setPlaceholderText(EMPTY_STRING)
+            if edit is self.ui.descriptionEdit:
+                edit.setPlainText(result.value)
+            else:
+                edit.setText(result.value)
+            if result.outliers:
+                names = [
+                    os.path.basename(path)
+                    for path in result.outliers[:MAX_LISTED_OUTLIERS]
+                ]
+                line = (
+                    f"{field}: {result.total - result.common_count} of {result.total} "
+                    f"files differ: {', '.join(names)}"
+                )
+                if result.total - result.common_count > len(names):
+                    line += " ..."
+                report.append(line)
+        if report:
+            self._show_message_box("Metadata", "\n".join(report), "information")
 
     # Functions listed in priority top down
     def open_folder_chooser(self):
@@ -227,6 +521,56 @@ class MainWindow(QMainWindow):
         )
         self.file_path = path
         self.ui.pathLabel.setText(path)
+        self._watch_folder(path)
+        if path:
+            self._recover_undo_history(path)
+
+    def _watch_folder(self, path):
+        """Watches only the open folder and shows which formats it holds"""
+        if self.folderWatcher.directories():
+            self.folderWatcher.removePaths(self.folderWatcher.directories())
+        if path:
+            self.folderWatcher.addPath(path)
+            self._update_format_counts()
+
+    def _on_folder_changed(self, path):
+        """Change notification: drop the stale listing, refresh the counts once it settles"""
+        self.index.invalidate([path])
+        self.folderChangeTimer.start()
+
+    def _update_format_counts(self):
+        """
+        Shows the number of files per format as combo box tooltips. The selection is left
+        to the user.
+        """
+        if not self.file_path:
+            return
+        try:
+            counts = self.index.counts(self.file_path)
+        except OSError:
+            return
+        counts[ALL_MEDIA] = sum(counts[ext] for ext in MEDIA_EXTENSIONS)
+        summary = ", ".join(
+            f"{count} {ext}" for ext, count in counts.most_common() if ext != ALL_MEDIA
+        )
+        for combo in (self.ui.fileFormatComboBox, self.ui.metaFileFormatComboBox):
+            formats = [combo.itemText(row).lower() for row in range(combo.count())]
+            for row, ext in enumerate(formats):
+                combo.setItemData(row, f"{counts[ext]} files", Qt.ItemDataRole.ToolTipRole)
+            combo.setToolTip(summary)
+
+    def _recover_undo_history(self, path):
+        """Restores undo history for the folder from its rename journal"""
+        try:
+            recovered = self.fr.recover_write_actions(path)
+        except OSError:
+            return
+        if any(not action.complete for action in recovered):
+            message = (
+                "A rename in this folder was interrupted. "
+                "Use Undo to restore the original file names."
+            )
+            self._show_message_box("Recovery", message, "warning")
 
     def display_filename_page(self):
         """Displays filename edit page"""
@@ -242,29 +586,205 @@ class MainWindow(QMainWindow):
         """Displays ai edit page"""
         self.ui.stackedWidget.setCurrentIndex(AI_CAPTION_PAGE_INDEX)
         self.current_window_index = AI_CAPTION_PAGE_INDEX
+        if self.ai.state == AI_UNAVAILABLE:
+            self.start_ai_warm_up()  # Ollama may have been started since
+
+    def paintEvent(self, event):
+        """Starts the AI warm-up once the window has been drawn for the first time"""
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            # may quit a benchmark run, before the warm-up below is ever started
+            StartupProfile.shared().finish("first paint")
+            QTimer.singleShot(0, self.start_ai_warm_up)
+
+    def start_ai_warm_up(self):
+        """
+        Loads the caption model on a background thread. A plain daemon thread, so closing
+        the window never waits for a model server that does not answer.
+        """
+        if self._ai_warm_up and self._ai_warm_up.is_alive():
+            return
+        self._ai_warm_up = threading.Thread(target=self._warm_up_ai, daemon=True)
+        self._ai_warm_up.start()
+        self._show_ai_state()
+
+    def _warm_up_ai(self):
+        self.ai.warm_up()
+        self.ai_state_changed.emit()
+
+    def _show_ai_state(self):
+        """Shows whether the caption model can be used"""
+        state = self.ai.state
+        if state == AI_READY:
+            text = f"AI model {MODEL_NAME} is ready."
+        elif state == AI_UNAVAILABLE:
+            text = (
+                f"AI model {MODEL_NAME} is unavailable ({self.ai.error}). "
+                "Start Ollama and submit again."
+            )
+        elif state == AI_STARTING or self._ai_warm_up:
+            text = f"Loading AI model {MODEL_NAME}..."
+        else:  # AI_NOT_STARTED
+            text = f"AI model {MODEL_NAME} loads in the background."
+        self.aiStatusLabel.setText(text)
 
     def rename_files(self):
         """Renames all files in the selected path based on the provided inputs (path, format, date, shot, sequence)."""
         if self.file_path:
-            if self.ui.shotEdit.text() and self.ui.seqEdit.text():
+            if self.ui.shotEdit.text():
                 date = self.ui.dateEdit.text()
                 shot = int(self.ui.shotEdit.text())
-                seq = int(self.ui.seqEdit.text())
+                seq = self._get_start_seq()
                 ext = self.ui.fileFormatComboBox.currentText()
                 self.rename_thread = FileRenameWorker(
-                    self.fr, self.file_path, ext, date, shot, seq
+                    self.fr,
+                    self.file_path,
+                    ext,
+                    date,
+                    shot,
+                    seq,
+                    capture_date=self.captureDateCheckBox.isChecked(),
+                    recursive=self.subfoldersCheckBox.isChecked(),
+                    global_numbering=self.globalNumberingCheckBox.isChecked(),
+                    keep_pairs=self.keepPairsCheckBox.isChecked(),
+                    duplicates=(
+                        DUPLICATES_SKIP
+                        if self.skipDuplicatesCheckBox.isChecked()
+                        else DUPLICATES_FLAG
+                    ),
                 )
+                self.rename_thread.progress.connect(self._show_rename_progress)
                 self.rename_thread.finished.connect(
                     lambda msg: self._show_message_box(
                         "Notification", msg, "notification"
                     )
                 )
+                self.rename_thread.finished.connect(self.statusBar().clearMessage)
                 self.rename_thread.start()
             else:
-                self._display_empty_shot_seq_warning()
+                self._display_empty_shot_warning()
         else:
             self._display_empty_path_warning()
 
+    def toggle_watch_folder(self, checked):
+        """
+        Starts or stops the watch folder. The current rename fields and the filled in
+        metadata fields are saved as the watch profile and applied to every batch.
+        With an empty shot number the saved profile is used and shown in the rename fields.
+        """
+        if not checked:
+            if self.watch_thread:
+                self.watch_thread.stop()
+            return
+        saved = None if self.ui.shotEdit.text() else load_profile()
+        if not self.file_path or not (self.ui.shotEdit.text() or saved):
+            self.watchButton.setChecked(False)
+            if self.file_path:
+                self._display_empty_shot_warning()
+            else:
+                self._display_empty_path_warning()
+            return
+        if saved:
+            profile = saved
+            self._show_watch_profile(profile)
+        else:
+            metadata = {
+                key: value
+                for key, value in self._get_metadata_to_write().items()
+                if value
+            }
+            profile = WatchProfile(
+                self.ui.fileFormatComboBox.currentText(),
+                int(self.ui.shotEdit.text()),
+                self._get_start_seq(),
+                self.ui.dateEdit.text(),
+                self.captureDateCheckBox.isChecked(),
+                self.keepPairsCheckBox.isChecked(),
+                metadata or None,
+            )
+            save_profile(profile)
+        self.watch_thread = WatchFolderWorker(
+            WatchFolder(self.file_path, profile, self.fr, self.meta)
+        )
+        self.watch_thread.progress.connect(self._show_watch_progress)
+        self.watch_thread.message.connect(
+            lambda msg: self._show_message_box("Notification", msg, "warning")
+        )
+        self.watch_thread.finished.connect(lambda: self.watchButton.setChecked(False))
+        self.watch_thread.finished.connect(self.statusBar().clearMessage)
+        self.watch_thread.start()
+
+    def _show_watch_profile(self, profile):
+        """Fills the rename fields with a saved watch profile"""
+        self.ui.fileFormatComboBox.setCurrentText(profile.selected_extension)
+        self.ui.shotEdit.setText(str(profile.shoot_num))
+        self.ui.seqEdit.setText(
+            EMPTY_STRING if profile.start_seq is None else str(profile.start_seq)
+        )
+        self.ui.dateEdit.setText(profile.date)
+        self.captureDateCheckBox.setChecked(profile.capture_date)
+        self.keepPairsCheckBox.setChecked(profile.keep_pairs)
+
+    def ingest_card(self):
+        """
+        Copies a card (chosen in a dialog) into the selected folder, named with the rename
+        fields and tagged with the filled in metadata fields.
+        """
+        if not self.file_path:
+            self._display_empty_path_warning()
+            return
+        if not self.ui.shotEdit.text():
+            self._display_empty_shot_warning()
+            return
+        card = QFileDialog(self).getExistingDirectory(
+            None, "Select a Card", EMPTY_STRING
+        )
+        if not card:
+            return
+        metadata = {
+            key: value for key, value in self._get_metadata_to_write().items() if value
+        }
+        self.ingest_thread = IngestWorker(
+            Ingest(self.fr, self.meta),
+            card,
+            self.file_path,
+            {
+                "date": self.ui.dateEdit.text(),
+                "shoot_num": int(self.ui.shotEdit.text()),
+                "start_seq": self._get_start_seq(),
+                "selected_extension": self.ui.fileFormatComboBox.currentText(),
+                "capture_date": self.captureDateCheckBox.isChecked(),
+                "keep_pairs": self.keepPairsCheckBox.isChecked(),
+                "metadata": metadata or None,
+            },
+        )
+        self.ingestButton.setEnabled(False)
+        self.ingest_thread.finished.connect(
+            lambda msg: self._show_message_box("Notification", msg, "information")
+        )
+        self.ingest_thread.finished.connect(lambda: self.ingestButton.setEnabled(True))
+        self.ingest_thread.start()
+
+    def _show_watch_progress(self, stats):
+        """Shows the watch folder counters in the status bar"""
+        self.statusBar().showMessage(
+            f"Watching: {stats.files} files renamed, {stats.failed} failed, "
+            f"{stats.files_per_minute:.1f} files/min, {stats.mb_per_second:.1f} MB/s, "
+            f"{stats.queue_depth} queued"
+        )
+
+    def closeEvent(self, event):
+        """Lets a running watch finish its batch before the window closes"""
+        if self.watch_thread and self.watch_thread.isRunning():
+            self.watch_thread.stop()
+            self.watch_thread.wait()
+        super().closeEvent(event)
+
+    def _show_rename_progress(self, renamed, processed):
+        """Shows batched rename progress in the status bar"""
+        self.statusBar().showMessage(f"Renamed {renamed} of {processed} files...")
+
     def clear_date(self):
         """Clears the date input field."""
         self.ui.dateEdit.setText(EMPTY_STRING)
@@ -298,6 +818,8 @@ class MainWindow(QMainWindow):
 
     def clear_metadata_fields(self):
         """Clears all metadata input fields to their default values."""
+        for edit in self._get_metadata_edits().values():
+            edit.setPlaceholderText(EMPTY_STRING)
         self.ui.creatorEdit.setText(DEFAULT_CREATOR)
         self.ui.writerEdit.setText(EMPTY_STRING)
         self.ui.descriptionEdit.setPlainText(EMPTY_STRING)
@@ -308,8 +830,8 @@ class MainWindow(QMainWindow):
         self.ui.stateEdit.setText(EMPTY_STRING)
         self.ui.copyrightEdit.setText(PUBLIC_DOMAIN_COPYRIGHT)
 
-    def write_metadata_to_files(self):
-        """Writes metadata to the files in the selected path based on the input fields."""
+    def _get_metadata_to_write(self):
+        """Metadata keys -> values from the input fields, without untouched mixed fields"""
         # standardizes keyword format
         clean_keywords = self.ui.keywordEdit.text().replace(",", " ").split(" ")
         clean_keywords = [
@@ -329,13 +851,48 @@ class MainWindow(QMainWindow):
             "copyright": self.ui.copyrightEdit.text(),
             "rights": self.ui.copyrightEdit.text(),
         }
+        # mixed fields that were not filled in keep each file's own value
+        edits = self._get_metadata_edits()
+        skipped = {
+            "Creator": ["creator"],
+            "Writer": ["writer"],
+            "Description": ["description"],
+            "Title": ["title", "headline"],
+            "Keywords": ["keywords"],
+            "City": ["city"],
+            "Country": ["country"],
+            "State": ["state"],
+            "Copyright": ["copyright", "rights"],
+        }
+        for field, keys in skipped.items():
+            if self._is_mixed(edits[field]):
+                for key in keys:
+                    del metadata[key]
+        return metadata
+
+    def write_metadata_to_files(self):
+        """Writes metadata to the files in the selected path based on the input fields."""
         self.metadata_thread = MetadataWorker(
-            self.meta, self.file_path, self._get_file_format(), "write", metadata
+            self.meta,
+            self.file_path,
+            self._get_file_format(),
+            "write",
+            self._get_metadata_to_write(),
+            dry_run=self.dryRunCheckBox.isChecked(),
+            sidecar=self.sidecarCheckBox.isChecked(),
         )
         self.metadata_thread.message.connect(
-            lambda: self._show_message_box(
-                "Notification", "Metadata updated succussfully!", "notification"
-            )
+            lambda msg: self._show_message_box("Notification", msg, "notification")
+        )
+        self.metadata_thread.start()
+
+    def embed_sidecars(self):
+        """Writes .xmp sidecar values into the files in the selected path."""
+        self.metadata_thread = MetadataWorker(
+            self.meta, self.file_path, self._get_file_format(), "embed"
+        )
+        self.metadata_thread.message.connect(
+            lambda msg: self._show_message_box("Notification", msg, "notification")
         )
         self.metadata_thread.start()
 
@@ -348,6 +905,8 @@ class MainWindow(QMainWindow):
         input_text = self.ui.aiInputBoxEdit.toPlainText()
         self.ai_thread = AICaptionWorker(self.ai, input_text)
         self.ai_thread.text_update.connect(self.ui.aiOutputBox.setPlainText)
+        # the caption itself retries a model that was unavailable
+        self.ai_thread.finished.connect(self._show_ai_state)
         self.ai_thread.start()
 
     def clear_ai_fields(self):